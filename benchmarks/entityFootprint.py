@@ -0,0 +1,154 @@
+import argparse
+import gc
+import json
+import logging
+import sys
+import timeit
+import tracemalloc
+
+import numpy as np
+from entities.boids.flightZone import FlightZone
+from entities.boids.harvesterBoid import HarvesterBoid
+from entities.boids.hermitBoid import HermitBoid
+from entities.boids.standardBoid import StandardBoid
+from entities.boids.swarmBoid import SwarmBoid
+from entities.boids.swarmState import SwarmState
+from entities.vegetation.flower import Flower
+from entities.vegetation.mushroom import Mushroom
+from entities.vegetation.registry import VegetationRegistry
+from entities.vegetation.spore import Spore
+
+logger = logging.getLogger(__name__)
+
+"""
+Measures the memory and attribute access cost of one entity, before and after
+it is bound to a store.
+
+Run from the repository root:
+
+    python -m benchmarks.entityFootprint --count 10000 --output results.json
+"""
+
+FLIGHT_ZONE = FlightZone(10.0, 10.0, 1.25, 0.30)
+
+BOIDS = {
+    'standard': lambda uid: StandardBoid(uid, FLIGHT_ZONE, 1, 0.1, 0.1, 1),
+    'harvester': lambda uid: HarvesterBoid(uid, FLIGHT_ZONE, None),
+    'swarm': lambda uid: SwarmBoid(uid, FLIGHT_ZONE, None),
+    'hermit': lambda uid: HermitBoid(uid, FLIGHT_ZONE),
+}
+
+VEGETATION = {
+    'flower': lambda uid: Flower(uid, np.zeros(3), 0.1, 0.3, 2),
+    'spore': lambda uid: Spore(uid, np.zeros(3)),
+    'mushroom': lambda uid: Mushroom(uid, np.zeros(3)),
+}
+
+ATTRIBUTES = {'boid': 'velocity', 'vegetation': 'active'}
+
+
+def allocated() -> int:
+    """
+    Bytes currently allocated since tracing started
+    """
+
+    gc.collect()
+
+    return tracemalloc.get_traced_memory()[0]
+
+
+def access(entity: any, attribute: str, number: int) -> dict:
+    """
+    Seconds per read and per write of an attribute of the entity
+    """
+
+    value = getattr(entity, attribute)
+
+    read = timeit.timeit(lambda: getattr(entity, attribute), number=number)
+    write = timeit.timeit(lambda: setattr(entity, attribute, value),
+                          number=number)
+
+    return {'read': read / number, 'write': write / number}
+
+
+def run(kind: str, count: int, number: int) -> dict:
+    if kind in BOIDS:
+        family, factory = 'boid', BOIDS[kind]
+        store = lambda entities: SwarmState(entities, FLIGHT_ZONE)
+    else:
+        family, factory = 'vegetation', VEGETATION[kind]
+        store = VegetationRegistry
+
+    attribute = ATTRIBUTES[family]
+
+    uids = [f'{kind}{i}' for i in range(count)]
+
+    tracemalloc.start()
+
+    entities = [factory(uid) for uid in uids]
+    unbound = allocated()
+
+    # Binding moves the values into the columns of the store
+    bound_store = store(entities)
+    bound = allocated()
+
+    tracemalloc.stop()
+
+    del bound_store
+
+    # Timed without tracing, which slows down every allocation
+    probes = [factory(f'{kind}-probe{i}') for i in range(2)]
+    unbound_access = access(probes[0], attribute, number)
+
+    probe_store = store(probes)
+    bound_access = access(probes[0], attribute, number)
+
+    return {
+        'kind': kind,
+        'count': count,
+        'slotted': not hasattr(entities[0], '__dict__'),
+        'bytes_per_entity': unbound / count,
+        'bytes_per_entity_bound': bound / count,
+        'access': {'attribute': attribute,
+                   'unbound': unbound_access,
+                   'bound': bound_access},
+    }
+
+
+if __name__ == '__main__':
+    kinds = sorted(BOIDS) + sorted(VEGETATION)
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--kinds', nargs='+', choices=kinds, default=kinds)
+    parser.add_argument('--count', type=int, default=10000)
+    parser.add_argument('--number', type=int, default=100000,
+                        help="attribute accesses to time")
+    parser.add_argument('--output', help="write the results as JSON here")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    results = []
+
+    for kind in args.kinds:
+        result = run(kind, args.count, args.number)
+        results.append(result)
+
+        logger.info(f"{kind:>10} "
+                    f"{result['bytes_per_entity']:8.0f} B "
+                    f"({result['bytes_per_entity_bound']:8.0f} B bound), "
+                    f"{result['access']['attribute']} read "
+                    f"{result['access']['unbound']['read'] * 1e9:.0f}ns "
+                    f"({result['access']['bound']['read'] * 1e9:.0f}ns bound)")
+
+    report = {
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
@@ -0,0 +1,169 @@
+import argparse
+import gc
+import json
+import logging
+import sys
+import tracemalloc
+
+import numpy as np
+from entities.boids.manager import BoidManager
+from entities.boids.standardBoid import StandardBoid
+from simulation.simulatedController import SimulatedController
+
+from benchmarks.tickLatency import flight_zone_for
+
+logger = logging.getLogger(__name__)
+
+"""
+Measures what one iteration of the boid control loop allocates, and checks
+that in the in-place mode it does not grow with the size of the swarm.
+
+Ticks that rebuild the neighbour candidates allocate new lists and are
+counted apart; the steady state is every other tick. NumPy's ufunc buffers
+grow with the arrays up to np.getbufsize() elements, so --check compares the
+two largest swarms, which should both be past that. Run from the repository
+root:
+
+    python -m benchmarks.tickAllocations --sizes 1000 4000 16000 --check
+"""
+
+
+def run(size: int,
+        ticks: int,
+        warmup: int,
+        update_rate: float,
+        density: float,
+        skin: float,
+        in_place: bool,
+        seed: int) -> dict:
+    flight_zone = flight_zone_for(size, density)
+    uris = [f'sim://{i}' for i in range(size)]
+
+    boids = [StandardBoid(uri, flight_zone, 1, 0.1, 0.1, 1) for uri in uris]
+
+    controller = SimulatedController(uris, flight_zone,
+                                     realtime=False, seed=seed)
+    manager = BoidManager(update_rate, controller, flight_zone, boids,
+                          skin=skin, in_place=in_place)
+
+    def rebuilds() -> int:
+        return sum(verlet.rebuilds
+                   for verlet in manager.swarm.verlet_lists.values())
+
+    for _ in range(warmup):
+        manager.tick(update_rate)
+        controller.step(update_rate)
+
+    collections = sum(stats['collections'] for stats in gc.get_stats())
+
+    peaks = []
+    rebuild_peaks = []
+
+    tracemalloc.start()
+
+    for _ in range(ticks):
+        before = rebuilds()
+
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+
+        manager.tick(update_rate)
+
+        peak = tracemalloc.get_traced_memory()[1] - start
+
+        if rebuilds() == before:
+            peaks.append(peak)
+        else:
+            rebuild_peaks.append(peak)
+
+        controller.step(update_rate)
+
+    tracemalloc.stop()
+
+    collections = sum(stats['collections']
+                      for stats in gc.get_stats()) - collections
+
+    manager.close()
+
+    return {
+        'size': size,
+        'in_place': in_place,
+        'skin': skin,
+        'ticks': ticks,
+        'steady_ticks': len(peaks),
+        'peak_bytes': max(peaks, default=0),
+        'peak_bytes_rebuilding': max(rebuild_peaks, default=0),
+        'gc_collections': collections,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', nargs='+', type=int,
+                        default=[1000, 4000, 16000])
+    parser.add_argument('--ticks', type=int, default=100)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--update-rate', type=float, default=1.0/60)
+    parser.add_argument('--density', type=float, default=2.0,
+                        help="boids per square meter of floor")
+    parser.add_argument('--skin', type=float, default=0.3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--check', action='store_true',
+                        help="fail if an in-place steady-state tick "
+                             "allocates more for the largest swarm than "
+                             "for the second largest, beyond --slack")
+    parser.add_argument('--slack', type=int, default=4096,
+                        help="bytes a tick may allocate more for the "
+                             "largest swarm")
+    parser.add_argument('--output', help="write the results as JSON here")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    results = []
+
+    for in_place in (False, True):
+        for size in args.sizes:
+            result = run(size, args.ticks, args.warmup, args.update_rate,
+                         args.density, args.skin, in_place, args.seed)
+            results.append(result)
+
+            peak = result['peak_bytes'] / 1024
+            rebuilding = result['peak_bytes_rebuilding'] / 1024
+
+            logger.info(f"{'in place' if in_place else 'default':>8} "
+                        f"N={size:<6} "
+                        f"peak={peak:9.1f}KiB "
+                        f"rebuilding={rebuilding:9.1f}KiB "
+                        f"({result['steady_ticks']}/{result['ticks']} "
+                        f"steady ticks, {result['gc_collections']} "
+                        f"gc collections)")
+
+    report = {
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+    if args.check:
+        in_place = sorted((result for result in results
+                           if result['in_place']),
+                          key=lambda result: result['size'])
+        smaller, largest = in_place[-2], in_place[-1]
+
+        growth = largest['peak_bytes'] - smaller['peak_bytes']
+
+        if growth > args.slack:
+            logger.error(f"A steady-state tick allocates {growth} bytes more "
+                         f"for {largest['size']} boids than for "
+                         f"{smaller['size']}")
+            sys.exit(1)
+
+        logger.info(f"Steady-state allocations grow by {growth} bytes from "
+                    f"{smaller['size']} to {largest['size']} boids")
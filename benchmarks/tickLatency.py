@@ -0,0 +1,143 @@
+import argparse
+import json
+import logging
+import math
+import sys
+
+import numpy as np
+from entities.boids.flightZone import FlightZone
+from entities.boids.harvesterBoid import HarvesterBoid
+from entities.boids.hermitBoid import HermitBoid
+from entities.boids.instrumentation import Instrumentation
+from entities.boids.manager import BoidManager
+from entities.boids.standardBoid import StandardBoid
+from entities.boids.swarmBoid import SwarmBoid
+from simulation.simulatedController import SimulatedController
+
+logger = logging.getLogger(__name__)
+
+"""
+Measures how long one iteration of the boid control loop takes and how it
+scales with the size of the swarm.
+
+Run from the repository root:
+
+    python -m benchmarks.tickLatency --sizes 10 100 1000 --output results.json
+"""
+
+POPULATIONS = {
+    'standard': lambda uid, zone, rng: StandardBoid(uid, zone, 1, 0.1, 0.1, 1,
+                                                    rng),
+    'harvester': lambda uid, zone, rng: HarvesterBoid(uid, zone, None, rng),
+    'swarm': lambda uid, zone, rng: SwarmBoid(uid, zone, None, rng),
+    'hermit': lambda uid, zone, rng: HermitBoid(uid, zone, rng),
+}
+
+
+def flight_zone_for(size: int, density: float) -> any:
+    """
+    Flight zone with the height of the one in run_boids.py and a floor area
+    that keeps `density` boids per square meter
+    """
+
+    side = math.sqrt(size / density)
+
+    return FlightZone(side, side, 1.25, 0.30)
+
+
+def percentiles(durations: list) -> dict:
+    durations = np.asarray(durations)
+
+    return {
+        'p50': float(np.percentile(durations, 50)),
+        'p99': float(np.percentile(durations, 99)),
+        'mean': float(durations.mean()),
+    }
+
+
+def run(population: str,
+        size: int,
+        ticks: int,
+        warmup: int,
+        update_rate: float,
+        density: float,
+        seed: int) -> dict:
+    flight_zone = flight_zone_for(size, density)
+    uris = [f'sim://{i}' for i in range(size)]
+
+    # One stream for the starting positions, one for the boids
+    controller_seed, boid_seed = np.random.SeedSequence(seed).spawn(2)
+
+    rng = np.random.default_rng(boid_seed)
+    boids = [POPULATIONS[population](uri, flight_zone, rng) for uri in uris]
+
+    controller = SimulatedController(uris, flight_zone,
+                                     realtime=False, seed=controller_seed)
+    instrumentation = Instrumentation(capacity=ticks)
+    manager = BoidManager(update_rate, controller, flight_zone, boids,
+                          instrumentation=instrumentation)
+
+    # The ring buffer only keeps the measured ticks
+    for _ in range(warmup + ticks):
+        manager.tick(update_rate)
+        controller.step(update_rate)
+
+    records = instrumentation.snapshot()
+
+    result = {
+        'population': population,
+        'size': size,
+        'ticks': ticks,
+        'budget': update_rate,
+        'tick': percentiles(records['end'] - records['start']),
+        'phases': {name: percentiles(records[f'phase_{name}'])
+                   for name in instrumentation.phases
+                   if records[f'phase_{name}'].any()},
+        'neighbours_mean': float(records['neighbours_mean'].mean()),
+    }
+    result['within_budget'] = result['tick']['p99'] < update_rate
+
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--populations', nargs='+',
+                        choices=sorted(POPULATIONS), default=sorted(POPULATIONS))
+    parser.add_argument('--sizes', nargs='+', type=int,
+                        default=[10, 100, 1000, 10000])
+    parser.add_argument('--ticks', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--update-rate', type=float, default=1.0/60)
+    parser.add_argument('--density', type=float, default=2.0,
+                        help="boids per square meter of floor")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the results as JSON here")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    results = []
+
+    for population in args.populations:
+        for size in args.sizes:
+            result = run(population, size, args.ticks, args.warmup,
+                         args.update_rate, args.density, args.seed)
+            results.append(result)
+
+            logger.info(f"{population:>10} N={size:<6} "
+                        f"p50={result['tick']['p50'] * 1000:.3f}ms "
+                        f"p99={result['tick']['p99'] * 1000:.3f}ms "
+                        f"within budget: {result['within_budget']}")
+
+    report = {
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
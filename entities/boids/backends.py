@@ -0,0 +1,77 @@
+import importlib
+import re
+import subprocess
+import sys
+import time
+
+"""
+Registry of the controller backends the boids can be flown with.
+
+A backend is only imported once it is chosen, so e.g. a simulated run never
+loads cflib and the USB libraries behind the Crazyflie controller.
+"""
+
+# name -> (module, class) of the controller
+BACKENDS = {
+    'crazyflie': ('controllers.crazyflieController', 'CrazyflieController'),
+    'simulated': ('simulation.simulatedController', 'SimulatedController'),
+    'replay': ('simulation.replayController', 'ReplayController'),
+}
+
+# name -> seconds it took to import the backend
+load_times = {}
+
+
+def register(name: str, module: str, attribute: str) -> None:
+    """
+    Adds a backend, `module` is not imported until the backend is loaded
+    """
+
+    BACKENDS[name] = (module, attribute)
+
+
+def load(name: str) -> type:
+    """
+    Imports a backend by name and returns its controller class
+    """
+
+    if name not in BACKENDS:
+        raise KeyError(f"Unknown backend {name!r}, "
+                       f"choose from {', '.join(sorted(BACKENDS))}")
+
+    module, attribute = BACKENDS[name]
+
+    start = time.perf_counter()
+    controller = getattr(importlib.import_module(module), attribute)
+    load_times.setdefault(name, time.perf_counter() - start)
+
+    return controller
+
+
+def import_times(modules: list) -> list:
+    """
+    Measures the import time of every module pulled in by importing
+    `modules` in a fresh interpreter, using python -X importtime.
+
+    :return: (module, own seconds, cumulative seconds) for every imported
+             module, most expensive first
+    """
+
+    code = ''.join(f'import {module}\n' for module in modules)
+
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True)
+
+    times = []
+
+    for line in result.stderr.splitlines():
+        match = re.match(r'import time:\s+(\d+) \|\s+(\d+) \|\s*(\S+)', line)
+
+        if match:
+            own, cumulative, module = match.groups()
+            times.append((module, int(own) / 1e6, int(cumulative) / 1e6))
+
+    if result.returncode != 0:
+        raise ImportError(result.stderr.strip().splitlines()[-1])
+
+    return sorted(times, key=lambda entry: entry[2], reverse=True)
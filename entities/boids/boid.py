@@ -3,9 +3,9 @@ import math
 from enum import Enum, auto, unique
 
 import numpy as np
-from entities.boids.rules import (avoid_others, keep_within_bounds,
-                                  limit_velocity)
-from entities.entity import Entity
+from entities.boids.rules import (avoid_hovering_above, avoid_others,
+                                  keep_within_bounds, limit_velocity)
+from entities.entity import Entity, StoreField
 from numpy.random import default_rng
 
 logger = logging.getLogger(__name__)
@@ -23,17 +23,62 @@ class BoidTypes(Enum):
 
 
 class Boid(Entity):
+    __slots__ = ('_velocity', '_yaw_rate',
+                 '_separation', '_alignment', '_cohesion', '_visual_range',
+                 '_min_speed', '_max_speed', '_minimum_distance',
+                 '_downwash_radius', '_downwash_height',
+                 '_current_food', '_carrying_capacity', '_harvesting_rate',
+                 '_deposit_rate', '_polination_rate', '_eating_rate',
+                 '_flight_zone', '_type', 'yaw',
+                 'detected_boids', 'detected_boids_by_type', 'close_boids',
+                 'hovering_boids', 'instrumentation')
+
+    # Backed by the rows of a SwarmState once the boid has been bound to one
+    position = StoreField('positions')
+    velocity = StoreField('velocities')
+    yaw_rate = StoreField('yaw_rates', 0)
+
+    separation = StoreField('separation')
+    alignment = StoreField('alignment', 0.0)
+    cohesion = StoreField('cohesion', 0.0)
+    visual_range = StoreField('visual_range', 0.0)
+
+    min_speed = StoreField('min_speed')
+    max_speed = StoreField('max_speed')
+    minimum_distance = StoreField('minimum_distance')
+
+    # Other boids closer than downwash_radius horizontally and downwash_height
+    # vertically are caught in (or cause) downwash, see avoid_hovering_above
+    downwash_radius = StoreField('downwash_radius', 0.2)
+    downwash_height = StoreField('downwash_height', 0.5)
+
+    # Resources, only used by the boid types that gather or eat food
+    current_food = StoreField('current_food', 0.0)
+    carrying_capacity = StoreField('carrying_capacity', 0.0)
+    harvesting_rate = StoreField('harvesting_rate', 0.0)
+    deposit_rate = StoreField('deposit_rate', 0.0)
+    polination_rate = StoreField('polination_rate', 0.0)
+    eating_rate = StoreField('eating_rate', 0.0)
+
+    # If True, fly_towards_center and match_velocity only consider boids of the same type
+    flock_with_own_type = False
+
     def __init__(self,
                  uid: str,
                  flight_zone: any,
-                 separation: float) -> None:
+                 separation: float,
+                 rng: any = None) -> None:
+        """
+        :param rng: seed or numpy Generator for the random initial
+                    velocity; unseeded by default
+        """
+
         super().__init__(uid)
 
         self._flight_zone = flight_zone
 
-        rng = default_rng()
+        rng = default_rng(rng)
 
-        self.position = np.zeros(3)
         self.yaw = 0
 
         self.velocity = rng.random(3) * (0.25 - (0.25 * 2))
@@ -47,14 +92,18 @@ class Boid(Entity):
         # This should be considered the absolute minimum distance for the boids to prevent collisions
         self.minimum_distance = 0.3
 
-        self.detected_boids = []
+        # Replaced, never changed in place, by update_detected_boids, so
+        # they start out as the shared empty tuple
+        self.detected_boids = ()
+        self.detected_boids_by_type = {}
+        self.close_boids = ()
+        self.hovering_boids = ()
 
-        self._type = BoidTypes.UNDEFINED
+        # Counts the calls of the rules for this boid, set by BoidManager
+        # when it is instrumented
+        self.instrumentation = None
 
-    # We need to be able to set the positions for the boids
-    @Entity.position.setter
-    def position(self, position: any) -> None:
-        self._position = position
+        self._type = BoidTypes.UNDEFINED
 
     @property
     def flight_zone(self) -> any:
@@ -68,13 +117,61 @@ class Boid(Entity):
         """
         The boid is only able to perceive other boids within its
         limited visual range.
+
+        Also finds the detected boids that are closer than the minimum
+        distance, splits the detected boids by type and finds the boids
+        inside the downwash cylinder (whether detected or not).
+        If the boid is bound to a SwarmState the neighbours are looked up in
+        the spatial index it built for this tick.
         """
-        other_boids = filter(lambda b: b.uid is not self.uid, boids)
 
-        self.detected_boids = list(filter(self.is_boid_in_range, other_boids))
+        if self._store is not None and self._store.detected is not None:
+            swarm = self._store
+            index = self._store_index
+
+            self.detected_boids = [swarm.boids[i]
+                                   for i in swarm.detected.of(index)]
+            if swarm.detected_by_type is None:
+                # Not split by the swarm state when it perceives in place
+                self.detected_boids_by_type = {}
+
+                for b in self.detected_boids:
+                    self.detected_boids_by_type.setdefault(b.type,
+                                                           []).append(b)
+            else:
+                self.detected_boids_by_type = {
+                    BoidTypes(boid_type): [swarm.boids[i]
+                                           for i in neighbours.of(index)]
+                    for boid_type, neighbours
+                    in swarm.detected_by_type.items()}
+
+            self.close_boids = [swarm.boids[i]
+                                for i in swarm.close.of(index)]
+            self.hovering_boids = [swarm.boids[i]
+                                   for i in swarm.downwash.of(index)]
+            return
+
+        other_boids = [b for b in boids if b.uid is not self.uid]
+        distances = self.distance_to_swarm(other_boids)
+
+        self.detected_boids = [b for b, d in zip(other_boids, distances)
+                               if d < self.visual_range]
+        self.close_boids = [b for b, d in zip(other_boids, distances)
+                            if d < min(self.visual_range, self.minimum_distance)]
+
+        self.hovering_boids = [
+            b for b in other_boids
+            if np.linalg.norm(b.position[:2] - self.position[:2]) <
+            self.downwash_radius and
+            abs(b.position[2] - self.position[2]) < self.downwash_height]
+
+        self.detected_boids_by_type = {}
+
+        for b in self.detected_boids:
+            self.detected_boids_by_type.setdefault(b.type, []).append(b)
 
     def get_detected_boids_of_type(self, boid_type: any) -> list:
-        return list(filter(lambda b: b.type is boid_type, self.detected_boids))
+        return self.detected_boids_by_type.get(boid_type, [])
 
     def is_boid_in_range(self, boid: any) -> bool:
         """
@@ -113,5 +210,6 @@ class Boid(Entity):
         """
 
         avoid_others(self, delta_time)
+        avoid_hovering_above(self, delta_time)
         keep_within_bounds(self, delta_time)
         limit_velocity(self)
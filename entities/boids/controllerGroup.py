@@ -0,0 +1,132 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+"""
+Several controllers behind the interface of one.
+
+Every controller owns a subset of the drones, typically the ones on one
+radio. Positions are read from all of them at once on a thread pool and
+merged, and commands are split by owner and sent to all of them at once.
+"""
+
+
+class ControllerGroup:
+    def __init__(self,
+                 controllers: list,
+                 uris: list | None = None) -> None:
+        """
+        :param controllers: controller interface objects
+        :param uris: the uris owned by every controller, in the same order;
+                     read from the `uris` of the controllers if not given
+        """
+
+        if uris is None:
+            uris = [controller.uris for controller in controllers]
+
+        self.controllers = list(controllers)
+
+        # uri -> index of the controller that owns it
+        self.owners = {}
+
+        for i, owned in enumerate(uris):
+            for uri in owned:
+                if uri in self.owners:
+                    raise ValueError(f"{uri} is owned by two controllers")
+
+                self.owners[uri] = i
+
+        self.uris = sorted(self.owners)
+
+        self.PHYSICAL = any(controller.PHYSICAL for controller in controllers)
+
+        self._pool = None
+        self._stack = None
+
+    def __enter__(self) -> 'ControllerGroup':
+        self._stack = ExitStack()
+
+        try:
+            for controller in self.controllers:
+                self._stack.enter_context(controller)
+        except BaseException:
+            self._stack.close()
+            raise
+
+        self._pool = ThreadPoolExecutor(max_workers=len(self.controllers),
+                                        thread_name_prefix='controller')
+
+        return self
+
+    def __exit__(self, *args) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+        if self._stack is not None:
+            stack, self._stack = self._stack, None
+            stack.__exit__(*args)
+
+    def _map(self, call: any, arguments: list) -> list:
+        """
+        Runs call(controller, argument) for every controller with an
+        argument, concurrently once the group has been entered
+        """
+
+        jobs = [(controller, argument)
+                for controller, argument in zip(self.controllers, arguments)
+                if argument is not None]
+
+        if self._pool is None or len(jobs) < 2:
+            return [call(controller, argument) for controller, argument in jobs]
+
+        futures = [self._pool.submit(call, controller, argument)
+                   for controller, argument in jobs]
+
+        # Waits for all of them, and raises the first error if any
+        return [future.result() for future in futures]
+
+    def _split(self, values: dict) -> list:
+        """
+        Splits a dict keyed by uri into one dict per controller, None for
+        controllers without any of the uris
+        """
+
+        parts = [None] * len(self.controllers)
+
+        for uri, value in values.items():
+            owner = self.owners[uri]
+
+            if parts[owner] is None:
+                parts[owner] = {}
+
+            parts[owner][uri] = value
+
+        return parts
+
+    @property
+    def positions(self) -> dict:
+        """
+        Positions of the drones of all controllers
+        """
+
+        positions = {}
+
+        for part in self._map(lambda controller, _: controller.positions,
+                              [True] * len(self.controllers)):
+            positions.update(part)
+
+        return positions
+
+    def set_swarm_velocities(self, velocities: dict, yaw_rate: float) -> None:
+        self._map(lambda controller, part:
+                  controller.set_swarm_velocities(part, yaw_rate),
+                  self._split(velocities))
+
+    def swarm_move(self,
+                   positions: dict,
+                   yaw: float,
+                   time_to_move: float | None = None,
+                   relative: bool = False) -> None:
+        self._map(lambda controller, part:
+                  controller.swarm_move(part, yaw, time_to_move, relative),
+                  self._split(positions))
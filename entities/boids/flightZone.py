@@ -0,0 +1,12 @@
+from collections import namedtuple
+
+"""
+Dimensions of the flight zone.
+
+Has the fields of the FlightZone of the controllers package
+(controllers.utils.utils), which is all the boids and the simulation read,
+so simulated, replayed and swept runs do not import that package.
+"""
+
+# x by y meters centred on the origin, z meters high from floor_offset up
+FlightZone = namedtuple('FlightZone', ('x', 'y', 'z', 'floor_offset'))
@@ -4,13 +4,21 @@ from entities.boids.rules import (fly_towards_center, match_velocity,
 
 
 class HarvesterBoid(Boid):
+    __slots__ = ('polination_factor', 'sensory_range', 'depositing',
+                 'home', 'at_home',
+                 'detected_active_flowers', 'detected_harvester_boids')
+
+    flock_with_own_type = True
+
     def __init__(self,
                  uid: str,
                  flight_zone: any,
-                 home: any) -> None:
+                 home: any,
+                 rng: any = None) -> None:
         super().__init__(flight_zone=flight_zone,
                          uid=uid,
-                         separation=1)
+                         separation=1,
+                         rng=rng)
         self.alignment = 1
         self.cohesion = 1
         self.visual_range = 0.5
@@ -30,16 +38,15 @@ class HarvesterBoid(Boid):
         self.home = home
         self.at_home = True
 
-        self.detected_active_flowers = []
-        self.detected_harvester_boids = []
+        self.detected_active_flowers = ()
+        self.detected_harvester_boids = ()
 
         self._type = BoidTypes.HARVESTER
 
     def perceive(self, boids: list) -> None:
         self.update_detected_boids(boids)
 
-        self.detected_harvester_boids = self.get_detected_boids_of_type(
-            self.type)
+        self.detected_harvester_boids = self.get_detected_boids_of_type(self.type)
 
         # TODO: Perceive flowers
 
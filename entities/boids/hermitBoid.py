@@ -4,6 +4,8 @@ from entities.boids.boid import Boid, BoidTypes
 
 
 class HermitBoid(Boid):
+    __slots__ = ('state',)
+
     @unique
     class States(Enum):
         ROAMING: int = auto()
@@ -11,10 +13,12 @@ class HermitBoid(Boid):
 
     def __init__(self,
                  uid: str,
-                 flight_zone: any) -> None:
+                 flight_zone: any,
+                 rng: any = None) -> None:
         super().__init__(uid=uid,
                          flight_zone=flight_zone,
-                         separation=1)
+                         separation=1,
+                         rng=rng)
 
         self.state = self.States.ROAMING
 
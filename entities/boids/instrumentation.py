@@ -0,0 +1,207 @@
+import csv
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+"""
+Instrumentation of the control loop.
+
+Every tick is summarised in one record (phase timings, rule call counts and
+neighbour counts) that is written into a fixed-size ring buffer.
+"""
+
+PHASES = ('ingest',
+          'perceive',
+          'update',
+          'fly_towards_center',
+          'match_velocity',
+          'avoid_others',
+          'avoid_hovering_above',
+          'keep_within_bounds',
+          'limit_velocity',
+          'send',
+          'record',
+          'stream',
+          'vegetation')
+
+RULES = ('fly_towards_center',
+         'avoid_others',
+         'match_velocity',
+         'limit_velocity',
+         'keep_within_bounds',
+         'move_towards_point',
+         'avoid_hovering_above')
+
+
+class NullInstrumentation:
+    """
+    Default instrumentation, records nothing
+    """
+
+    enabled = False
+
+    _phase = nullcontext()
+
+    def on_tick_start(self, delta_time: float) -> None:
+        pass
+
+    def on_tick_end(self) -> None:
+        pass
+
+    def phase(self, name: str) -> any:
+        return self._phase
+
+    def rule_called(self, name: str, count: int = 1) -> None:
+        pass
+
+    def neighbours(self, counts: any) -> None:
+        pass
+
+
+class Instrumentation:
+    enabled = True
+
+    def __init__(self,
+                 capacity: int = 4096,
+                 phases: tuple = PHASES,
+                 rules: tuple = RULES) -> None:
+        """
+        :param capacity: number of ticks kept in the ring buffer
+        :param phases: names of the phases that are timed
+        :param rules: names of the rules whose calls are counted
+        """
+
+        self.phases = phases
+        self.rules = rules
+
+        self._untimed = nullcontext()
+
+        self.dtype = np.dtype(
+            [('tick', np.int64),
+             ('start', np.float64),
+             ('end', np.float64),
+             ('delta_time', np.float64),
+             ('boids', np.int64),
+             ('neighbours_mean', np.float64),
+             ('neighbours_max', np.int64)] +
+            [(f'phase_{name}', np.float64) for name in phases] +
+            [(f'calls_{name}', np.int64) for name in rules])
+
+        self._buffer = np.zeros(capacity, dtype=self.dtype)
+        self._record = np.zeros((), dtype=self.dtype)
+
+        self._lock = threading.Lock()
+        self.ticks = 0
+
+        # Neighbour count of every boid in the latest tick
+        self.neighbour_counts = np.zeros(0, dtype=np.int64)
+
+        # Called with the tick number and delta_time at the start of a tick
+        self.tick_start_hooks = []
+        # Called with the finished record at the end of a tick
+        self.tick_end_hooks = []
+
+    @property
+    def capacity(self) -> int:
+        return len(self._buffer)
+
+    def on_tick_start(self, delta_time: float) -> None:
+        record = self._record
+        record[...] = 0
+        record['tick'] = self.ticks
+        record['delta_time'] = delta_time
+        record['start'] = time.perf_counter()
+
+        for hook in self.tick_start_hooks:
+            hook(self.ticks, delta_time)
+
+    def on_tick_end(self) -> None:
+        self._record['end'] = time.perf_counter()
+
+        with self._lock:
+            self._buffer[self.ticks % self.capacity] = self._record
+            self.ticks += 1
+
+        for hook in self.tick_end_hooks:
+            hook(self._record)
+
+    def phase(self, name: str) -> any:
+        """
+        Times the phase, unless it is not one of the phases recorded
+        """
+
+        if name not in self.phases:
+            return self._untimed
+
+        return self._timed(f'phase_{name}')
+
+    @contextmanager
+    def _timed(self, field: str) -> any:
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self._record[field] += time.perf_counter() - start
+
+    def rule_called(self, name: str, count: int = 1) -> None:
+        # Rules that are not counted are ignored
+        if name in self.rules:
+            self._record[f'calls_{name}'] += count
+
+    def neighbours(self, counts: any) -> None:
+        # counts may be a buffer that is reused next tick, so it is copied
+        if self.neighbour_counts.shape != counts.shape:
+            self.neighbour_counts = np.empty(counts.shape, dtype=np.int64)
+
+        np.copyto(self.neighbour_counts, counts, casting='unsafe')
+
+        self._record['boids'] = len(counts)
+
+        if len(counts):
+            self._record['neighbours_mean'] = counts.mean()
+            self._record['neighbours_max'] = counts.max()
+
+    def snapshot(self) -> any:
+        """
+        Returns a copy of the recorded ticks, oldest first.
+
+        Safe to call from another thread while the loop is running.
+        """
+
+        with self._lock:
+            if self.ticks <= self.capacity:
+                return self._buffer[:self.ticks].copy()
+
+            split = self.ticks % self.capacity
+
+            return np.concatenate((self._buffer[split:], self._buffer[:split]))
+
+    def latest(self) -> any:
+        """
+        Returns a copy of the record of the latest finished tick, if any
+        """
+
+        with self._lock:
+            if self.ticks == 0:
+                return None
+
+            return self._buffer[(self.ticks - 1) % self.capacity].copy()
+
+    def to_csv(self, path: str) -> None:
+        records = self.snapshot()
+
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(self.dtype.names)
+            writer.writerows(records.tolist())
+
+    def to_json(self, path: str) -> None:
+        records = self.snapshot()
+
+        with open(path, 'w') as file:
+            json.dump([dict(zip(self.dtype.names, record))
+                       for record in records.tolist()], file)
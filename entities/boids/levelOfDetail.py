@@ -0,0 +1,204 @@
+import numpy as np
+from entities.boids.spatialIndex import (Neighbours, find_neighbours,
+                                         find_neighbours_of, kd_tree,
+                                         within_downwash)
+
+"""
+Level-of-detail scheduling of the boid updates.
+
+Boids in close quarters perceive their flock and run the flocking rules
+(fly_towards_center, match_velocity) every tick, isolated ones only every
+few ticks, with delta_time scaled to the time since their last update. The
+safety rules (avoid_others, avoid_hovering_above, keep_within_bounds,
+limit_velocity) run for every boid on every tick, against neighbours found
+with a search out to the minimum distance and the downwash cylinder only,
+which is much cheaper than the one at visual range. Once most boids are due
+a single search at visual range serves both.
+"""
+
+
+class LevelOfDetail:
+    def __init__(self,
+                 near_distance: float = 0.25,
+                 crowded: int = 4,
+                 max_interval: int = 4,
+                 vegetation: any = None) -> None:
+        """
+        :param near_distance: boids with another boid or vegetation closer
+                              than this update every tick; one more tick is
+                              skipped for every further near_distance, up to
+                              max_interval
+        :param crowded: boids with at least this many boids in visual range
+                        update every tick
+        :param max_interval: most ticks between two updates of a boid, also
+                             the interval of boids that perceive nobody
+        :param vegetation: VegetationRegistry, ResourceStore or Ecosystem
+                           whose vegetation counts as near
+        """
+
+        self.near_distance = near_distance
+        self.crowded = crowded
+        self.max_interval = max_interval
+
+        # An Ecosystem keeps its vegetation in its store
+        self.vegetation = getattr(vegetation, 'store', vegetation)
+
+        # Per boid: ticks between updates, ticks until the next update,
+        # seconds since the last one and boids in visual range then
+        self.interval = None
+        self.remaining = None
+        self.elapsed = None
+        self.counts = None
+
+        self.ticks = 0
+        self.updated = 0
+
+    def _reset(self, size: int) -> None:
+        self.interval = np.ones(size, dtype=np.intp)
+        self.remaining = np.zeros(size, dtype=np.intp)
+        self.elapsed = np.zeros(size)
+        self.counts = np.zeros(size, dtype=np.intp)
+        self.ticks = 0
+
+    @property
+    def statistics(self) -> dict:
+        """
+        How many boids updated their flocking in the last tick, and how many
+        boids there are at every interval
+        """
+
+        intervals = {} if self.interval is None else \
+            dict(zip(*(values.tolist() for values in
+                       np.unique(self.interval, return_counts=True))))
+
+        return {'updated': self.updated, 'intervals': intervals}
+
+    def _intervals(self, swarm: any, rows: any, detected: any) -> any:
+        """
+        Interval of every boid in `rows`, from the neighbours it perceived
+        """
+
+        nearest = np.full(len(rows), np.inf)
+
+        if len(detected):
+            np.minimum.at(nearest, detected.rows, detected.distances)
+
+        if self.vegetation is not None and len(self.vegetation) and \
+                len(rows):
+            distances, _ = self.vegetation.tree.query(swarm.positions[rows])
+            np.minimum(nearest, distances, out=nearest)
+
+        # Boids that perceive nothing are infinitely far away
+        interval = np.clip(np.floor(nearest / self.near_distance),
+                           1, self.max_interval).astype(np.intp)
+
+        interval[detected.count() >= self.crowded] = 1
+
+        return interval
+
+    def step(self, swarm: any, delta_time: float) -> None:
+        """
+        Runs perceive + update for the boids due and the safety rules for all
+        of them, in place of swarm.step
+        """
+
+        size = len(swarm)
+
+        if self.interval is None or len(self.interval) != size:
+            self._reset(size)
+
+        instrumentation = swarm.instrumentation
+        positions = swarm.positions
+
+        self.elapsed += delta_time
+        self.remaining -= 1
+
+        with instrumentation.phase('perceive'):
+            rows = np.flatnonzero(self.remaining <= 0)
+
+            tree = kd_tree(positions) if size else None
+
+            close_range = np.minimum(swarm.visual_range,
+                                     swarm.minimum_distance)
+            downwash_range = np.hypot(swarm.downwash_radius,
+                                      swarm.downwash_height)
+
+            if 2 * len(rows) >= size:
+                # Most boids are due, one search over everyone is cheaper
+                # and gives the close boids of everyone as well
+                everyone, swarm.close = find_neighbours(positions,
+                                                        swarm.visual_range,
+                                                        swarm.minimum_distance,
+                                                        tree=tree)
+                detected = everyone.take(rows)
+                nearby = everyone if \
+                    (downwash_range <= swarm.visual_range).all() else None
+            else:
+                detected, _ = find_neighbours_of(positions,
+                                                 swarm.visual_range,
+                                                 swarm.minimum_distance,
+                                                 rows,
+                                                 tree)
+
+                # Every boid, due or not, avoids the boids it is too close
+                # to or in the downwash of; a search that only reaches that
+                # far is much cheaper than the one at visual range
+                nearby, _ = find_neighbours(
+                    positions,
+                    np.maximum(close_range, downwash_range),
+                    swarm.minimum_distance,
+                    tree=tree)
+                swarm.close = nearby.subset(
+                    nearby.distances < close_range[nearby.rows])
+
+            if nearby is None:
+                swarm.sense_downwash()
+            else:
+                swarm.downwash = within_downwash(nearby,
+                                                 positions,
+                                                 swarm.downwash_radius,
+                                                 swarm.downwash_height)
+
+            own_rows = rows[detected.rows]
+            same_type = swarm.types[own_rows] == swarm.types[detected.indices]
+            flockmates = detected.subset(
+                same_type | ~swarm.flock_with_own_type[own_rows])
+
+            interval = self._intervals(swarm, rows, detected)
+
+            self.interval[rows] = interval
+            self.counts[rows] = detected.count()
+
+            if self.ticks == 0:
+                # Every boid starts out due, spread their next updates so
+                # the boids with the same interval take turns
+                self.remaining[rows] = 1 + rows % interval
+            else:
+                self.remaining[rows] = interval
+
+            # A boid about to collide is brought back to full rate
+            endangered = swarm.close.count() > 0
+            self.interval[endangered] = 1
+            self.remaining[endangered] = np.minimum(self.remaining[endangered],
+                                                    1)
+
+            instrumentation.neighbours(self.counts)
+
+            # Flockmates over the rows of the whole swarm, only the boids
+            # due have any
+            swarm.flockmates = Neighbours(size,
+                                          rows[flockmates.rows],
+                                          flockmates.indices,
+                                          flockmates.distances)
+
+        # The boids due flock over the time since their last update, the
+        # safety rules run for every boid
+        flocking_time = np.zeros(size)
+        flocking_time[rows] = self.elapsed[rows]
+
+        swarm.update(delta_time, flocking_time=flocking_time)
+
+        self.elapsed[rows] = 0
+
+        self.updated = len(rows)
+        self.ticks += 1
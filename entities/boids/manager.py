@@ -1,5 +1,13 @@
 import logging
-import time
+
+from entities.boids.controllerGroup import ControllerGroup
+from entities.boids.instrumentation import NullInstrumentation
+from entities.boids.pipeline import PipelinedController
+from entities.boids.poseCache import PoseCache
+from entities.boids.scheduler import FixedRateScheduler
+from entities.boids.swarmState import SwarmState
+from entities.boids.telemetry import TelemetryRecorder
+from entities.boids.transmission import CommandTransmitter
 
 logger = logging.getLogger(__name__)
 
@@ -15,14 +23,100 @@ class BoidManager:
                  update_rate: float,
                  controller: any,
                  flight_zone: any,
-                 boids: list) -> None:
+                 boids: list,
+                 vectorized: bool = True,
+                 scheduler: FixedRateScheduler | None = None,
+                 pipelined: bool = False,
+                 max_staleness: float | None = None,
+                 instrumentation: any = None,
+                 workers: int | None = None,
+                 vegetation: any = None,
+                 telemetry: str | None = None,
+                 skin: float = 0.0,
+                 command_threshold: float = 0.0,
+                 keep_alive: float = 0.5,
+                 stream: tuple | None = None,
+                 in_place: bool = False,
+                 level_of_detail: any = None,
+                 pose_cache: float | None = None,
+                 pose_clock: any = None) -> None:
         """
         :param update_rate: the rate at which the main loop is run
-        :param controller: controller interface object
+        :param controller: controller interface object, or a list of them
+                           that each own some of the drones; the manager
+                           enters such a list as a ControllerGroup until
+                           close
         :param flight_zone: dimensions of the flight zone
         :param boids: List of boid-objects
+        :param vectorized: update all boids at once through the SwarmState
+                           instead of calling perceive/update on every boid
+        :param scheduler: decides when ticks run and their delta_time;
+                          defaults to a FixedRateScheduler at update_rate
+        :param pipelined: read positions and send velocities on their own
+                          threads, overlapping with the computation
+        :param max_staleness: oldest positions, in seconds, a pipelined tick
+                              may use; defaults to update_rate
+        :param instrumentation: Instrumentation that records every tick;
+                                nothing is recorded by default
+        :param workers: if given, the vectorized update is split over this
+                        many processes sharing the swarm state
+        :param vegetation: ResourceStore (or Ecosystem) with the vegetation
+                           the boids interact with; stepped after every tick
+        :param telemetry: if given, every tick is recorded into a telemetry
+                          log at this path
+        :param skin: if positive, neighbour lists are reused until a boid
+                     has moved half this far, see VerletList
+        :param command_threshold: a velocity command is only sent if it
+                                  changed by more than this, in m/s
+        :param keep_alive: unchanged commands are sent again after this
+                           many seconds; 0 or less turns it off, so only
+                           commands that changed by more than
+                           command_threshold are sent
+        :param stream: if given, a (host, port) on which every tick is
+                       streamed to external viewers, see TelemetryServer
+        :param in_place: perceive into reused masks over the neighbour
+                         lists, see SwarmState; use together with a skin.
+                         Cannot be combined with workers
+        :param level_of_detail: LevelOfDetail that runs the vectorized
+                                update in place of the swarm state, so
+                                isolated boids flock less often; it is given
+                                the vegetation unless it has its own.
+                                Cannot be combined with workers, a skin or
+                                in_place
+        :param pose_cache: if given, positions are read from a PoseCache
+                           that is fed while the loop runs and extrapolates
+                           them this many seconds past the start of the
+                           tick, e.g. the latency of the commands
+        :param pose_clock: time source of the PoseCache, by default the
+                           monotonic wall clock; simulated and replayed
+                           runs pass their own time
         """
         self._update_rate = update_rate
+
+        self.pipelined = pipelined
+
+        # A group made here is entered here, which enters its controllers
+        # and starts the pool they are used on concurrently; close exits it
+        self.group = None
+
+        if isinstance(controller, (list, tuple)):
+            controller = ControllerGroup(controller)
+            self.group = controller
+
+        self.pose_cache = None
+
+        if pose_cache is not None:
+            controller = PoseCache(controller,
+                                   [boid.uid for boid in boids],
+                                   lead=pose_cache,
+                                   **({} if pose_clock is None
+                                      else {'clock': pose_clock}))
+            self.pose_cache = controller
+
+        if pipelined:
+            controller = PipelinedController(controller,
+                                             max_staleness or update_rate)
+
         self.controller = controller
 
         self.flight_zone = flight_zone
@@ -31,17 +125,126 @@ class BoidManager:
 
         self.boids = boids
 
+        if level_of_detail is not None and \
+                (not vectorized or workers or skin > 0 or in_place):
+            # LevelOfDetail does its own neighbour search, it would quietly
+            # drop these
+            raise ValueError("level_of_detail cannot be combined with "
+                             "vectorized=False, workers, skin or in_place")
+
+        if workers and in_place:
+            # The workers keep their own neighbour lists per shard
+            raise ValueError("in_place cannot be combined with workers")
+
+        # The boids become views onto the rows of the swarm state
+        if workers:
+            # Only pulls in multiprocessing when it is used
+            from entities.boids.parallelSwarmState import ParallelSwarmState
+
+            self.swarm = ParallelSwarmState(boids, flight_zone, workers, skin)
+        else:
+            self.swarm = SwarmState(boids, flight_zone, skin, in_place)
+
+        self._view_rows()
+
+        self.vectorized = vectorized
+
+        self.instrumentation = instrumentation or NullInstrumentation()
+        self.swarm.instrumentation = self.instrumentation
+
+        # The scalar rules count their calls into the instrumentation of
+        # the boid they run for
+        for boid in boids:
+            boid.instrumentation = instrumentation
+
+        self.scheduler = scheduler or FixedRateScheduler(update_rate)
+
+        self.vegetation = vegetation
+
+        if vegetation is not None:
+            vegetation.attach(self.swarm)
+
+        self.level_of_detail = level_of_detail
+
+        if level_of_detail is not None and level_of_detail.vegetation is None:
+            level_of_detail.vegetation = getattr(vegetation, 'store',
+                                                 vegetation)
+
+        self.transmitter = CommandTransmitter(self.controller,
+                                              self.swarm.uids,
+                                              command_threshold,
+                                              keep_alive)
+
+        self.recorder = None
+
+        if telemetry is not None:
+            self.recorder = TelemetryRecorder(telemetry, self.swarm)
+
+        self.server = None
+
+        if stream is not None:
+            # Only pulls in the socket machinery when it is used
+            from entities.boids.streaming import TelemetryServer
+
+            self.server = TelemetryServer(self.swarm, vegetation, stream)
+            self.server.start()
+
+        if self.group is not None:
+            self.group.__enter__()
+
+    def _view_rows(self) -> None:
+        """
+        Maps every uid to its rows of the swarm state, handed out by the
+        velocities and positions properties
+        """
+
+        self._velocities = {uid: self.swarm.velocities[i]
+                            for i, uid in enumerate(self.swarm.uids)}
+        self._positions = {uid: self.swarm.positions[i]
+                           for i, uid in enumerate(self.swarm.uids)}
+
+    def close(self) -> None:
+        """
+        Frees the resources of the swarm state, e.g. its worker processes,
+        closes the telemetry log and stream, and exits the controllers it
+        grouped
+        """
+
+        self.swarm.release()
+
+        # Releasing may have moved the columns into new arrays
+        self._view_rows()
+
+        if self.recorder is not None:
+            self.recorder.close()
+
+        if self.server is not None:
+            self.server.stop()
+
+        if self.group is not None:
+            self.group.__exit__(None, None, None)
+            self.group = None
+
     def __del__(self) -> None:
         for boid in self.boids:
             del boid
 
     @property
     def velocities(self) -> dict:
-        return {boid.uid: boid.velocity for boid in self.boids}
+        """
+        Velocity of every boid by uid; the same dict of views onto the swarm
+        state every time, so it always holds the current values
+        """
+
+        return self._velocities
 
     @property
     def positions(self) -> dict:
-        return {boid.uid: boid.position for boid in self.boids}
+        """
+        Position of every boid by uid, see velocities
+        """
+
+        return self._positions
 
     def update_positions(self,
                          positions: list,
@@ -61,6 +264,52 @@ class BoidManager:
 
         self.controller.set_swarm_velocities(velocities, yaw_rate)
 
+    def tick(self, delta_time: float) -> None:
+        """
+        Runs one iteration of the control loop
+        """
+
+        instrumentation = self.instrumentation
+        instrumentation.on_tick_start(delta_time)
+
+        with instrumentation.phase('ingest'):
+            self.swarm.set_positions(self.controller.positions)
+
+        if self.vectorized and self.level_of_detail is not None:
+            self.level_of_detail.step(self.swarm, delta_time)
+        elif self.vectorized:
+            self.swarm.step(delta_time)
+        else:
+            with instrumentation.phase('perceive'):
+                self.swarm.perceive()
+
+            with instrumentation.phase('update'):
+                for boid in self.boids:
+                    # TODO: Make parallel
+
+                    boid.perceive(self.boids)
+                    boid.update(delta_time)
+
+        # set the boids moving
+        with instrumentation.phase('send'):
+            self.transmitter.send(self.swarm.velocities, 0)
+
+        if self.recorder is not None:
+            with instrumentation.phase('record'):
+                self.recorder.record(delta_time,
+                                     self.swarm.positions,
+                                     self.swarm.velocities)
+
+        if self.server is not None:
+            with instrumentation.phase('stream'):
+                self.server.publish()
+
+        if self.vegetation is not None:
+            with instrumentation.phase('vegetation'):
+                self.vegetation.step(delta_time)
+
+        instrumentation.on_tick_end()
+
     def boid_loop(self) -> None:
         """
         Starts the control loop that runs the boid behaviour
@@ -73,27 +322,31 @@ class BoidManager:
 
         self.flying = True
 
-        last_tick = time.time()
+        try:
+            if self.pose_cache is not None:
+                self.pose_cache.start()
 
-        while self.flying:
-            start = time.time()
-            delta_time = start - last_tick
+            if self.pipelined:
+                self.controller.start()
 
-            current_positions = self.controller.positions
+            self.scheduler.start()
 
-            # TODO: 2023-06-12 This feels inefficient...
+            while self.flying:
+                delta_time = self.scheduler.wait()
 
-            for boid in self.boids:
-                boid.position = current_positions[boid.uid]
+                self.tick(delta_time)
+        finally:
+            if self.pipelined:
+                self.controller.stop()
 
-            for boid in self.boids:
-                # TODO: Make parallel
+            if self.pose_cache is not None:
+                self.pose_cache.stop()
 
-                boid.perceive(self.boids)
-                boid.update(delta_time)
+        logger.info(f"Control loop stopped: {self.scheduler.statistics}, "
+                    f"commands: {self.transmitter.statistics}")
 
-            # set the boids moving
-            self.update_velocities(self.velocities, 0)
+        if self.pose_cache is not None:
+            logger.info(f"Pose cache: {self.pose_cache.statistics}")
 
-            last_tick = time.time()
-            time.sleep(max(self._update_rate - (time.time() - start), 0))
+        if self.level_of_detail is not None:
+            logger.info(f"Level of detail: {self.level_of_detail.statistics}")
@@ -0,0 +1,190 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+from entities.boids.swarmState import EVERYONE, SwarmState
+
+"""
+Swarm state that runs the update of its boids on several cores.
+
+The columns live in one block of shared memory, so the worker processes read
+the whole swarm and write their part of the result without pickling any
+arrays. The workers are started from a fork server rather than forked from
+the manager, which by then runs the threads of the controllers and the pose
+cache, and all of them are started and attached before the first tick.
+"""
+
+# The state of the worker process, see _attach
+_state = None
+
+
+def _attach(name: str, layout: dict, flight_zone: any, skin: float) -> None:
+    global _state
+
+    memory = shared_memory.SharedMemory(name=name)
+
+    arrays = {column: np.ndarray(shape, dtype, memory.buf, offset)
+              for column, (shape, dtype, offset) in layout.items()}
+
+    _state = SwarmState.from_arrays(arrays, flight_zone, skin)
+    # Keeps the block mapped for as long as the worker lives
+    _state.memory = memory
+
+
+def _ready() -> None:
+    """
+    Does nothing, returns once the worker has attached
+    """
+
+
+def _update_shard(first: int, last: int, delta_time: float) -> any:
+    """
+    Updates the boids first..last against the whole swarm, writing their new
+    velocities to next_velocities
+    """
+
+    rows = slice(first, last)
+
+    _state.perceive(rows)
+    _state.update(delta_time, rows, out=_state.next_velocities[rows])
+
+    return _state.detected.count()
+
+
+class ParallelSwarmState(SwarmState):
+    def __init__(self,
+                 boids: list,
+                 flight_zone: any,
+                 workers: int | None = None,
+                 skin: float = 0.0) -> None:
+        """
+        :param boids: List of boid-objects, they are bound to the new state
+        :param flight_zone: dimensions of the flight zone
+        :param workers: number of worker processes, defaults to the number
+                        of cores
+        :param skin: skin of the VerletLists every worker keeps per shard
+        """
+
+        size = len(boids)
+
+        columns = [(column, (size,) + shape, np.float64)
+                   for column, shape in self.COLUMNS.values()]
+        columns += [('types', (size,), np.int64),
+                    ('flock_with_own_type', (size,), bool),
+                    ('next_velocities', (size, 3), np.float64)]
+
+        # column -> (shape, dtype, offset into the shared memory)
+        self.layout = {}
+        offset = 0
+
+        for column, shape, dtype in columns:
+            dtype = np.dtype(dtype)
+            self.layout[column] = (shape, dtype, offset)
+
+            # Keep every column 8-byte aligned
+            size_in_bytes = int(np.prod(shape)) * dtype.itemsize
+            offset += (size_in_bytes + 7) // 8 * 8
+
+        self.memory = shared_memory.SharedMemory(create=True,
+                                                 size=max(offset, 1))
+
+        super().__init__(boids, flight_zone, skin)
+
+        self.next_velocities = self._allocate('next_velocities',
+                                              (size, 3), np.float64)
+
+        self.workers = workers or os.cpu_count()
+
+        bounds = np.linspace(0, size, self.workers + 1).astype(int)
+        self.shards = [(first, last)
+                       for first, last in zip(bounds[:-1], bounds[1:])
+                       if last > first]
+
+        # Spawning is the fallback where there is no fork server
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('forkserver')
+        else:
+            context = multiprocessing.get_context('spawn')
+
+        self.pool = ProcessPoolExecutor(max_workers=self.workers,
+                                        mp_context=context,
+                                        initializer=_attach,
+                                        initargs=(self.memory.name,
+                                                  self.layout,
+                                                  flight_zone,
+                                                  skin))
+
+        # The pool starts a worker per task until it has all of them, so
+        # one task each starts them all now instead of during the first ticks
+        for future in [self.pool.submit(_ready)
+                       for _ in range(self.workers)]:
+            future.result()
+
+    def _allocate(self, column: str, shape: tuple, dtype: any) -> any:
+        shape, dtype, offset = self.layout[column]
+
+        return np.ndarray(shape, dtype, self.memory.buf, offset)
+
+    def update(self,
+               delta_time: float,
+               rows: slice = EVERYONE,
+               out: any = None) -> None:
+        """
+        Updates every shard of the swarm (or only the boids in `rows`) in a
+        worker process; the workers perceive for their shards themselves.
+
+        Each worker reads the positions and velocities of the whole swarm
+        as they were at the start of the update, so the result is the same
+        as SwarmState.update. The new velocities are written to `out`, by
+        default the velocities of the state itself.
+        """
+
+        first, last, _ = rows.indices(len(self))
+
+        shards = [(max(start, first), min(stop, last))
+                  for start, stop in self.shards
+                  if min(stop, last) > max(start, first)]
+
+        futures = [self.pool.submit(_update_shard, start, stop, delta_time)
+                   for start, stop in shards]
+
+        counts = [future.result() for future in futures]
+
+        if out is None:
+            out = self.velocities[rows]
+
+        out[:] = self.next_velocities[rows]
+
+        if counts:
+            self.instrumentation.neighbours(np.concatenate(counts))
+
+    def step(self, delta_time: float) -> None:
+        with self.instrumentation.phase('update'):
+            self.update(delta_time)
+
+    def release(self) -> None:
+        """
+        Stops the workers and frees the shared memory.
+
+        The columns are copied into ordinary arrays first, so the boids keep
+        their values.
+        """
+
+        if self.memory is None:
+            return
+
+        self.pool.shutdown()
+
+        for column in self.layout:
+            setattr(self, column, getattr(self, column).copy())
+
+        try:
+            self.memory.close()
+        except BufferError:
+            # Somebody still holds a view, the block is unmapped once it is gone
+            pass
+
+        self.memory.unlink()
+        self.memory = None
@@ -0,0 +1,216 @@
+import logging
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+"""
+Pipelined access to a controller.
+
+Positions are read and velocities are sent on their own threads, so that the
+radio I/O of the neighbouring ticks overlaps with the computation of the
+current one.
+"""
+
+
+class PipelinedController:
+    def __init__(self,
+                 controller: any,
+                 max_staleness: float,
+                 timeout: float = 1.0,
+                 poll_interval: float = 0.002) -> None:
+        """
+        :param controller: controller interface object to wrap; it is used
+                           from two threads at once
+        :param max_staleness: oldest position sample, in seconds, that
+                              positions may hand out
+        :param timeout: how long positions waits for a fresh enough sample
+                        before giving up
+        :param poll_interval: pause between two reads of the positions
+        """
+
+        self.controller = controller
+        self.max_staleness = max_staleness
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+        self._condition = threading.Condition()
+
+        self._positions = None
+        self._positions_time = None
+
+        self._velocities = None
+        self._yaw_rate = 0.0
+
+        self.dropped_commands = 0
+        self.sent_commands = 0
+
+        # First error raised by the controller on one of the threads,
+        # raised again on the main thread
+        self._error = None
+
+        self._running = False
+        self._threads = []
+
+    @property
+    def PHYSICAL(self) -> bool:
+        return self.controller.PHYSICAL
+
+    def __enter__(self) -> 'PipelinedController':
+        self.start()
+
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._sense, name='sense', daemon=True),
+            threading.Thread(target=self._actuate, name='actuate', daemon=True),
+        ]
+
+        for thread in self._threads:
+            thread.start()
+
+    def _check(self) -> None:
+        """
+        Raises the error that stopped the threads, if any; call with the
+        condition held
+        """
+
+        if self._error is not None:
+            raise self._error
+
+    def _fail(self, error: Exception) -> None:
+        """
+        Stores the error of a thread and stops both of them
+        """
+
+        logger.error(f"Pipelined controller failed: {error!r}")
+
+        with self._condition:
+            if self._error is None:
+                self._error = error
+
+            self._running = False
+            self._condition.notify_all()
+
+    def stop(self) -> None:
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+        for thread in self._threads:
+            thread.join()
+
+        # Make sure the last command reaches the drones, unless the
+        # controller already failed
+        if self._velocities is not None and self._error is None:
+            self.controller.set_swarm_velocities(self._velocities,
+                                                 self._yaw_rate)
+            self._velocities = None
+
+    @property
+    def pose_age(self) -> float | None:
+        """
+        Age of the latest position sample, in seconds
+        """
+
+        if self._positions_time is None:
+            return None
+
+        return time.monotonic() - self._positions_time
+
+    @property
+    def positions(self) -> dict:
+        """
+        Latest positions read from the controller, waits for a new sample if
+        the latest one is older than max_staleness
+        """
+
+        def fresh() -> bool:
+            return self._error is not None or \
+                self._positions_time is not None and \
+                time.monotonic() - self._positions_time <= self.max_staleness
+
+        with self._condition:
+            ready = self._condition.wait_for(fresh, self.timeout)
+            self._check()
+
+            if not ready:
+                raise TimeoutError(
+                    f"No positions newer than {self.max_staleness}s "
+                    f"within {self.timeout}s")
+
+            return self._positions
+
+    def set_swarm_velocities(self, velocities: dict, yaw_rate: float) -> None:
+        """
+        Hands the velocities to the actuation thread; a command that has not
+        been sent yet is merged with the new one, the new velocity of a drone
+        replaces the unsent one
+        """
+
+        # The values may be views onto the swarm state, which keeps changing
+        velocities = {uid: np.array(velocity)
+                      for uid, velocity in velocities.items()}
+
+        with self._condition:
+            self._check()
+
+            if self._velocities is not None:
+                self.dropped_commands += 1
+
+                # Commands may only cover some of the drones
+                velocities = {**self._velocities, **velocities}
+
+            self._velocities = velocities
+            self._yaw_rate = yaw_rate
+            self._condition.notify_all()
+
+    def swarm_move(self,
+                   positions: dict,
+                   yaw: float,
+                   time_to_move: float | None = None,
+                   relative: bool = False) -> None:
+        self.controller.swarm_move(positions, yaw, time_to_move, relative)
+
+    def _sense(self) -> None:
+        while self._running:
+            try:
+                positions = {uid: np.array(position) for uid, position
+                             in self.controller.positions.items()}
+            except Exception as error:
+                self._fail(error)
+                return
+
+            with self._condition:
+                self._positions = positions
+                self._positions_time = time.monotonic()
+                self._condition.notify_all()
+
+            time.sleep(self.poll_interval)
+
+    def _actuate(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._velocities is not None or not self._running)
+
+                if not self._running:
+                    return
+
+                velocities, yaw_rate = self._velocities, self._yaw_rate
+                self._velocities = None
+
+            try:
+                self.controller.set_swarm_velocities(velocities, yaw_rate)
+            except Exception as error:
+                self._fail(error)
+                return
+
+            self.sent_commands += 1
@@ -0,0 +1,295 @@
+import logging
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+"""
+Latency-compensating cache of the drone poses.
+
+Position samples are recorded as they arrive, each with the time it was
+taken, into a small ring buffer per uri. Reading the positions never waits on
+the radio: every drone is extrapolated from its newest sample to the same
+moment, with a velocity fitted over the samples in its buffer, so the rules
+see the whole swarm at one point in time however stale the individual
+samples are.
+
+A controller that can call back on every position it receives is handed
+record through its add_position_callback, and takes it back through
+remove_position_callback; any other one is polled on a thread of its own.
+"""
+
+
+class PoseCache:
+    def __init__(self,
+                 controller: any,
+                 uris: list,
+                 lead: float = 0.0,
+                 depth: int = 4,
+                 max_extrapolation: float = 0.1,
+                 poll_interval: float = 0.002,
+                 clock: any = time.monotonic) -> None:
+        """
+        :param controller: controller interface object to wrap
+        :param uris: uris of the drones to cache
+        :param lead: the positions are extrapolated this many seconds past
+                     the moment they are read, e.g. to when the commands
+                     computed from them reach the drones; with 0 the
+                     newest samples are handed out as they are
+        :param depth: samples kept per uri, the velocity is fitted over them
+        :param max_extrapolation: a sample is never extrapolated further
+                                  than this many seconds, so a drone that
+                                  stopped reporting does not drift away
+        :param poll_interval: pause between two reads of a controller that
+                              does not call back
+        :param clock: time source of the samples and predictions, in
+                      seconds; e.g. the simulated time of a simulation that
+                      does not run in real time
+        """
+
+        self.controller = controller
+        self.uris = list(uris)
+        self.indices = {uri: i for i, uri in enumerate(self.uris)}
+
+        self.lead = lead
+        self.depth = depth
+        self.max_extrapolation = max_extrapolation
+        self.poll_interval = poll_interval
+        self.clock = clock
+
+        size = len(self.uris)
+
+        # Ring buffer per uri: the newest sample is at head, count are valid
+        self._times = np.zeros((size, depth))
+        self._samples = np.zeros((size, depth, 3))
+        self._head = np.full(size, -1, dtype=np.intp)
+        self._count = np.zeros(size, dtype=np.intp)
+
+        self._lock = threading.Lock()
+        self._fed = threading.Event()
+
+        self._predicted = np.zeros((size, 3))
+        self._velocities = np.zeros((size, 3))
+
+        # Handed out by positions and velocities, the rows stay views
+        self._position_rows = {uri: self._predicted[i]
+                               for i, uri in enumerate(self.uris)}
+        self._velocity_rows = {uri: self._velocities[i]
+                               for i, uri in enumerate(self.uris)}
+
+        self.samples = 0
+        self.predictions = 0
+        self.max_age = 0.0
+
+        self._running = False
+        self._thread = None
+        self._registered = False
+
+    @property
+    def PHYSICAL(self) -> bool:
+        return self.controller.PHYSICAL
+
+    def __enter__(self) -> 'PoseCache':
+        self.start()
+
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def start(self, timeout: float = 1.0) -> None:
+        """
+        Starts feeding the cache and waits, once, until every drone has
+        reported a position
+        """
+
+        self._running = True
+
+        if hasattr(self.controller, 'add_position_callback'):
+            self.controller.add_position_callback(self.record)
+            self._registered = True
+        else:
+            self._thread = threading.Thread(target=self._poll,
+                                            name='pose-cache', daemon=True)
+            self._thread.start()
+
+        if not self._fed.wait(timeout):
+            self.stop()
+
+            raise TimeoutError(f"Not every drone reported a position "
+                               f"within {timeout}s")
+
+    def stop(self) -> None:
+        """
+        Stops feeding the cache; safe to call more than once
+        """
+
+        self._running = False
+
+        if self._registered:
+            self.controller.remove_position_callback(self.record)
+            self._registered = False
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    @property
+    def statistics(self) -> dict:
+        return {'samples': self.samples,
+                'predictions': self.predictions,
+                'max_age': self.max_age}
+
+    def record(self,
+               uri: str,
+               position: any,
+               timestamp: float | None = None) -> None:
+        """
+        Stores a position sample of a drone, taken at `timestamp` on the
+        clock (now by default); safe to call from any thread
+        """
+
+        i = self.indices.get(uri)
+
+        if i is None:
+            return
+
+        if timestamp is None:
+            timestamp = self.clock()
+
+        with self._lock:
+            head = (self._head[i] + 1) % self.depth
+
+            self._times[i, head] = timestamp
+            self._samples[i, head] = position
+            self._head[i] = head
+            self._count[i] = min(self._count[i] + 1, self.depth)
+
+            self.samples += 1
+
+            if not self._fed.is_set() and self._count.all():
+                self._fed.set()
+
+    def record_all(self,
+                   positions: dict,
+                   timestamp: float | None = None) -> None:
+        """
+        Stores one sample of every drone in `positions`, all taken at the
+        same time
+        """
+
+        if timestamp is None:
+            timestamp = self.clock()
+
+        for uri, position in positions.items():
+            self.record(uri, position, timestamp)
+
+    def predict(self, at: float | None = None) -> None:
+        """
+        Extrapolates every drone to the time `at` on the clock (now + lead
+        by default, or not at all if lead is 0) into the arrays behind
+        positions and velocities
+        """
+
+        # Nothing to compensate for without a lead, the samples are used as
+        # they are
+        extrapolate = at is not None or self.lead != 0
+
+        if at is None:
+            at = self.clock() + self.lead
+
+        with self._lock:
+            times = self._times.copy()
+            samples = self._samples.copy()
+            head = self._head.copy()
+            count = self._count.copy()
+
+        rows = np.arange(len(self.uris))
+
+        # A slot of the ring buffer holds a valid sample if it is among the
+        # count newest ones, counting back from head
+        newer = (head[:, np.newaxis] - np.arange(self.depth)) % self.depth
+        valid = newer < count[:, np.newaxis]
+
+        # Least-squares velocity over the valid samples of every drone
+        weights = valid.astype(float)
+        counted = np.maximum(weights.sum(axis=1), 1)
+
+        mean_time = (times * weights).sum(axis=1) / counted
+        mean_sample = (samples * weights[..., np.newaxis]).sum(axis=1) / \
+            counted[:, np.newaxis]
+
+        dt = (times - mean_time[:, np.newaxis]) * weights
+        spread = (dt ** 2).sum(axis=1)
+
+        covariance = (dt[..., np.newaxis] *
+                      (samples - mean_sample[:, np.newaxis])).sum(axis=1)
+
+        fitted = spread > 0
+        self._velocities[:] = 0
+        self._velocities[fitted] = covariance[fitted] / \
+            spread[fitted, np.newaxis]
+
+        newest_time = times[rows, head]
+
+        if not extrapolate:
+            self._predicted[:] = samples[rows, head]
+        else:
+            ages = np.clip(at - newest_time, 0, self.max_extrapolation)
+
+            self._predicted[:] = samples[rows, head] + \
+                self._velocities * ages[:, np.newaxis]
+
+        if len(self.uris):
+            self.max_age = max(self.max_age, float((at - newest_time).max()))
+
+        self.predictions += 1
+
+    @property
+    def positions(self) -> dict:
+        """
+        Position of every drone, extrapolated to now + lead (the newest
+        samples if lead is 0); never waits for the radio. Unless the cache
+        was started it reads the controller first, in which case it is only
+        as fresh as that read.
+        """
+
+        if not self._running:
+            self.record_all(self.controller.positions)
+
+        self.predict()
+
+        return self._position_rows
+
+    @property
+    def velocities(self) -> dict:
+        """
+        Velocity of every drone estimated by the last read of positions
+        """
+
+        return self._velocity_rows
+
+    def set_swarm_velocities(self, velocities: dict, yaw_rate: float) -> None:
+        self.controller.set_swarm_velocities(velocities, yaw_rate)
+
+    def swarm_move(self,
+                   positions: dict,
+                   yaw: float,
+                   time_to_move: float | None = None,
+                   relative: bool = False) -> None:
+        self.controller.swarm_move(positions, yaw, time_to_move, relative)
+
+        # No velocity is fitted across the move
+        with self._lock:
+            for uri in positions:
+                if uri in self.indices:
+                    i = self.indices[uri]
+                    self._count[i] = min(self._count[i], 1)
+
+    def _poll(self) -> None:
+        while self._running:
+            self.record_all(self.controller.positions)
+
+            time.sleep(self.poll_interval)
@@ -1,6 +1,27 @@
+import functools
+
 import numpy as np
 
 
+def instrumented(rule: any) -> any:
+    """
+    Reports every call of the rule to the instrumentation of the boid it is
+    called for, if the boid has one
+    """
+
+    name = rule.__name__
+
+    @functools.wraps(rule)
+    def wrapper(boid: any, *args, **kwargs) -> any:
+        if boid.instrumentation is not None:
+            boid.instrumentation.rule_called(name)
+
+        return rule(boid, *args, **kwargs)
+
+    return wrapper
+
+
+@instrumented
 def fly_towards_center(boid: any, other_boids: list, delta_time: float) -> None:
     """
     Rule 1 in the standard boids model
@@ -17,11 +38,14 @@ def fly_towards_center(boid: any, other_boids: list, delta_time: float) -> None:
             center += b.position
 
         center /= len(other_boids)
+        center -= boid.position
+        center *= cohesion
 
-        boid.velocity += (center - boid.position) * cohesion
+        boid.velocity += center
         boid.yaw_rate = boid.yaw_rate
 
 
+@instrumented
 def avoid_others(boid: any, delta_time: float) -> None:
     """
     Rule 2 in the standard boids model
@@ -35,19 +59,16 @@ def avoid_others(boid: any, delta_time: float) -> None:
         separation = boid.separation * delta_time
         move = np.zeros(3)
 
-        close_boids = filter(
-            lambda b: boid.distance_to_point(
-                b.position) < boid.minimum_distance,
-            boid.detected_boids
-        )
-
-        for b in close_boids:
+        # Found together with the detected boids in Boid.update_detected_boids
+        for b in boid.close_boids:
             move += boid.position - b.position
 
-        boid.velocity += move * separation
+        move *= separation
+        boid.velocity += move
         boid.yaw_rate = boid.yaw_rate
 
 
+@instrumented
 def match_velocity(boid: any, other_boids: list, delta_time: float) -> None:
     """
     Rule 3 in the standard boids model
@@ -63,23 +84,31 @@ def match_velocity(boid: any, other_boids: list, delta_time: float) -> None:
             average_velocity += b.velocity
 
         average_velocity /= len(other_boids)
-        boid.velocity += (average_velocity - boid.velocity) * alignment
+        average_velocity -= boid.velocity
+        average_velocity *= alignment
+
+        boid.velocity += average_velocity
 
 
+@instrumented
 def limit_velocity(boid: any) -> None:
     """
     Clamps the speed of the boid to be within its min and max speed.
     """
 
-    speed = np.linalg.norm(boid.velocity)
+    velocity = boid.velocity
+    speed = np.linalg.norm(velocity)
 
-    heading = boid.velocity / speed
+    if speed == 0:
+        # Without a heading there is nothing to scale, the boid stays put
+        return
 
-    speed = np.clip(speed, boid.min_speed, boid.max_speed)
-
-    boid.velocity = heading * speed
+    # Turned into the heading and scaled in place, not replaced by a new array
+    velocity /= speed
+    velocity *= np.clip(speed, boid.min_speed, boid.max_speed)
 
 
+@instrumented
 def keep_within_bounds(boid: any, delta_time: float) -> None:
     min_x = -boid.flight_zone.x/2
     max_x = boid.flight_zone.x/2
@@ -110,9 +139,244 @@ def keep_within_bounds(boid: any, delta_time: float) -> None:
         boid.velocity[2] += turning_factor
 
 
+@instrumented
 def move_towards_point(boid: any, point: any) -> None:
     raise NotImplementedError
 
 
-def avoid_hovering_above(boid: any) -> None:
-    raise NotImplementedError
+@instrumented
+def avoid_hovering_above(boid: any, delta_time: float) -> None:
+    """
+    Keeps the boid out of the downwash of the boids above it (and its own
+    downwash off the boids below it), which makes for unstable flight.
+
+    Steers horizontally away from the boids inside its downwash cylinder
+    """
+
+    if boid.hovering_boids:
+        separation = boid.separation * delta_time
+        move = np.zeros(3)
+
+        # Found together with the detected boids in Boid.update_detected_boids
+        for b in boid.hovering_boids:
+            move[:2] += boid.position[:2] - b.position[:2]
+
+        move *= separation
+        boid.velocity += move
+
+
+# Batched versions of the rules above, applied to many boids at once.
+#
+# `velocities` holds the velocities of the boids being updated and is changed
+# in place; the parameters are arrays with one value per updated boid. The
+# neighbours of the updated boids are given either as a Neighbours (CSR)
+# object, a MaskedNeighbours or as a boolean mask with one row per updated
+# boid and one column per boid in the swarm. Positions and velocities of the
+# neighbours are looked up in the arrays of the whole swarm, and `rows`, a
+# slice or an array of indices, selects the updated boids in those arrays.
+# delta_time is a scalar, or for the flocking rules one value per updated
+# boid.
+#
+# The intermediate results are written into the buffers of a Scratch; one is
+# allocated per call if none is given.
+
+
+class Scratch:
+    """
+    Buffers for the intermediate results of the batched rules, allocated
+    once for `size` boids
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+
+        self.velocities = np.empty((size, 3))
+        self.vectors = np.empty((size, 3))
+        self.heading = np.empty((size, 3))
+        self.outside = np.empty((size, 3), dtype=bool)
+        self.factors = np.empty(size)
+        self.speed = np.empty((size, 1))
+        self.flags = np.empty((size, 1), dtype=bool)
+
+
+def _count(neighbours: any) -> any:
+    if isinstance(neighbours, np.ndarray):
+        return np.count_nonzero(neighbours, axis=1)
+
+    return neighbours.count()
+
+
+def _sum(neighbours: any, values: any) -> any:
+    if isinstance(neighbours, np.ndarray):
+        return neighbours.astype(values.dtype) @ values
+
+    return neighbours.sum(values)
+
+
+def fly_towards_center_batch(velocities: any,
+                             positions: any,
+                             neighbours: any,
+                             cohesion: any,
+                             delta_time: float,
+                             rows: any = slice(None),
+                             scratch: Scratch | None = None) -> None:
+    """
+    Batched fly_towards_center
+    """
+
+    if scratch is None:
+        scratch = Scratch(len(velocities))
+
+    count = _count(neighbours)[:, np.newaxis]
+    flocking = np.greater(count, 0, out=scratch.flags)
+
+    center = np.divide(_sum(neighbours, positions), count,
+                       out=scratch.vectors, where=flocking)
+    np.subtract(center, positions[rows], out=center, where=flocking)
+    np.multiply(center,
+                np.multiply(cohesion, delta_time,
+                            out=scratch.factors)[:, np.newaxis],
+                out=center, where=flocking)
+
+    np.add(velocities, center, out=velocities, where=flocking)
+
+
+def avoid_others_batch(velocities: any,
+                       positions: any,
+                       close_neighbours: any,
+                       separation: any,
+                       delta_time: float,
+                       rows: any = slice(None),
+                       scratch: Scratch | None = None) -> None:
+    """
+    Batched avoid_others, `close_neighbours` are the detected boids within
+    minimum distance
+    """
+
+    if scratch is None:
+        scratch = Scratch(len(velocities))
+
+    move = np.multiply(_count(close_neighbours)[:, np.newaxis],
+                       positions[rows], out=scratch.vectors)
+    np.subtract(move, _sum(close_neighbours, positions), out=move)
+    np.multiply(move,
+                np.multiply(separation, delta_time,
+                            out=scratch.factors)[:, np.newaxis],
+                out=move)
+
+    np.add(velocities, move, out=velocities)
+
+
+def avoid_hovering_above_batch(velocities: any,
+                               positions: any,
+                               hovering_neighbours: any,
+                               separation: any,
+                               delta_time: float,
+                               rows: any = slice(None),
+                               scratch: Scratch | None = None) -> None:
+    """
+    Batched avoid_hovering_above, `hovering_neighbours` are the boids inside
+    the downwash cylinder of every updated boid
+    """
+
+    if scratch is None:
+        scratch = Scratch(len(velocities))
+
+    move = np.multiply(_count(hovering_neighbours)[:, np.newaxis],
+                       positions[rows], out=scratch.vectors)
+    np.subtract(move, _sum(hovering_neighbours, positions), out=move)
+    move[:, 2] = 0
+    np.multiply(move,
+                np.multiply(separation, delta_time,
+                            out=scratch.factors)[:, np.newaxis],
+                out=move)
+
+    np.add(velocities, move, out=velocities)
+
+
+def match_velocity_batch(velocities: any,
+                         swarm_velocities: any,
+                         neighbours: any,
+                         alignment: any,
+                         delta_time: float,
+                         scratch: Scratch | None = None) -> None:
+    """
+    Batched match_velocity, the neighbours' velocities are looked up in
+    `swarm_velocities`
+    """
+
+    if scratch is None:
+        scratch = Scratch(len(velocities))
+
+    count = _count(neighbours)[:, np.newaxis]
+    flocking = np.greater(count, 0, out=scratch.flags)
+
+    average_velocity = np.divide(_sum(neighbours, swarm_velocities), count,
+                                 out=scratch.vectors, where=flocking)
+    np.subtract(average_velocity, velocities,
+                out=average_velocity, where=flocking)
+    np.multiply(average_velocity,
+                np.multiply(alignment, delta_time,
+                            out=scratch.factors)[:, np.newaxis],
+                out=average_velocity, where=flocking)
+
+    np.add(velocities, average_velocity, out=velocities, where=flocking)
+
+
+def limit_velocity_batch(velocities: any,
+                         min_speed: any,
+                         max_speed: any,
+                         scratch: Scratch | None = None) -> None:
+    """
+    Batched limit_velocity, boids that are not moving are left as they are
+    """
+
+    if scratch is None:
+        scratch = Scratch(len(velocities))
+
+    # The same operations as np.linalg.norm, without its temporaries
+    squares = np.multiply(velocities, velocities, out=scratch.vectors)
+    speed = np.add.reduce(squares, axis=1, keepdims=True, out=scratch.speed)
+    np.sqrt(speed, out=speed)
+
+    heading = scratch.heading
+    heading.fill(0.0)
+    np.divide(velocities, speed, out=heading,
+              where=np.greater(speed, 0, out=scratch.flags))
+
+    np.clip(speed,
+            min_speed[:, np.newaxis],
+            max_speed[:, np.newaxis],
+            out=speed)
+
+    np.multiply(heading, speed, out=velocities)
+
+
+def keep_within_bounds_batch(velocities: any,
+                             positions: any,
+                             flight_zone: any,
+                             delta_time: float,
+                             scratch: Scratch | None = None) -> None:
+    """
+    Batched keep_within_bounds, `positions` are the positions of the updated
+    boids
+    """
+
+    if scratch is None:
+        scratch = Scratch(len(velocities))
+
+    buffer = 0.2
+
+    lower = np.array([-flight_zone.x/2 + buffer,
+                      -flight_zone.y/2 + buffer,
+                      flight_zone.floor_offset * 2 + buffer])
+    upper = np.array([flight_zone.x/2 - buffer,
+                      flight_zone.y/2 - buffer,
+                      flight_zone.z + flight_zone.floor_offset - buffer])
+
+    turning_factor = 0.1 * delta_time
+
+    np.subtract(velocities, turning_factor, out=velocities,
+                where=np.greater(positions, upper, out=scratch.outside))
+    np.add(velocities, turning_factor, out=velocities,
+           where=np.less(positions, lower, out=scratch.outside))
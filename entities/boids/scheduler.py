@@ -0,0 +1,159 @@
+import math
+import time
+from enum import Enum, auto, unique
+
+"""
+Fixed-rate scheduling for the control loop.
+
+Ticks are planned against absolute deadlines on a monotonic clock, so slow
+ticks and clock adjustments do not make the loop drift.
+"""
+
+
+@unique
+class OverrunPolicy(Enum):
+    # Drop the deadlines that were missed and continue on the next one, with
+    # delta_time clamped to max_delta_time
+    SKIP: int = auto()
+    # Run the missed ticks back to back, each with the nominal delta_time
+    CATCH_UP: int = auto()
+    # Restart the schedule from now and clamp delta_time to max_delta_time
+    CLAMP: int = auto()
+
+
+class FixedRateScheduler:
+    def __init__(self,
+                 period: float,
+                 overrun: OverrunPolicy = OverrunPolicy.SKIP,
+                 max_delta_time: float | None = None,
+                 clock: any = time.monotonic,
+                 sleep: any = time.sleep) -> None:
+        """
+        :param period: time between the start of two ticks, in seconds
+        :param overrun: what to do when a tick starts after its deadline
+        :param max_delta_time: largest delta_time handed out with
+                               OverrunPolicy.SKIP and CLAMP, so a stall
+                               does not scale up the gains of the rules;
+                               defaults to two periods
+        :param clock: monotonic clock returning seconds
+        :param sleep: function used to wait for the next deadline
+        """
+
+        self.period = period
+        self.overrun = overrun
+        self.max_delta_time = max_delta_time or 2 * period
+
+        self._clock = clock
+        self._sleep = sleep
+
+        self.start()
+
+    def start(self) -> None:
+        """
+        (Re)starts the schedule, the first deadline is now
+        """
+
+        now = self._clock()
+
+        self._started = now
+        self._deadline = now
+        self._last_tick = None
+
+        self.ticks = 0
+        # Deadlines that were dropped without running a tick for them
+        self.missed_deadlines = 0
+        # Ticks that started a period or more after their deadline
+        self.overruns = 0
+
+        # Running statistics of how late the ticks started compared to their
+        # deadline, in seconds
+        self._jitter_mean = 0.0
+        self._jitter_m2 = 0.0
+        self.max_jitter = 0.0
+
+    def wait(self) -> float:
+        """
+        Waits for the next deadline and returns the delta_time to use for the
+        tick that starts now
+        """
+
+        now = self._clock()
+
+        if now < self._deadline:
+            self._sleep(self._deadline - now)
+            now = self._clock()
+
+        lateness = max(now - self._deadline, 0.0)
+
+        if self._last_tick is None:
+            delta_time = self.period
+        else:
+            delta_time = now - self._last_tick
+
+        if lateness >= self.period:
+            missed = math.floor(lateness / self.period)
+
+            self.overruns += 1
+
+            match self.overrun:
+                case OverrunPolicy.SKIP:
+                    self._deadline += missed * self.period
+                    self.missed_deadlines += missed
+                    delta_time = min(delta_time, self.max_delta_time)
+                case OverrunPolicy.CATCH_UP:
+                    delta_time = self.period
+                case OverrunPolicy.CLAMP:
+                    self._deadline = now
+                    self.missed_deadlines += missed
+                    delta_time = min(delta_time, self.max_delta_time)
+        elif self.overrun is OverrunPolicy.CATCH_UP and \
+                self._last_tick is not None:
+            delta_time = self.period
+
+        self._record_jitter(lateness)
+
+        self._deadline += self.period
+        self._last_tick = now
+        self.ticks += 1
+
+        return delta_time
+
+    def _record_jitter(self, jitter: float) -> None:
+        delta = jitter - self._jitter_mean
+        self._jitter_mean += delta / (self.ticks + 1)
+        self._jitter_m2 += delta * (jitter - self._jitter_mean)
+
+        self.max_jitter = max(self.max_jitter, jitter)
+
+    @property
+    def mean_jitter(self) -> float:
+        return self._jitter_mean
+
+    @property
+    def jitter_std(self) -> float:
+        if self.ticks < 2:
+            return 0.0
+
+        return math.sqrt(self._jitter_m2 / (self.ticks - 1))
+
+    @property
+    def achieved_rate(self) -> float:
+        """
+        Ticks per second since the schedule was started
+        """
+
+        elapsed = self._clock() - self._started
+
+        return self.ticks / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def statistics(self) -> dict:
+        return {
+            'ticks': self.ticks,
+            'missed_deadlines': self.missed_deadlines,
+            'overruns': self.overruns,
+            'mean_jitter': self.mean_jitter,
+            'jitter_std': self.jitter_std,
+            'max_jitter': self.max_jitter,
+            'achieved_rate': self.achieved_rate,
+        }
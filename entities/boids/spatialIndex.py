@@ -0,0 +1,584 @@
+import numpy as np
+
+"""
+Per-tick spatial index used to find the neighbours of every boid at once.
+"""
+
+
+def kd_tree(points: any) -> any:
+    """
+    Builds a scipy cKDTree over the points.
+
+    scipy is slow to import, so it is only imported once the first tree is
+    needed rather than with this module.
+    """
+
+    from scipy.spatial import cKDTree
+
+    return cKDTree(points)
+
+
+class Neighbours:
+    """
+    Neighbour lists for a whole swarm in compressed sparse row form.
+
+    The neighbours of boid i are indices[indptr[i]:indptr[i + 1]], sorted by
+    index, with the matching distances in the same slots of `distances`.
+    The pairs passed in must already be sorted by row and then index, see
+    from_pairs.
+    """
+
+    def __init__(self,
+                 size: int,
+                 rows: any,
+                 indices: any,
+                 distances: any) -> None:
+        self.size = size
+        self.rows = rows
+        self.indices = indices
+        self.distances = distances
+
+        self.indptr = np.zeros(size + 1, dtype=np.intp)
+        np.cumsum(np.bincount(self.rows, minlength=size), out=self.indptr[1:])
+
+    @classmethod
+    def from_pairs(cls,
+                   size: int,
+                   rows: any,
+                   indices: any,
+                   distances: any) -> 'Neighbours':
+        """
+        Builds the neighbour lists from unsorted (row, index, distance) pairs
+        """
+
+        order = np.lexsort((indices, rows))
+
+        return cls(size, rows[order], indices[order], distances[order])
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def of(self, i: int) -> any:
+        """
+        Returns the indices of the neighbours of boid i
+        """
+
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def subset(self, mask: any) -> 'Neighbours':
+        """
+        Returns the neighbour pairs selected by a boolean mask over the pairs
+        """
+
+        return Neighbours(self.size,
+                          self.rows[mask],
+                          self.indices[mask],
+                          self.distances[mask])
+
+    def take(self, own: any) -> 'Neighbours':
+        """
+        Returns the neighbour lists of the boids at the sorted rows in `own`,
+        the rows of the result count through `own`
+        """
+
+        taken = np.zeros(self.size, dtype=bool)
+        taken[own] = True
+
+        mask = taken[self.rows]
+        position = np.cumsum(taken) - 1
+
+        return Neighbours(len(own),
+                          position[self.rows[mask]],
+                          self.indices[mask],
+                          self.distances[mask])
+
+    def partition(self, labels: any) -> dict:
+        """
+        Splits the neighbour lists by a label per pair (e.g. the type of the
+        neighbour), returns a Neighbours for every label that occurs
+        """
+
+        return {label: self.subset(labels == label)
+                for label in np.unique(labels).tolist()}
+
+    def count(self) -> any:
+        """
+        Returns the number of neighbours of every boid
+        """
+
+        return np.diff(self.indptr)
+
+    def sum(self, values: any) -> any:
+        """
+        Sums `values` (one row per boid) over the neighbours of every boid
+        """
+
+        gathered = values[self.indices]
+        summed = np.empty((self.size,) + values.shape[1:])
+
+        for k in range(values.shape[1]):
+            summed[:, k] = np.bincount(self.rows,
+                                       weights=gathered[:, k],
+                                       minlength=self.size)
+
+        return summed
+
+
+class MaskedNeighbours:
+    """
+    The pairs of a fixed Neighbours selected by a boolean mask over them.
+
+    Unlike Neighbours.subset nothing is copied: the mask is refilled in
+    place every tick, and count and sum reduce over all pairs with
+    np.add.reduceat into buffers that are allocated once. The arrays they
+    return are only valid until the next call on the same buffers.
+    """
+
+    def __init__(self, pairs: Neighbours, mask: any, buffers: dict) -> None:
+        """
+        :param pairs: the fixed neighbour lists
+        :param mask: boolean array with one value per pair
+        :param buffers: scratch arrays shared by the MaskedNeighbours over
+                        the same pairs, see buffers
+        """
+
+        self.pairs = pairs
+        self.mask = mask
+        self.size = pairs.size
+        self._buffers = buffers
+
+    @staticmethod
+    def buffers(pairs: Neighbours) -> dict:
+        """
+        Allocates the scratch arrays for MaskedNeighbours over `pairs`
+        """
+
+        size = len(pairs)
+
+        return {
+            # reduceat needs a start inside the array for every row, empty
+            # rows at the end start at the trailing zero
+            'starts': np.minimum(pairs.indptr[:-1], size),
+            'nonempty': (pairs.count() > 0).astype(np.float64),
+            'weights': np.zeros(size + 1),
+            'gathered': np.zeros((size + 1, 3)),
+            'count': np.empty(pairs.size),
+            'sum': np.empty((pairs.size, 3)),
+        }
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.mask))
+
+    def of(self, i: int) -> any:
+        """
+        Returns the indices of the neighbours of boid i
+        """
+
+        pairs = slice(self.pairs.indptr[i], self.pairs.indptr[i + 1])
+
+        return self.pairs.indices[pairs][self.mask[pairs]]
+
+    def _reduce(self, values: any, out: any) -> any:
+        """
+        Sums `values`, with the trailing zero, over the pairs of every row
+        """
+
+        buffers = self._buffers
+
+        if self.size == 0:
+            return out
+
+        np.add.reduceat(values, buffers['starts'], axis=0, out=out)
+
+        # reduceat hands out the first pair of a row without any
+        nonempty = buffers['nonempty']
+
+        if out.ndim > 1:
+            nonempty = nonempty[:, np.newaxis]
+
+        return np.multiply(out, nonempty, out=out)
+
+    def count(self) -> any:
+        """
+        Returns the number of neighbours of every boid, as floats
+        """
+
+        weights = self._buffers['weights']
+        np.copyto(weights[:-1], self.mask)
+
+        return self._reduce(weights, self._buffers['count'])
+
+    def sum(self, values: any) -> any:
+        """
+        Sums `values` (one row per boid) over the neighbours of every boid
+        """
+
+        gathered = self._buffers['gathered']
+        pairs = gathered[:-1]
+
+        np.take(values, self.pairs.indices, axis=0, out=pairs, mode='clip')
+        np.multiply(pairs, self.mask[:, np.newaxis], out=pairs)
+
+        return self._reduce(gathered, self._buffers['sum'])
+
+
+def find_neighbours(positions: any,
+                    visual_range: any,
+                    minimum_distance: any,
+                    rows: slice = slice(None),
+                    tree: any = None) -> tuple:
+    """
+    Builds a k-d tree over the positions and returns the boids within
+    visual range and within minimum distance of every boid, as a pair of
+    Neighbours.
+
+    Both queries are answered from one search with the largest visual range.
+    If `rows` is given only the neighbours of those boids are looked up, and
+    the rows of the returned Neighbours count from the start of the slice.
+    `tree` is a k-d tree over the positions if one was built already.
+    """
+
+    first, last, _ = rows.indices(len(positions))
+    size = last - first
+
+    if size <= 0 or visual_range.max() <= 0:
+        empty = np.empty(0, dtype=np.intp)
+        nobody = Neighbours(max(size, 0), empty, empty, np.empty(0))
+        return nobody, nobody
+
+    if tree is None:
+        tree = kd_tree(positions)
+
+    if size == len(positions):
+        pairs = tree.query_pairs(visual_range.max(), output_type='ndarray')
+
+        # query_pairs only gives every pair once
+        own_rows = np.concatenate((pairs[:, 0], pairs[:, 1]))
+        indices = np.concatenate((pairs[:, 1], pairs[:, 0]))
+    else:
+        pairs = kd_tree(positions[rows]).sparse_distance_matrix(
+            tree, visual_range.max(), output_type='ndarray')
+
+        own_rows = pairs['i'].astype(np.intp) + first
+        indices = pairs['j'].astype(np.intp)
+
+        others = own_rows != indices
+        own_rows = own_rows[others]
+        indices = indices[others]
+
+    distances = np.linalg.norm(positions[own_rows] - positions[indices], axis=1)
+
+    in_range = distances < visual_range[own_rows]
+    detected = Neighbours.from_pairs(size,
+                                     own_rows[in_range] - first,
+                                     indices[in_range],
+                                     distances[in_range])
+    close = detected.subset(
+        detected.distances < minimum_distance[detected.rows + first])
+
+    return detected, close
+
+
+def find_neighbours_of(positions: any,
+                       visual_range: any,
+                       minimum_distance: any,
+                       own: any,
+                       tree: any = None) -> tuple:
+    """
+    Same as find_neighbours, but for the boids at the rows in `own`, an
+    array of indices; the rows of the returned Neighbours count through
+    `own`. `tree` is a k-d tree over all positions if one was built already.
+    """
+
+    size = len(own)
+
+    if size == 0 or visual_range[own].max() <= 0:
+        empty = np.empty(0, dtype=np.intp)
+        nobody = Neighbours(size, empty, empty, np.empty(0))
+        return nobody, nobody
+
+    if tree is None:
+        tree = kd_tree(positions)
+
+    pairs = kd_tree(positions[own]).sparse_distance_matrix(
+        tree, visual_range[own].max(), output_type='ndarray')
+
+    rows = pairs['i'].astype(np.intp)
+    indices = pairs['j'].astype(np.intp)
+    own_rows = own[rows]
+
+    others = own_rows != indices
+    rows = rows[others]
+    own_rows = own_rows[others]
+    indices = indices[others]
+
+    distances = np.linalg.norm(positions[own_rows] - positions[indices], axis=1)
+
+    in_range = distances < visual_range[own_rows]
+    detected = Neighbours.from_pairs(size,
+                                     rows[in_range],
+                                     indices[in_range],
+                                     distances[in_range])
+    close = detected.subset(
+        detected.distances < minimum_distance[own[detected.rows]])
+
+    return detected, close
+
+
+class VerletList:
+    """
+    Neighbour lists that are reused over several ticks.
+
+    The candidates are the boids within visual range plus a skin. As long as
+    no boid has moved more than half the skin since they were found, every
+    boid within visual range is among them, so only the candidates have to
+    be checked and the spatial index is not rebuilt.
+    """
+
+    def __init__(self, skin: float) -> None:
+        self.skin = skin
+
+        self.candidates = None
+        self.reference_positions = None
+        self.visual_range = None
+
+        self.rebuilds = 0
+
+    def stale(self, positions: any, visual_range: any) -> bool:
+        """
+        True if the candidates may miss a neighbour
+        """
+
+        if self.candidates is None or \
+                len(positions) != len(self.reference_positions) or \
+                np.not_equal(visual_range, self.visual_range,
+                             out=self._range_changed).any():
+            return True
+
+        moved = np.subtract(positions, self.reference_positions,
+                            out=self._moved)
+        moved_distance = np.einsum('ij,ij->i', moved, moved,
+                                   out=self._moved_distance)
+
+        return moved_distance.max(initial=0.0) > (self.skin / 2) ** 2
+
+    def _rebuild(self,
+                 positions: any,
+                 visual_range: any,
+                 minimum_distance: any,
+                 rows: slice) -> None:
+        self.candidates, _ = find_neighbours(positions,
+                                             visual_range + self.skin,
+                                             minimum_distance,
+                                             rows)
+        self.reference_positions = positions.copy()
+        self.visual_range = visual_range.copy()
+        self.rebuilds += 1
+
+        # Buffers for stale
+        self._moved = np.empty_like(positions)
+        self._moved_distance = np.empty(len(positions))
+        self._range_changed = np.empty(len(visual_range), dtype=bool)
+
+    def find(self,
+             positions: any,
+             visual_range: any,
+             minimum_distance: any,
+             rows: slice = slice(None)) -> tuple:
+        """
+        Same as find_neighbours, the rows must be the same on every call
+        """
+
+        first = rows.indices(len(positions))[0]
+
+        if self.stale(positions, visual_range):
+            self._rebuild(positions, visual_range, minimum_distance, rows)
+
+        candidates = self.candidates
+        own_rows = candidates.rows + first
+
+        offsets = positions[own_rows] - positions[candidates.indices]
+        distances = np.sqrt(np.einsum('ij,ij->i', offsets, offsets))
+
+        in_range = distances < visual_range[own_rows]
+        detected = Neighbours(candidates.size,
+                              candidates.rows[in_range],
+                              candidates.indices[in_range],
+                              distances[in_range])
+
+        close = detected.subset(
+            detected.distances < minimum_distance[detected.rows + first])
+
+        return detected, close
+
+    def find_in_place(self,
+                      positions: any,
+                      visual_range: any,
+                      minimum_distance: any,
+                      rows: slice = slice(None)) -> tuple:
+        """
+        Same as find, but the neighbours are returned as MaskedNeighbours
+        over the candidates, so nothing is allocated until the candidates
+        are rebuilt. The masks and buffers are reused by the next call.
+        """
+
+        first = rows.indices(len(positions))[0]
+
+        if self.stale(positions, visual_range):
+            self._rebuild(positions, visual_range, minimum_distance, rows)
+            self._allocate(first)
+
+        candidates = self.candidates
+
+        offsets = self.offsets
+        np.take(positions, self.own_rows, axis=0, out=offsets, mode='clip')
+        np.subtract(offsets,
+                    np.take(positions, candidates.indices, axis=0,
+                            out=self.others, mode='clip'),
+                    out=offsets)
+
+        distances = self.distances
+        np.einsum('ij,ij->i', offsets, offsets, out=distances)
+        np.sqrt(distances, out=distances)
+
+        limit = self.limit
+        np.take(visual_range, self.own_rows, out=limit, mode='clip')
+        np.less(distances, limit, out=self.detected.mask)
+
+        np.take(minimum_distance, self.own_rows, out=limit, mode='clip')
+        np.less(distances, limit, out=self.close.mask)
+        np.logical_and(self.close.mask, self.detected.mask,
+                       out=self.close.mask)
+
+        return self.detected, self.close
+
+    def _allocate(self, first: int) -> None:
+        """
+        Allocates the buffers find_in_place works in for new candidates
+        """
+
+        candidates = self.candidates
+        size = len(candidates)
+
+        self.own_rows = candidates.rows + first
+        self.offsets = np.empty((size, 3))
+        self.others = np.empty((size, 3))
+        self.distances = np.empty(size)
+        self.limit = np.empty(size)
+
+        self.buffers = MaskedNeighbours.buffers(candidates)
+
+        self.detected = MaskedNeighbours(candidates, np.zeros(size, bool),
+                                         self.buffers)
+        self.close = MaskedNeighbours(candidates, np.zeros(size, bool),
+                                      self.buffers)
+
+
+def find_downwash(positions: any,
+                  radius: any,
+                  height: any,
+                  rows: slice = slice(None)) -> Neighbours:
+    """
+    Finds, for every boid, the other boids inside its downwash cylinder: a
+    horizontal distance below `radius` and a vertical distance below
+    `height`.
+
+    The boids are put in a 2D spatial hash over x and y with cells as wide
+    as the largest radius, so only the boids in the 3 x 3 cells around a
+    boid are checked. If `rows` is given only the cylinders of those boids
+    are searched, and the rows of the result count from the start of the
+    slice.
+    """
+
+    first, last, _ = rows.indices(len(positions))
+    size = max(last - first, 0)
+    cell = radius.max() if len(radius) else 0.0
+
+    if size == 0 or cell <= 0:
+        empty = np.empty(0, dtype=np.intp)
+        return Neighbours(size, empty, empty, np.empty(0))
+
+    cells = np.floor(positions[:, :2] / cell).astype(np.int64)
+
+    # One key per cell, with room for the cells around the outermost ones
+    low = cells.min(axis=0) - 1
+    width = cells[:, 1].max() - low[1] + 2
+    keys = (cells[:, 0] - low[0]) * width + (cells[:, 1] - low[1])
+
+    # The boids sorted by cell, and the occupied cells in the same order
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+
+    new_cell = np.empty(len(keys), dtype=bool)
+    new_cell[0] = True
+    np.not_equal(sorted_keys[1:], sorted_keys[:-1], out=new_cell[1:])
+
+    cell_starts = np.flatnonzero(new_cell)
+    cell_keys = sorted_keys[cell_starts]
+    cell_counts = np.diff(np.append(cell_starts, len(keys)))
+
+    cell_of = np.empty(len(keys), dtype=np.intp)
+    cell_of[order] = np.cumsum(new_cell) - 1
+
+    own = np.arange(first, last)
+    own_cells = cell_of[first:last]
+
+    own_rows = []
+    indices = []
+
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            # The occupied cells are looked up once per cell, not per boid
+            wanted = cell_keys + dx * width + dy
+            found = np.minimum(np.searchsorted(cell_keys, wanted),
+                               len(cell_keys) - 1)
+            occupied = cell_keys[found] == wanted
+
+            start = cell_starts[found][own_cells]
+            count = np.where(occupied, cell_counts[found], 0)[own_cells]
+
+            # Every boid in the cell, as (own row, candidate) pairs
+            repeated = np.repeat(start - np.cumsum(count) + count, count)
+            slots = np.arange(count.sum()) + repeated
+
+            own_rows.append(np.repeat(own, count))
+            indices.append(order[slots])
+
+    own_rows = np.concatenate(own_rows)
+    indices = np.concatenate(indices)
+
+    offsets = positions[indices] - positions[own_rows]
+    horizontal = np.hypot(offsets[:, 0], offsets[:, 1])
+
+    inside = (own_rows != indices) & \
+        (horizontal < radius[own_rows]) & \
+        (np.abs(offsets[:, 2]) < height[own_rows])
+
+    return Neighbours.from_pairs(size,
+                                 own_rows[inside] - first,
+                                 indices[inside],
+                                 horizontal[inside])
+
+
+def within_downwash(pairs: Neighbours,
+                    positions: any,
+                    radius: any,
+                    height: any) -> Neighbours:
+    """
+    The pairs of `pairs` that are inside the downwash cylinder of their
+    boid, as find_downwash would find them. `pairs` must have been searched
+    out to at least hypot(radius, height) of every boid.
+    """
+
+    own_rows = pairs.rows
+
+    offsets = positions[pairs.indices] - positions[own_rows]
+    horizontal = np.hypot(offsets[:, 0], offsets[:, 1])
+
+    inside = (horizontal < radius[own_rows]) & \
+        (np.abs(offsets[:, 2]) < height[own_rows])
+
+    return Neighbours(pairs.size,
+                      pairs.rows[inside],
+                      pairs.indices[inside],
+                      horizontal[inside])
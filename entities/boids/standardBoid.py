@@ -7,15 +7,18 @@ logger = logging.getLogger(__name__)
 
 
 class StandardBoid(Boid):
+    __slots__ = ()
+
     def __init__(self,
                  uid,
                  flight_zone,
                  separation,
                  alignment,
                  cohesion,
-                 visual_range):
+                 visual_range,
+                 rng=None):
 
-        super().__init__(uid, flight_zone, separation)
+        super().__init__(uid, flight_zone, separation, rng)
 
         self.alignment = alignment
         self.cohesion = cohesion
@@ -31,12 +34,12 @@ class StandardBoid(Boid):
         for the next time step
         """
 
-        logger.debug(f"Running rules for boid with id {self.uid}")
+        logger.debug("Running rules for boid with id %s", self.uid)
 
         fly_towards_center(self, self.detected_boids, delta_time)
         match_velocity(self, self.detected_boids, delta_time)
 
-        logger.debug(
-            f"New velocity for boid with id {self.uid}: {self.velocity}")
+        logger.debug("New velocity for boid with id %s: %s",
+                     self.uid, self.velocity)
 
         super().update(delta_time)
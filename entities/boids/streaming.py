@@ -0,0 +1,362 @@
+import json
+import logging
+import selectors
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+"""
+Streams the state of the swarm to external viewers over TCP.
+
+Every tick is published as one binary frame made from the state arrays. The
+frames are sent by a thread of their own with non-blocking sockets; a
+subscriber that cannot keep up only ever has the newest frame waiting for it,
+older ones are dropped, so the control loop never waits for a viewer.
+
+Every frame is a little-endian uint32 length followed by the payload. The
+payload starts with HEADER (magic, kind, tick, timestamp, number of boids,
+number of vegetation). A HELLO frame, sent once to every new subscriber, is
+followed by JSON with the uids of the boids and the vegetation. A TICK
+frame is followed by the positions and velocities (float64, N x 3), the boid
+types (uint8), and the active flags (uint8) and levels (float64) of the
+vegetation.
+"""
+
+MAGIC = b'BOID'
+
+HELLO = 0
+TICK = 1
+
+HEADER = struct.Struct('<4sBQdII')
+LENGTH = struct.Struct('<I')
+
+
+def _frame(payload: list) -> bytes:
+    size = sum(len(part) for part in payload)
+
+    return b''.join([LENGTH.pack(size)] + payload)
+
+
+def decode(payload: bytes) -> dict:
+    """
+    Decodes the payload of a frame, without its length
+    """
+
+    magic, kind, tick, timestamp, boids, vegetation = \
+        HEADER.unpack_from(payload)
+
+    if magic != MAGIC:
+        raise ValueError("Not a swarm telemetry frame")
+
+    frame = {'kind': kind, 'tick': tick, 'timestamp': timestamp}
+    body = memoryview(payload)[HEADER.size:]
+
+    if kind == HELLO:
+        frame.update(json.loads(bytes(body)))
+        return frame
+
+    sizes = [('positions', np.float64, (boids, 3)),
+             ('velocities', np.float64, (boids, 3)),
+             ('types', np.uint8, (boids,)),
+             ('active', np.uint8, (vegetation,)),
+             ('levels', np.float64, (vegetation,))]
+
+    offset = 0
+
+    for name, dtype, shape in sizes:
+        count = int(np.prod(shape))
+        frame[name] = np.frombuffer(body, dtype, count, offset).reshape(shape)
+        offset += count * np.dtype(dtype).itemsize
+
+    frame['active'] = frame['active'].astype(bool)
+
+    return frame
+
+
+def read_frames(connection: socket.socket) -> any:
+    """
+    Yields the decoded frames received on a (blocking) connection until it
+    is closed
+    """
+
+    stream = connection.makefile('rb')
+
+    while True:
+        size = stream.read(LENGTH.size)
+
+        if len(size) < LENGTH.size:
+            return
+
+        payload = stream.read(LENGTH.unpack(size)[0])
+
+        yield decode(payload)
+
+
+class _Subscriber:
+    def __init__(self, connection: socket.socket) -> None:
+        self.connection = connection
+
+        # The frame being sent, and the newest frame waiting behind it
+        self.sending = None
+        self.waiting = None
+
+        self.dropped = 0
+
+    def offer(self, frame: bytes) -> None:
+        if self.sending is None:
+            self.sending = memoryview(frame)
+            return
+
+        if self.waiting is not None:
+            self.dropped += 1
+
+        self.waiting = frame
+
+    def flush(self) -> None:
+        """
+        Sends as much as the socket takes without blocking
+        """
+
+        while self.sending is not None:
+            try:
+                sent = self.connection.send(self.sending)
+            except BlockingIOError:
+                return
+
+            self.sending = self.sending[sent:]
+
+            if len(self.sending) == 0:
+                self.sending = None if self.waiting is None \
+                    else memoryview(self.waiting)
+                self.waiting = None
+
+
+class TelemetryServer:
+    def __init__(self,
+                 swarm: any,
+                 vegetation: any = None,
+                 address: tuple = ('127.0.0.1', 0)) -> None:
+        """
+        :param swarm: SwarmState to publish
+        :param vegetation: VegetationRegistry, ResourceStore or Ecosystem
+                           whose vegetation is published as well
+        :param address: (host, port) to listen on; port 0 picks a free one
+        """
+
+        self.swarm = swarm
+
+        # An Ecosystem keeps its vegetation in its store
+        self.vegetation = getattr(vegetation, 'store', vegetation)
+
+        self.types = swarm.types.astype(np.uint8)
+
+        self._listener = socket.create_server(address)
+        self._listener.setblocking(False)
+        self.address = self._listener.getsockname()[:2]
+
+        # Wakes the server thread up when a frame is published
+        self._wakeup, self._notify = socket.socketpair()
+        self._wakeup.setblocking(False)
+        self._notify.setblocking(False)
+
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._listener, selectors.EVENT_READ, 'accept')
+        self._selector.register(self._wakeup, selectors.EVENT_READ, 'wakeup')
+
+        self._lock = threading.Lock()
+        self._frame = None
+
+        self._subscribers = {}
+        self._thread = None
+        self._running = False
+
+        self.tick = 0
+        self.published = 0
+        self.dropped = 0
+
+    def __enter__(self) -> 'TelemetryServer':
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def start(self) -> None:
+        self._running = True
+        self._thread = threading.Thread(target=self._serve,
+                                        name='telemetry-server', daemon=True)
+        self._thread.start()
+
+        logger.info(f"Streaming telemetry on {self.address}")
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+
+        self._running = False
+        self._wake()
+        self._thread.join()
+        self._thread = None
+
+        for connection in list(self._subscribers):
+            self._drop(connection)
+
+        self._selector.close()
+        self._listener.close()
+        self._wakeup.close()
+        self._notify.close()
+
+    def hello(self) -> bytes:
+        vegetation = self.vegetation.uids if self.vegetation is not None \
+            else []
+        body = json.dumps({'uids': list(self.swarm.uids),
+                           'vegetation': vegetation}).encode()
+
+        return _frame([HEADER.pack(MAGIC, HELLO, self.tick, time.time(),
+                                   len(self.swarm), len(vegetation)),
+                       body])
+
+    def publish(self) -> None:
+        """
+        Publishes the current state; returns at once, the frame is sent by
+        the server thread
+        """
+
+        self.tick += 1
+
+        if not self._subscribers:
+            return
+
+        swarm = self.swarm
+        vegetation = self.vegetation
+
+        if vegetation is None:
+            active = levels = b''
+            count = 0
+        else:
+            active = vegetation.active.view(np.uint8)
+            levels = getattr(vegetation, 'levels', np.zeros(len(vegetation)))
+            count = len(vegetation)
+
+        frame = _frame([HEADER.pack(MAGIC, TICK, self.tick, time.time(),
+                                    len(swarm), count),
+                        swarm.positions.tobytes(),
+                        swarm.velocities.tobytes(),
+                        self.types.tobytes(),
+                        bytes(active),
+                        bytes(levels)])
+
+        with self._lock:
+            self._frame = frame
+
+        self.published += 1
+        self._wake()
+
+    def _wake(self) -> None:
+        try:
+            self._notify.send(b'\0')
+        except BlockingIOError:
+            # Already woken up
+            pass
+
+    def _serve(self) -> None:
+        while self._running:
+            for key, events in self._selector.select(timeout=1.0):
+                if key.data == 'accept':
+                    self._accept()
+                elif key.data == 'wakeup':
+                    self._distribute()
+                else:
+                    self._service(key.fileobj, events)
+
+    def _accept(self) -> None:
+        try:
+            connection, address = self._listener.accept()
+        except BlockingIOError:
+            return
+
+        connection.setblocking(False)
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        subscriber = _Subscriber(connection)
+        subscriber.offer(self.hello())
+
+        self._subscribers[connection] = subscriber
+        self._selector.register(connection, selectors.EVENT_READ, subscriber)
+        self._send(subscriber)
+
+        logger.info(f"Telemetry subscriber connected from {address}")
+
+    def _distribute(self) -> None:
+        try:
+            while self._wakeup.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
+        with self._lock:
+            frame, self._frame = self._frame, None
+
+        if frame is None:
+            return
+
+        for subscriber in list(self._subscribers.values()):
+            dropped = subscriber.dropped
+            subscriber.offer(frame)
+            self.dropped += subscriber.dropped - dropped
+
+            self._send(subscriber)
+
+    def _service(self, connection: socket.socket, events: int) -> None:
+        subscriber = self._subscribers[connection]
+
+        if events & selectors.EVENT_READ:
+            try:
+                # Subscribers only listen, anything they send is ignored
+                if not connection.recv(4096):
+                    self._drop(connection)
+                    return
+            except BlockingIOError:
+                pass
+            except OSError:
+                self._drop(connection)
+                return
+
+        if events & selectors.EVENT_WRITE:
+            self._send(subscriber)
+
+    def _send(self, subscriber: _Subscriber) -> None:
+        connection = subscriber.connection
+
+        try:
+            subscriber.flush()
+        except OSError:
+            self._drop(connection)
+            return
+
+        # Only wait for the socket to drain while there is something to send
+        events = selectors.EVENT_READ
+
+        if subscriber.sending is not None:
+            events |= selectors.EVENT_WRITE
+
+        self._selector.modify(connection, events, subscriber)
+
+    def _drop(self, connection: socket.socket) -> None:
+        self._subscribers.pop(connection, None)
+
+        try:
+            self._selector.unregister(connection)
+        except (KeyError, ValueError):
+            pass
+
+        connection.close()
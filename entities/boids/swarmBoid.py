@@ -4,13 +4,20 @@ from entities.boids.rules import (fly_towards_center, match_velocity,
 
 
 class SwarmBoid(Boid):
+    __slots__ = ('sensory_range', 'home', 'at_home',
+                 'detected_inactive_flowers', 'detected_swarm_boids')
+
+    flock_with_own_type = True
+
     def __init__(self,
                  uid: str,
                  flight_zone: any,
-                 home: any) -> None:
+                 home: any,
+                 rng: any = None) -> None:
         super().__init__(flight_zone=flight_zone,
                          uid=uid,
-                         separation=1)
+                         separation=1,
+                         rng=rng)
         self.alignment = 1
         self.cohesion = 1
         self.visual_range = 0.5
@@ -21,16 +28,15 @@ class SwarmBoid(Boid):
         self.home = home
         self.at_home = True
 
-        self.detected_inactive_flowers = []
-        self.detected_swarm_boids = []
+        self.detected_inactive_flowers = ()
+        self.detected_swarm_boids = ()
 
         self._type = BoidTypes.SWARM
 
     def perceive(self, boids: list) -> None:
         self.update_detected_boids(boids)
 
-        self.detected_harvester_boids = self.get_detected_boids_of_type(
-            self.type)
+        self.detected_swarm_boids = self.get_detected_boids_of_type(self.type)
 
         # TODO: Perceive flowers
 
@@ -0,0 +1,444 @@
+import numpy as np
+from entities.boids.instrumentation import NullInstrumentation
+from entities.boids.rules import (Scratch, avoid_hovering_above_batch,
+                                  avoid_others_batch, fly_towards_center_batch,
+                                  keep_within_bounds_batch,
+                                  limit_velocity_batch, match_velocity_batch)
+from entities.boids.spatialIndex import (MaskedNeighbours, VerletList,
+                                         find_downwash, find_neighbours)
+
+"""
+Struct-of-arrays representation of a swarm.
+
+All per-boid state lives in contiguous arrays with one row per boid, and the
+perceive + update step for the whole swarm is run as batched NumPy operations.
+"""
+
+EVERYONE = slice(None)
+
+
+class Workspace:
+    """
+    Buffers the update of one range of rows works in, kept from tick to tick
+    """
+
+    def __init__(self, size: int) -> None:
+        self.scratch = Scratch(size)
+
+        self.reach = np.empty(size)
+        self.covered = np.empty(size, dtype=bool)
+
+        # Masks over the pairs of the VerletList, see perceive; rebuilt
+        # together with its candidates
+        self.rebuilds = None
+        self.flocking = None
+        self.flockmates = None
+        self.downwash = None
+        self.horizontal = None
+        self.vertical = None
+        self.within = None
+
+
+class SwarmState:
+    # boid attribute -> (column, shape of one row)
+    COLUMNS = {
+        'position': ('positions', (3,)),
+        'velocity': ('velocities', (3,)),
+        'yaw_rate': ('yaw_rates', ()),
+        'separation': ('separation', ()),
+        'alignment': ('alignment', ()),
+        'cohesion': ('cohesion', ()),
+        'visual_range': ('visual_range', ()),
+        'min_speed': ('min_speed', ()),
+        'max_speed': ('max_speed', ()),
+        'minimum_distance': ('minimum_distance', ()),
+        'downwash_radius': ('downwash_radius', ()),
+        'downwash_height': ('downwash_height', ()),
+        'current_food': ('current_food', ()),
+        'carrying_capacity': ('carrying_capacity', ()),
+        'harvesting_rate': ('harvesting_rate', ()),
+        'deposit_rate': ('deposit_rate', ()),
+        'polination_rate': ('polination_rate', ()),
+        'eating_rate': ('eating_rate', ()),
+    }
+
+    def __init__(self,
+                 boids: list,
+                 flight_zone: any,
+                 skin: float = 0.0,
+                 in_place: bool = False) -> None:
+        """
+        :param boids: List of boid-objects, they are bound to the new state
+        :param flight_zone: dimensions of the flight zone
+        :param skin: if positive, the neighbour lists are kept over several
+                     ticks in VerletLists with this skin, in meters
+        :param in_place: perceive into masks over the pairs of a VerletList
+                         instead of building new neighbour lists, so that
+                         ticks between two rebuilds of the candidates
+                         allocate no arrays; only pays off with a skin
+        """
+
+        self.boids = boids
+        self.flight_zone = flight_zone
+
+        self.skin = skin
+        self.in_place = in_place
+        # (first, last) row -> VerletList and Workspace of those rows
+        self.verlet_lists = {}
+        self.workspaces = {}
+
+        self.uids = [boid.uid for boid in boids]
+        self.indices = {uid: i for i, uid in enumerate(self.uids)}
+
+        size = len(boids)
+
+        for attribute, (column, shape) in self.COLUMNS.items():
+            values = self._allocate(column, (size,) + shape, np.float64)
+            values[:] = [getattr(boid, attribute) for boid in boids]
+
+            setattr(self, column, values)
+
+        self.types = self._allocate('types', (size,), np.int64)
+        self.types[:] = [boid.type.value for boid in boids]
+
+        self.flock_with_own_type = self._allocate('flock_with_own_type',
+                                                  (size,), bool)
+        self.flock_with_own_type[:] = [boid.flock_with_own_type
+                                       for boid in boids]
+
+        # Neighbour lists for the current tick, see perceive
+        self.detected = None
+        self.detected_by_type = {}
+        self.close = None
+        self.flockmates = None
+        self.downwash = None
+
+        # Replaced by an Instrumentation to record what happens in step
+        self.instrumentation = NullInstrumentation()
+
+        for i, boid in enumerate(boids):
+            boid.bind(self, i)
+
+    @classmethod
+    def from_arrays(cls,
+                    arrays: dict,
+                    flight_zone: any,
+                    skin: float = 0.0,
+                    in_place: bool = False) -> 'SwarmState':
+        """
+        Builds a state without boids on top of existing column arrays, e.g.
+        in another process
+        """
+
+        state = cls.__new__(cls)
+
+        state.boids = []
+        state.flight_zone = flight_zone
+        state.skin = skin
+        state.in_place = in_place
+        state.verlet_lists = {}
+        state.workspaces = {}
+        state.uids = [None] * len(arrays['positions'])
+        state.indices = {}
+
+        for column, values in arrays.items():
+            setattr(state, column, values)
+
+        state.detected = None
+        state.detected_by_type = {}
+        state.close = None
+        state.flockmates = None
+        state.downwash = None
+        state.instrumentation = NullInstrumentation()
+
+        return state
+
+    def _allocate(self, column: str, shape: tuple, dtype: any) -> any:
+        """
+        Returns the (uninitialised) array to keep a column in
+        """
+
+        return np.empty(shape, dtype=dtype)
+
+    def __len__(self) -> int:
+        return len(self.uids)
+
+    def release(self) -> None:
+        """
+        Frees resources held by the state, if any
+        """
+
+    def set_positions(self, positions: dict) -> None:
+        """
+        Copies positions, given as a dict keyed by uid, into the state
+        """
+
+        # Row by row, so no list of the whole swarm is built every tick
+        for row, uid in enumerate(self.uids):
+            self.positions[row] = positions[uid]
+
+    def perceive(self, rows: slice = EVERYONE) -> None:
+        """
+        Works out which boids every boid (or only the boids in `rows`) can
+        perceive, and which boids are in its downwash.
+
+        The spatial index is built once per tick and answers both the
+        visual range and the minimum distance queries. With a skin it is
+        only rebuilt once a boid has moved far enough, in between the cached
+        candidates are checked.
+        """
+
+        if self.in_place:
+            self._perceive_in_place(rows)
+        else:
+            self._perceive(rows)
+
+        self.sense_downwash(rows)
+
+    def _perceive(self, rows: slice) -> None:
+        if self.skin > 0:
+            find = self._verlet_list(rows).find
+        else:
+            find = find_neighbours
+
+        self.detected, self.close = find(self.positions,
+                                         self.visual_range,
+                                         self.minimum_distance,
+                                         rows)
+
+        detected = self.detected
+        own_rows = detected.rows + (rows.start or 0)
+        neighbour_types = self.types[detected.indices]
+
+        # Neighbours of every boid split by BoidTypes value
+        self.detected_by_type = detected.partition(neighbour_types)
+
+        same_type = self.types[own_rows] == neighbour_types
+        self.flockmates = detected.subset(
+            same_type | ~self.flock_with_own_type[own_rows])
+
+        self.instrumentation.neighbours(detected.count())
+
+    def _verlet_list(self, rows: slice) -> VerletList:
+        key = rows.indices(len(self))[:2]
+
+        if key not in self.verlet_lists:
+            self.verlet_lists[key] = VerletList(self.skin)
+
+        return self.verlet_lists[key]
+
+    def _workspace(self, rows: slice) -> Workspace:
+        first, last, _ = rows.indices(len(self))
+
+        if (first, last) not in self.workspaces:
+            self.workspaces[first, last] = Workspace(max(last - first, 0))
+
+        return self.workspaces[first, last]
+
+    def _perceive_in_place(self, rows: slice) -> None:
+        """
+        perceive for the in-place mode: the neighbours are MaskedNeighbours
+        over the candidates of the VerletList of the rows. Types are not
+        split out, detected_by_type is None.
+        """
+
+        verlet = self._verlet_list(rows)
+        workspace = self._workspace(rows)
+
+        self.detected, self.close = verlet.find_in_place(self.positions,
+                                                         self.visual_range,
+                                                         self.minimum_distance,
+                                                         rows)
+        self.detected_by_type = None
+
+        if workspace.rebuilds != verlet.rebuilds:
+            # Whether a pair may flock only depends on the types, which are
+            # fixed as long as the candidates are
+            candidates = verlet.candidates
+            own_rows = verlet.own_rows
+
+            workspace.flocking = \
+                (self.types[own_rows] == self.types[candidates.indices]) | \
+                ~self.flock_with_own_type[own_rows]
+            workspace.flockmates = MaskedNeighbours(
+                candidates, np.zeros(len(candidates), bool), verlet.buffers)
+            workspace.downwash = MaskedNeighbours(
+                candidates, np.zeros(len(candidates), bool), verlet.buffers)
+            workspace.horizontal = np.empty(len(candidates))
+            workspace.vertical = np.empty(len(candidates))
+            workspace.within = np.empty(len(candidates), bool)
+            workspace.rebuilds = verlet.rebuilds
+
+        np.logical_and(self.detected.mask, workspace.flocking,
+                       out=workspace.flockmates.mask)
+        self.flockmates = workspace.flockmates
+
+        self.instrumentation.neighbours(self.detected.count())
+
+    def sense_downwash(self, rows: slice = EVERYONE) -> None:
+        """
+        Finds the boids inside the downwash cylinder of every boid (or only
+        of the boids in `rows`).
+
+        Kept apart from the rest of perceive as it is a safety constraint:
+        LevelOfDetail senses the downwash of every boid on every tick,
+        however often the boids perceive their flock.
+        """
+
+        if self.in_place and self._sense_downwash_in_place(rows):
+            return
+
+        self.downwash = find_downwash(self.positions,
+                                      self.downwash_radius,
+                                      self.downwash_height,
+                                      rows)
+
+    def _sense_downwash_in_place(self, rows: slice) -> bool:
+        """
+        Masks the candidates of the last in-place perceive that are inside
+        the downwash cylinders. Only possible if every cylinder lies within
+        visual range, returns False otherwise.
+        """
+
+        verlet = self._verlet_list(rows)
+        workspace = self._workspace(rows)
+
+        if workspace.downwash is None or workspace.rebuilds != verlet.rebuilds:
+            return False
+
+        reach = np.hypot(self.downwash_radius[rows], self.downwash_height[rows],
+                         out=workspace.reach)
+
+        if not np.less_equal(reach, self.visual_range[rows],
+                             out=workspace.covered).all():
+            return False
+
+        offsets = verlet.offsets
+        inside = workspace.downwash.mask
+        limit = verlet.limit
+
+        horizontal = np.hypot(offsets[:, 0], offsets[:, 1],
+                              out=workspace.horizontal)
+        np.take(self.downwash_radius, verlet.own_rows, out=limit, mode='clip')
+        np.less(horizontal, limit, out=inside)
+
+        vertical = np.abs(offsets[:, 2], out=workspace.vertical)
+        np.take(self.downwash_height, verlet.own_rows, out=limit, mode='clip')
+        np.logical_and(inside,
+                       np.less(vertical, limit, out=workspace.within),
+                       out=inside)
+
+        self.downwash = workspace.downwash
+
+        return True
+
+    def update(self,
+               delta_time: float,
+               rows: any = EVERYONE,
+               out: any = None,
+               flocking_time: any = None) -> None:
+        """
+        Applies the boid rules to every boid (or only the boids in `rows`,
+        a slice or an array of indices) at once, against the neighbours
+        found by perceive.
+
+        Mirrors the order used by the Boid subtypes, but all boids see the
+        velocities of the others as they were at the start of the update.
+        The new velocities are written to `out`, by default the velocities
+        of the state itself. The rules work in the buffers of the
+        Workspace of the rows, which are kept from tick to tick.
+
+        :param flocking_time: seconds the flocking rules (fly_towards_center,
+                              match_velocity) cover, for all boids or per
+                              boid in `rows`; 0 leaves a boid's flocking
+                              out. delta_time by default
+        """
+
+        if isinstance(rows, slice):
+            scratch = self._workspace(rows).scratch
+        else:
+            # The rows differ from call to call, so do their buffers
+            scratch = Scratch(len(rows))
+
+        if flocking_time is None:
+            flocking_time = delta_time
+
+        velocities = scratch.velocities
+        np.copyto(velocities, self.velocities[rows])
+
+        instrumentation = self.instrumentation
+
+        with instrumentation.phase('fly_towards_center'):
+            fly_towards_center_batch(velocities,
+                                     self.positions,
+                                     self.flockmates,
+                                     self.cohesion[rows],
+                                     flocking_time,
+                                     rows,
+                                     scratch)
+
+        with instrumentation.phase('match_velocity'):
+            match_velocity_batch(velocities,
+                                 self.velocities,
+                                 self.flockmates,
+                                 self.alignment[rows],
+                                 flocking_time,
+                                 scratch)
+
+        with instrumentation.phase('avoid_others'):
+            avoid_others_batch(velocities,
+                               self.positions,
+                               self.close,
+                               self.separation[rows],
+                               delta_time,
+                               rows,
+                               scratch)
+
+        with instrumentation.phase('avoid_hovering_above'):
+            avoid_hovering_above_batch(velocities,
+                                       self.positions,
+                                       self.downwash,
+                                       self.separation[rows],
+                                       delta_time,
+                                       rows,
+                                       scratch)
+
+        with instrumentation.phase('keep_within_bounds'):
+            keep_within_bounds_batch(velocities,
+                                     self.positions[rows],
+                                     self.flight_zone,
+                                     delta_time,
+                                     scratch)
+
+        with instrumentation.phase('limit_velocity'):
+            limit_velocity_batch(velocities,
+                                 self.min_speed[rows],
+                                 self.max_speed[rows],
+                                 scratch)
+
+        if out is None:
+            self.velocities[rows] = velocities
+        else:
+            out[:] = velocities
+
+        # Every rule was evaluated for every boid, the flocking rules only
+        # for the boids that flocked
+        flocked = np.count_nonzero(np.broadcast_to(flocking_time,
+                                                   len(velocities)))
+
+        for rule in ('fly_towards_center', 'match_velocity'):
+            instrumentation.rule_called(rule, int(flocked))
+
+        for rule in ('avoid_others', 'avoid_hovering_above',
+                     'keep_within_bounds', 'limit_velocity'):
+            instrumentation.rule_called(rule, len(velocities))
+
+    def step(self, delta_time: float) -> None:
+        """
+        Runs perceive + update for the whole swarm
+        """
+
+        with self.instrumentation.phase('perceive'):
+            self.perceive()
+
+        self.update(delta_time)
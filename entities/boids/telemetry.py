@@ -0,0 +1,221 @@
+import json
+import os
+import time
+
+import numpy as np
+
+"""
+Append-only telemetry log of the control loop.
+
+The log starts with a fixed header (magic, sizes, tick count and a JSON
+description of the swarm), followed by one fixed-size record per tick with
+its timestamp, delta_time, the ingested positions and the commanded
+velocities. The records are written straight into a memory-mapped file, so
+recording a tick is two array copies.
+"""
+
+MAGIC = b'BOIDTLM1'
+
+# magic, size of the JSON header, number of ticks
+PREAMBLE = np.dtype([('magic', 'S8'), ('header_size', '<u8'), ('count', '<u8')])
+
+# Records start at a multiple of this, so they stay aligned
+ALIGNMENT = 64
+
+
+def record_dtype(size: int) -> np.dtype:
+    """
+    Layout of one tick of a swarm of `size` boids
+    """
+
+    return np.dtype([('timestamp', '<f8'),
+                     ('delta_time', '<f8'),
+                     ('positions', '<f8', (size, 3)),
+                     ('velocities', '<f8', (size, 3))])
+
+
+def _data_offset(header_size: int) -> int:
+    end = PREAMBLE.itemsize + header_size
+
+    return -(-end // ALIGNMENT) * ALIGNMENT
+
+
+class TelemetryRecorder:
+    def __init__(self,
+                 path: str,
+                 swarm: any,
+                 capacity: int = 1024,
+                 clock: any = time.time) -> None:
+        """
+        :param path: file to write the log to, it is overwritten
+        :param swarm: SwarmState whose boids are described in the header
+        :param capacity: ticks to make room for at a time; the file grows
+                         by this much whenever it is full
+        :param clock: source of the tick timestamps
+        """
+
+        self.path = path
+        self.size = len(swarm)
+        self.dtype = record_dtype(self.size)
+        self.capacity = capacity
+        self.clock = clock
+
+        flight_zone = swarm.flight_zone
+
+        header = {
+            'uids': list(swarm.uids),
+            'types': [boid.type.name for boid in swarm.boids],
+            'parameters': {column: getattr(swarm, column).tolist()
+                           for column, shape in swarm.COLUMNS.values()
+                           if shape == ()},
+            'flight_zone': {name: getattr(flight_zone, name)
+                            for name in ('x', 'y', 'z', 'floor_offset')},
+            # The rules read the velocities of the previous tick
+            'initial_velocities': swarm.velocities.tolist(),
+            'created': time.time(),
+        }
+
+        encoded = json.dumps(header).encode()
+        self.offset = _data_offset(len(encoded))
+
+        with open(path, 'wb') as file:
+            file.write(np.array((MAGIC, len(encoded), 0),
+                                dtype=PREAMBLE).tobytes())
+            file.write(encoded)
+
+        self.count = 0
+
+        self._preamble = np.memmap(path, dtype=PREAMBLE, mode='r+',
+                                   shape=(1,))
+        self._records = None
+        self._grow()
+
+    def __enter__(self) -> 'TelemetryRecorder':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _grow(self) -> None:
+        """
+        Makes room for `capacity` more ticks and maps the records again
+        """
+
+        if self._records is not None:
+            self._records.flush()
+
+        allocated = self.count + self.capacity
+
+        with open(self.path, 'r+b') as file:
+            file.truncate(self.offset + allocated * self.dtype.itemsize)
+
+        self._records = np.memmap(self.path, dtype=self.dtype, mode='r+',
+                                  offset=self.offset, shape=(allocated,))
+
+    def record(self,
+               delta_time: float,
+               positions: any,
+               velocities: any) -> None:
+        """
+        Appends one tick, `positions` and `velocities` are the N x 3 arrays of
+        the swarm state
+        """
+
+        if self.count == len(self._records):
+            self._grow()
+
+        record = self._records[self.count]
+        record['timestamp'] = self.clock()
+        record['delta_time'] = delta_time
+        record['positions'] = positions
+        record['velocities'] = velocities
+
+        # Only counted once the record is complete
+        self.count += 1
+        self._preamble['count'] = self.count
+
+    def flush(self) -> None:
+        self._records.flush()
+        self._preamble.flush()
+
+    def close(self) -> None:
+        """
+        Flushes the log and cuts off the room that was not used
+        """
+
+        if self._records is None:
+            return
+
+        self.flush()
+
+        self._records = None
+        self._preamble = None
+
+        with open(self.path, 'r+b') as file:
+            file.truncate(self.offset + self.count * self.dtype.itemsize)
+
+
+class TelemetryLog:
+    """
+    Read-only view of a log written by a TelemetryRecorder
+    """
+
+    def __init__(self, path: str) -> None:
+        preamble = np.fromfile(path, dtype=PREAMBLE, count=1)[0]
+
+        if preamble['magic'] != MAGIC:
+            raise ValueError(f"{path} is not a telemetry log")
+
+        with open(path, 'rb') as file:
+            file.seek(PREAMBLE.itemsize)
+            self.header = json.loads(file.read(int(preamble['header_size'])))
+
+        self.dtype = record_dtype(len(self.uids))
+
+        offset = _data_offset(int(preamble['header_size']))
+
+        # A log that was not closed may have room for more ticks than the
+        # count says were written
+        count = min(int(preamble['count']),
+                    (os.path.getsize(path) - offset) // self.dtype.itemsize)
+
+        if count:
+            self.records = np.memmap(path, dtype=self.dtype, mode='r',
+                                     offset=offset, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=self.dtype)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def uids(self) -> list:
+        return self.header['uids']
+
+    @property
+    def types(self) -> list:
+        return self.header['types']
+
+    @property
+    def parameters(self) -> dict:
+        return self.header['parameters']
+
+    @property
+    def initial_velocities(self) -> any:
+        return np.array(self.header['initial_velocities']).reshape(-1, 3)
+
+    @property
+    def timestamps(self) -> any:
+        return self.records['timestamp']
+
+    @property
+    def delta_times(self) -> any:
+        return self.records['delta_time']
+
+    @property
+    def positions(self) -> any:
+        return self.records['positions']
+
+    @property
+    def velocities(self) -> any:
+        return self.records['velocities']
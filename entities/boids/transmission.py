@@ -0,0 +1,167 @@
+import time
+
+import numpy as np
+
+"""
+Transmission of the velocity commands to the controller.
+
+A command is only sent when it differs enough from the one last sent to
+the same drone, or when that one is getting old. The commands of one tick
+are handed over in one call, which a ControllerGroup splits by radio and
+sends to the radios concurrently. The dict of commands is kept from tick to tick and its values
+are views onto the velocities last sent, so controllers that keep them
+beyond the call must copy them.
+"""
+
+
+def radio_of(uri: str) -> str:
+    """
+    The radio a drone is reached through, e.g. 'radio://0' for
+    'radio://0/80/2M/E7E7E7E7E0'; uris without a path share one radio per
+    scheme
+    """
+
+    scheme, _, rest = uri.partition('://')
+    parts = rest.split('/')
+
+    if len(parts) > 1:
+        return f'{scheme}://{parts[0]}'
+
+    return scheme
+
+
+class CommandTransmitter:
+    def __init__(self,
+                 controller: any,
+                 uids: list,
+                 threshold: float = 0.0,
+                 keep_alive: float = 0.5,
+                 clock: any = time.monotonic) -> None:
+        """
+        :param controller: controller interface object
+        :param uids: uid of the drone of every row of the velocities
+        :param threshold: smallest change of a velocity, in m/s, that is sent
+        :param keep_alive: a command is sent again at least this often, in
+                           seconds, even if it has not changed; 0 or less
+                           turns the keep-alive off, so an unchanged
+                           command is never sent again
+        :param clock: time source for the keep-alive
+        """
+
+        self.controller = controller
+        self.uids = list(uids)
+        self.threshold = threshold
+        self.keep_alive = keep_alive
+        self.clock = clock
+
+        size = len(self.uids)
+
+        # What was sent last to every drone, and when
+        self.last_velocities = np.full((size, 3), np.nan)
+        self.last_sent = np.full(size, -np.inf)
+        self.last_yaw_rate = None
+
+        radios = {}
+
+        for row, uid in enumerate(self.uids):
+            radios.setdefault(radio_of(uid), []).append(row)
+
+        # radio -> rows of the drones it reaches
+        self.radios = {radio: np.array(rows, dtype=np.intp)
+                       for radio, rows in radios.items()}
+
+        # The rows sorted by radio, and where every radio starts among them
+        self._by_radio = np.concatenate(
+            [np.empty(0, dtype=np.intp), *self.radios.values()])
+        self._radio_starts = np.cumsum(
+            [0] + [len(rows) for rows in self.radios.values()])[:-1]
+
+        # The commands handed to the controller, uid -> row of
+        # last_velocities; kept from tick to tick and only changed for the
+        # drones that start or stop being due
+        self.commands = {}
+        self._rows = [self.last_velocities[row] for row in range(size)]
+        self._commanded = np.zeros(size, dtype=bool)
+
+        # Buffers for send
+        self._due = np.empty(size, dtype=bool)
+        self._changed = np.empty(size, dtype=bool)
+        self._change = np.empty((size, 3))
+        self._distance = np.empty(size)
+        self._due_by_radio = np.empty(size, dtype=bool)
+        self._radios_due = np.empty(len(self.radios), dtype=bool)
+
+        self.sent = 0
+        self.suppressed = 0
+        # Radios with at least one command, summed over the ticks
+        self.radios_commanded = 0
+
+    @property
+    def statistics(self) -> dict:
+        total = self.sent + self.suppressed
+
+        return {
+            'sent': self.sent,
+            'suppressed': self.suppressed,
+            'radios_commanded': self.radios_commanded,
+            'suppressed_ratio': self.suppressed / total if total else 0.0,
+        }
+
+    def send(self, velocities: any, yaw_rate: float) -> None:
+        """
+        Sends the commands that changed or are due for a keep-alive.
+
+        :param velocities: N x 3 array with the velocity of every drone, in
+                           the order of `uids`
+        :param yaw_rate: yaw rate for every drone; if it changes, every
+                         command is sent
+        """
+
+        now = self.clock()
+
+        change = np.subtract(velocities, self.last_velocities, out=self._change)
+        distance = np.einsum('ij,ij->i', change, change, out=self._distance)
+        changed = np.greater(distance, self.threshold ** 2, out=self._changed)
+
+        # last_sent starts at -inf, so drones that never got a command are due
+        if self.keep_alive > 0:
+            due = np.greater_equal(np.subtract(now, self.last_sent,
+                                               out=self._distance),
+                                   self.keep_alive, out=self._due)
+        else:
+            due = np.isneginf(self.last_sent, out=self._due)
+
+        np.logical_or(due, changed, out=due)
+
+        if yaw_rate != self.last_yaw_rate:
+            due.fill(True)
+
+        np.copyto(self.last_velocities, velocities, where=due[:, np.newaxis])
+        np.copyto(self.last_sent, now, where=due)
+        self.last_yaw_rate = yaw_rate
+
+        # Only the drones that start or stop being due change the commands
+        commands = self.commands
+
+        for row in np.flatnonzero(np.not_equal(due, self._commanded,
+                                               out=self._changed)).tolist():
+            if due[row]:
+                commands[self.uids[row]] = self._rows[row]
+            else:
+                del commands[self.uids[row]]
+
+        np.copyto(self._commanded, due)
+
+        if commands:
+            self.controller.set_swarm_velocities(commands, yaw_rate)
+
+        if len(due):
+            np.take(due, self._by_radio, out=self._due_by_radio,
+                    mode='clip')
+            np.logical_or.reduceat(self._due_by_radio, self._radio_starts,
+                                   out=self._radios_due)
+            self.radios_commanded += int(np.count_nonzero(self._radios_due))
+
+        sent = int(np.count_nonzero(due))
+        self.sent += sent
+        self.suppressed += len(due) - sent
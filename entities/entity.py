@@ -1,9 +1,60 @@
 import numpy as np
 
 
+class StoreField:
+    """
+    Entity attribute that lives in a row of an array owned by a store
+    (e.g. a SwarmState) once the entity has been bound to it.
+
+    Until then the value is kept on the entity itself.
+    """
+
+    def __init__(self, column: str, default: any = None) -> None:
+        self.column = column
+        self.default = default
+
+    def __set_name__(self, owner: any, name: str) -> None:
+        self._local = '_' + name
+
+    def __get__(self, entity: any, owner: any = None) -> any:
+        if entity is None:
+            return self
+
+        if entity._store is None:
+            return getattr(entity, self._local, self.default)
+
+        return getattr(entity._store, self.column)[entity._store_index]
+
+    def __set__(self, entity: any, value: any) -> None:
+        if entity._store is None:
+            setattr(entity, self._local, value)
+        else:
+            getattr(entity._store, self.column)[entity._store_index] = value
+
+    def release(self, entity: any) -> None:
+        """
+        Drops the value kept on the entity, once the store holds it
+        """
+
+        if hasattr(entity, self._local):
+            delattr(entity, self._local)
+
+
 class Entity:
-    def __init__(self, uid: str, position: any = np.zeros(3)) -> None:
-        self._position = position
+    # Entities are kept in their thousands, so they have no __dict__; every
+    # subclass lists its own attributes (and the '_' + name of its
+    # StoreFields) in __slots__
+    __slots__ = ('_store', '_store_index', '_position', '_uid')
+
+    def __init__(self, uid: str, position: any = None) -> None:
+        self._store = None
+        self._store_index = None
+
+        # Every entity gets its own position, never a shared default array
+        if position is None:
+            self._position = np.zeros(3)
+        else:
+            self._position = np.array(position, dtype=np.float64)
 
         self._uid = uid
 
@@ -15,5 +66,21 @@ class Entity:
     def position(self) -> any:
         return self._position
 
+    def bind(self, store: any, index: int) -> None:
+        """
+        Moves the entity's StoreFields into row `index` of `store`.
+
+        The store is expected to already hold the current values, the
+        values kept on the entity itself are dropped.
+        """
+
+        self._store = store
+        self._store_index = index
+
+        for cls in type(self).__mro__:
+            for field in vars(cls).values():
+                if isinstance(field, StoreField):
+                    field.release(self)
+
     def update(self) -> None:
         raise NotImplementedError("All entities need an update function!")
@@ -1,25 +1,46 @@
 import numpy as np
 
 from entities.entity import Entity
-from entities.vegetation import mushroom.Mushroom, spore.Spore
+from entities.vegetation.mushroom import Mushroom
+from entities.vegetation.spore import Spore
 
 
 class PowerBed(Entity):
+    __slots__ = ('_size', '_spores', '_mushrooms', 'spores_per_mushroom',
+                 'active_spores', 'active_mushrooms', 'eaten_spores')
+
     def __init__(self,
                  uid: str,
                  position: any,
                  size: any,
                  spore_positions: list,
-                 mushroom_positions: list) -> None:
+                 mushroom_positions: list,
+                 spores_per_mushroom: int | None = None) -> None:
+        """
+        :param spores_per_mushroom: how many Spores have to be eaten for the
+                                    next Mushroom to activate; defaults to
+                                    spreading all Mushrooms over all Spores
+        """
         super().__init__(uid, position)
 
         self._size = size
 
         self._spores = [Spore(f"spore{i}", pos)
-                       for i, pos in enumerate(spore_positions)]
+                        for i, pos in enumerate(spore_positions)]
 
         self._mushrooms = [Mushroom(f"mushroom{i}", pos)
-                          for i, pos in enumerate(mushroom_positions)]
+                           for i, pos in enumerate(mushroom_positions)]
+
+        if spores_per_mushroom is None:
+            spores_per_mushroom = max(
+                len(self._spores) // max(len(self._mushrooms), 1), 1)
+
+        self.spores_per_mushroom = spores_per_mushroom
+
+        # Running counters, kept up to date by the Ecosystem
+        self.active_spores = 0
+        self.active_mushrooms = 0
+        self.eaten_spores = 0
 
     @property
     def spores(self) -> list:
@@ -34,6 +55,7 @@ class PowerBed(Entity):
         return self._size
 
     def update(self) -> None:
-        # check if enough Spores have been deactivated, if so, start activating mushrooms
+        # Enough deactivated Spores activating Mushrooms is driven by the
+        # events of the Ecosystem, see Ecosystem._spore_deactivated
         pass
 
@@ -0,0 +1,248 @@
+import numpy as np
+from entities.vegetation.hive import Hive
+from entities.vegetation.mushroom import Mushroom
+from entities.vegetation.powerFungus import PowerFungus
+from entities.vegetation.resourceStore import ResourceStore
+from entities.vegetation.spore import Spore
+
+"""
+Event-driven state machine of the ecosystem on top of a ResourceStore.
+
+Activation and deactivation events update running counters on the PowerBeds
+and PowerFungi, and the reactions to them (a saturated Hive releasing the
+Spores of its PowerBed, eaten Spores activating Mushrooms, active Mushrooms
+activating the PowerFungi) are only evaluated for the entities that changed.
+The cost of a tick therefore depends on the number of changes, not on the
+number of entities.
+"""
+
+
+class Ecosystem:
+    def __init__(self, store: ResourceStore) -> None:
+        """
+        :param store: ResourceStore holding all vegetation of the ecosystem
+        """
+
+        self.store = store
+
+        self.spore_code = store.kind_codes.get(Spore, -1)
+        self.mushroom_code = store.kind_codes.get(Mushroom, -1)
+        self.hive_code = store.kind_codes.get(Hive, -1)
+
+        spores = store.of_kind(Spore)
+        mushrooms = store.of_kind(Mushroom)
+
+        # Indices of the Spores and Mushrooms of every PowerBed
+        self.bed_spores = [np.flatnonzero(spores & (store.owners == b))
+                           for b in range(len(store.beds))]
+        self.bed_mushrooms = [np.flatnonzero(mushrooms & (store.owners == b))
+                              for b in range(len(store.beds))]
+
+        self.fungi = np.flatnonzero(store.of_kind(PowerFungus))
+
+        # The counters are counted once here and only updated from then on
+        for bed, bed_spores, bed_mushrooms in zip(store.beds,
+                                                  self.bed_spores,
+                                                  self.bed_mushrooms):
+            bed.active_spores = int(store.active[bed_spores].sum())
+            bed.active_mushrooms = int(store.active[bed_mushrooms].sum())
+            bed.eaten_spores = 0
+
+        self.active_mushrooms = int(store.active[mushrooms].sum())
+
+        for i in self.fungi:
+            store.vegetation[i].active_mushrooms = self.active_mushrooms
+
+        self.change_callbacks = []
+        self.threshold_callbacks = []
+
+        # Vegetation activated and deactivated during the last step
+        self.activated = []
+        self.deactivated = []
+
+    def on_change(self, callback: any) -> None:
+        """
+        Calls `callback(activated, deactivated)` with the lists of vegetation
+        that changed, after every step in which anything changed, e.g. to
+        send LED/deck commands
+        """
+
+        self.change_callbacks.append(callback)
+
+    def on_threshold(self, callback: any) -> None:
+        """
+        Calls `callback(entity, counter, value)` whenever a counter of an
+        entity crosses its threshold
+        """
+
+        self.threshold_callbacks.append(callback)
+
+    def attach(self, swarm: any) -> None:
+        """
+        Connects the store to the swarm whose boids interact with it
+        """
+
+        self.store.attach(swarm)
+
+    def step(self, delta_time: float, contacts: any = None) -> tuple:
+        """
+        Steps the store and reacts to the vegetation that changed.
+
+        :return: indices of the vegetation that was activated and of the
+                 vegetation that was deactivated, including the changes made
+                 by the reactions
+        """
+
+        activated, deactivated = self.store.step(delta_time, contacts)
+
+        return self.apply(activated, deactivated)
+
+    def set_active(self, indices: any, active: bool) -> tuple:
+        """
+        Activates or deactivates vegetation from outside of the store and
+        reacts to the vegetation that actually changed
+        """
+
+        indices = np.atleast_1d(np.asarray(indices, dtype=np.intp))
+        changed = indices[self.store.active[indices] != active]
+
+        self.store.set_active(changed, active)
+
+        if active:
+            return self.apply(changed, ())
+
+        return self.apply((), changed)
+
+    def apply(self, activated: any, deactivated: any) -> tuple:
+        """
+        Updates the counters for vegetation that has just been (de)activated
+        in the store, and runs the reactions, which may change more
+        vegetation in turn.
+
+        :return: indices of all vegetation activated and deactivated
+        """
+
+        self._activated = []
+        self._deactivated = []
+
+        pending = [(i, True) for i in np.asarray(activated).tolist()] + \
+            [(i, False) for i in np.asarray(deactivated).tolist()]
+
+        while pending:
+            i, active = pending.pop()
+
+            if active:
+                self._activated.append(i)
+            else:
+                self._deactivated.append(i)
+
+            kind = self.store.kinds[i]
+
+            if kind == self.spore_code:
+                pending.extend(self._spore_changed(i, active))
+            elif kind == self.mushroom_code:
+                pending.extend(self._mushroom_changed(i, active))
+            elif kind == self.hive_code and active:
+                pending.extend(self._hive_saturated(i))
+
+        vegetation = self.store.vegetation
+
+        self.activated = [vegetation[i] for i in self._activated]
+        self.deactivated = [vegetation[i] for i in self._deactivated]
+
+        if self.activated or self.deactivated:
+            for callback in self.change_callbacks:
+                callback(self.activated, self.deactivated)
+
+        return (np.array(self._activated, dtype=np.intp),
+                np.array(self._deactivated, dtype=np.intp))
+
+    def _crossed(self, entity: any, counter: str, value: int) -> None:
+        for callback in self.threshold_callbacks:
+            callback(entity, counter, value)
+
+    def _change(self, indices: any, active: bool) -> list:
+        """
+        Changes vegetation in the store, returns the resulting events
+        """
+
+        changed = [i for i in indices if self.store.active[i] != active]
+
+        self.store.set_active(changed, active)
+
+        return [(i, active) for i in changed]
+
+    def _hive_saturated(self, i: int) -> list:
+        """
+        A Hive that has reached its food threshold uses up that food to
+        release the Spores of its PowerBed
+        """
+
+        store = self.store
+
+        self._crossed(store.vegetation[i], 'current_food', store.levels[i])
+
+        store.levels[i] -= store.thresholds[i]
+
+        events = self._change([i], False)
+
+        bed = store.owners[i]
+
+        if bed >= 0:
+            spores = self.bed_spores[bed]
+
+            store.levels[spores] = Spore.food.default
+            events += self._change(spores.tolist(), True)
+
+        return events
+
+    def _spore_changed(self, i: int, active: bool) -> list:
+        bed_index = self.store.owners[i]
+
+        if bed_index < 0:
+            return []
+
+        bed = self.store.beds[bed_index]
+
+        if active:
+            bed.active_spores += 1
+            return []
+
+        bed.active_spores -= 1
+        bed.eaten_spores += 1
+
+        if bed.eaten_spores < bed.spores_per_mushroom:
+            return []
+
+        # Every spores_per_mushroom eaten Spores activate the next Mushroom
+        bed.eaten_spores -= bed.spores_per_mushroom
+
+        self._crossed(bed, 'eaten_spores', bed.spores_per_mushroom)
+
+        mushrooms = self.bed_mushrooms[bed_index]
+        inactive = mushrooms[~self.store.active[mushrooms]]
+
+        return self._change(inactive[:1].tolist(), True)
+
+    def _mushroom_changed(self, i: int, active: bool) -> list:
+        store = self.store
+        bed_index = store.owners[i]
+
+        if bed_index >= 0:
+            store.beds[bed_index].active_mushrooms += 1 if active else -1
+
+        self.active_mushrooms += 1 if active else -1
+
+        events = []
+
+        for f in self.fungi.tolist():
+            fungus = store.vegetation[f]
+            fungus.active_mushrooms = self.active_mushrooms
+
+            reached = self.active_mushrooms >= fungus.activation_threshold
+
+            if reached != store.active[f]:
+                self._crossed(fungus, 'active_mushrooms', self.active_mushrooms)
+                events += self._change([f], reached)
+
+        return events
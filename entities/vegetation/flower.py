@@ -1,9 +1,14 @@
+from entities.entity import StoreField
 from entities.vegetation.vegetation import Vegetation
 
-from enum import Enum, unqiue
-
 
 class Flower(Vegetation):
+    __slots__ = ('_polination_level', '_polination_threshold')
+
+    # Backed by the ResourceStore once the flower has been added to one
+    polination_level = StoreField('levels', 0.0)
+    polination_threshold = StoreField('thresholds')
+
     def __init__(self,
                  uid: str,
                  position,
@@ -11,7 +16,7 @@ class Flower(Vegetation):
                  activation_radius: float,
                  polination_threshold: int) -> None:
         super().__init__(uid, position, collision_radius,
-                       activation_radius, active)
+                         activation_radius)
 
         self.polination_threshold = polination_threshold
         self.polination_level = 0.0
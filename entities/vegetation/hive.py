@@ -1,7 +1,14 @@
+from entities.entity import StoreField
 from entities.vegetation.vegetation import Vegetation
 
 
 class Hive(Vegetation):
+    __slots__ = ('residents', 'occupants', '_current_food', '_food_threshold',
+                 'power_bed')
+
+    # Backed by the ResourceStore once the hive has been added to one
+    current_food = StoreField('levels', 0)
+
     def __init__(self,
                  uid: str,
                  position: any,
@@ -10,11 +17,11 @@ class Hive(Vegetation):
                  food_threshold: int,
                  power_bed: any,
                  current_food: int = 0) -> None:
-        super.__init__(uid=uid,
-                       position=position,
-                       collision_radius=0.5,
-                       activation_radius=0.7,
-                       active=False)
+        super().__init__(uid=uid,
+                         position=position,
+                         collision_radius=0.5,
+                         activation_radius=0.7,
+                         active=False)
 
         self.residents = residents
         self.occupants = occupants
@@ -24,6 +31,6 @@ class Hive(Vegetation):
 
         self.power_bed = power_bed
 
-   @property
-   def food_threshold(self) -> int:
-       return self._food_threshold
+    @property
+    def food_threshold(self) -> int:
+        return self._food_threshold
@@ -2,11 +2,13 @@ from entities.vegetation.vegetation import Vegetation
 
 
 class Mushroom(Vegetation):
-    def __init__(sefl,
+    __slots__ = ()
+
+    def __init__(self,
                  uid: str,
                  position) -> None:
 
         super().__init__(uid=uid,
-                       position=position,
-                       collision_radius=0.2,
-                       activation_radius=0.4)
+                         position=position,
+                         collision_radius=0.2,
+                         activation_radius=0.4)
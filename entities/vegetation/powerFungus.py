@@ -1,12 +1,25 @@
 from entities.vegetation.vegetation import Vegetation
 
+
 class PowerFungus(Vegetation):
+    __slots__ = ('residents', 'occupants', 'activation_threshold',
+                 'active_mushrooms')
+
     def __init__(self,
                  uid: str,
-                 position: any
+                 position: any,
                  residents: list,
-                 occupants: list = residents):
-        super.__init__(uid = uid,
-                       position = position,
-                       collision_radius = 0.75,
-                       activation_radius = None)
+                 occupants: list | None = None,
+                 activation_threshold: int = 1):
+        super().__init__(uid=uid,
+                         position=position,
+                         collision_radius=0.75,
+                         activation_radius=None)
+
+        self.residents = residents
+        self.occupants = residents if occupants is None else occupants
+
+        self.activation_threshold = activation_threshold
+
+        # Running counter, kept up to date by the Ecosystem
+        self.active_mushrooms = 0
@@ -0,0 +1,192 @@
+import numpy as np
+from entities.boids.spatialIndex import Neighbours, kd_tree
+from entities.powerBed import PowerBed
+
+"""
+Spatial index over the (stationary) vegetation in the ecosystem.
+
+The index is built once; vegetation that is activated or deactivated only
+flips a flag in the `active` mask.
+"""
+
+
+class VegetationRegistry:
+    def __init__(self, entities: list) -> None:
+        """
+        :param entities: vegetation to register; the Spores and Mushrooms of
+                         any PowerBed in the list are registered instead of
+                         the PowerBed itself
+        """
+
+        self.vegetation = []
+
+        for entity in entities:
+            if isinstance(entity, PowerBed):
+                self.vegetation.extend(entity.spores)
+                self.vegetation.extend(entity.mushrooms)
+            else:
+                self.vegetation.append(entity)
+
+        self.uids = [vegetation.uid for vegetation in self.vegetation]
+        self.indices = {uid: i for i, uid in enumerate(self.uids)}
+
+        self._add_columns()
+
+        self.tree = kd_tree(self.positions)
+
+        # One tree per kind for the nearest-entity queries
+        self.kind_indices = {}
+        self.kind_trees = {}
+
+        for kind, code in self.kind_codes.items():
+            indices = np.flatnonzero(self.kinds == code)
+
+            self.kind_indices[kind] = indices
+            self.kind_trees[kind] = kd_tree(self.positions[indices])
+
+        for i, vegetation in enumerate(self.vegetation):
+            vegetation.bind(self, i)
+
+    def _add_columns(self) -> None:
+        """
+        Fills the columns from the attributes of the vegetation, before it is
+        bound to the registry
+        """
+
+        # Every class of vegetation gets a code in `kinds`
+        self.kind_codes = {}
+
+        for vegetation in self.vegetation:
+            self.kind_codes.setdefault(type(vegetation), len(self.kind_codes))
+
+        self.kinds = np.array([self.kind_codes[type(vegetation)]
+                               for vegetation in self.vegetation], dtype=int)
+
+        self.positions = np.array([vegetation.position
+                                   for vegetation in self.vegetation],
+                                  dtype=np.float64).reshape(-1, 3)
+
+        self.collision_radius = np.array(
+            [vegetation.collision_radius for vegetation in self.vegetation],
+            dtype=np.float64)
+
+        # Vegetation without an activation radius can never be reached
+        self.activation_radius = np.array(
+            [np.nan if vegetation.activation_radius is None
+             else vegetation.activation_radius
+             for vegetation in self.vegetation],
+            dtype=np.float64)
+
+        self.active = np.array([vegetation.active
+                                for vegetation in self.vegetation], dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self.vegetation)
+
+    def of_kind(self, kind: type) -> any:
+        """
+        Returns a mask of the registered vegetation of the given class
+        """
+
+        if kind not in self.kind_codes:
+            return np.zeros(len(self), dtype=bool)
+
+        return self.kinds == self.kind_codes[kind]
+
+    def set_active(self, indices: any, active: bool) -> None:
+        """
+        Activates or deactivates the vegetation at the given indices
+        """
+
+        self.active[indices] = active
+
+    def within(self, positions: any, radius: str = 'activation') -> Neighbours:
+        """
+        Finds, for every position (e.g. of every boid), the vegetation whose
+        collision or activation radius it is inside of.
+
+        :param positions: N x 3 array of positions
+        :param radius: 'collision' or 'activation'
+        :return: Neighbours with one row per position, the indices point into
+                 the registry
+        """
+
+        radii = {'collision': self.collision_radius,
+                 'activation': self.activation_radius}[radius]
+
+        size = len(positions)
+        reach = np.nanmax(radii, initial=0.0)
+
+        if size == 0 or len(self) == 0 or reach <= 0:
+            empty = np.empty(0, dtype=np.intp)
+            return Neighbours(size, empty, empty, np.empty(0))
+
+        pairs = kd_tree(positions).sparse_distance_matrix(
+            self.tree, reach, output_type='ndarray')
+
+        rows = pairs['i'].astype(np.intp)
+        indices = pairs['j'].astype(np.intp)
+        distances = np.linalg.norm(positions[rows] - self.positions[indices],
+                                   axis=1)
+
+        inside = distances < radii[indices]
+
+        return Neighbours.from_pairs(size,
+                                     rows[inside],
+                                     indices[inside],
+                                     distances[inside])
+
+    def nearest(self,
+                positions: any,
+                kind: type,
+                max_distance: any,
+                active: bool | None = True) -> tuple:
+        """
+        Finds, for every position, the nearest vegetation of a class within
+        `max_distance` (e.g. the sensory_range of every boid).
+
+        :param positions: N x 3 array of positions
+        :param kind: class of the vegetation, e.g. Flower
+        :param max_distance: a distance, or one distance per position
+        :param active: only consider active (True) or inactive (False)
+                       vegetation; None considers all of it
+        :return: indices into the registry (-1 where nothing was found) and
+                 the distances to them (inf where nothing was found)
+        """
+
+        size = len(positions)
+        max_distance = np.broadcast_to(np.asarray(max_distance, dtype=float),
+                                       (size,))
+
+        nearest = np.full(size, -1, dtype=np.intp)
+        distances = np.full(size, np.inf)
+
+        if size == 0 or kind not in self.kind_trees:
+            return nearest, distances
+
+        pairs = kd_tree(positions).sparse_distance_matrix(
+            self.kind_trees[kind], max_distance.max(), output_type='ndarray')
+
+        rows = pairs['i'].astype(np.intp)
+        indices = self.kind_indices[kind][pairs['j']]
+        found = pairs['v']
+
+        keep = found <= max_distance[rows]
+
+        if active is not None:
+            keep &= self.active[indices] == active
+
+        rows, indices, found = rows[keep], indices[keep], found[keep]
+
+        # The first pair of every row, after sorting by distance, is the
+        # nearest one
+        order = np.lexsort((found, rows))
+        rows, indices, found = rows[order], indices[order], found[order]
+
+        first = np.ones(len(rows), dtype=bool)
+        first[1:] = rows[1:] != rows[:-1]
+
+        nearest[rows[first]] = indices[first]
+        distances[rows[first]] = found[first]
+
+        return nearest, distances
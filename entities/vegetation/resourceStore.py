@@ -0,0 +1,201 @@
+import numpy as np
+from entities.boids.boid import BoidTypes
+from entities.powerBed import PowerBed
+from entities.vegetation.flower import Flower
+from entities.vegetation.hive import Hive
+from entities.vegetation.registry import VegetationRegistry
+from entities.vegetation.spore import Spore
+
+"""
+Columnar store of the resources in the ecosystem.
+
+Pollination, harvesting, depositing and feeding are applied for all contacts
+between boids and vegetation at once, and activation thresholds are checked
+for all vegetation at once.
+"""
+
+
+def _share(demand: any, pairs: any, available: any) -> any:
+    """
+    Scales the demand of every contact down so that the total demand on an
+    entity does not exceed what is available there
+    """
+
+    total = np.bincount(pairs, weights=demand, minlength=len(available))
+    scale = np.divide(available, total,
+                      out=np.ones_like(available), where=total > available)
+
+    return demand * scale[pairs]
+
+
+class ResourceStore(VegetationRegistry):
+    # class -> attribute that is kept in the levels column
+    LEVELS = {Flower: 'polination_level', Hive: 'current_food', Spore: 'food'}
+    # class -> attribute that is kept in the thresholds column
+    THRESHOLDS = {Flower: 'polination_threshold', Hive: 'food_threshold'}
+    # Vegetation that deactivates once its level reaches 0
+    EMPTIES = (Flower, Spore)
+
+    def __init__(self, entities: list) -> None:
+        """
+        :param entities: vegetation to register; the Spores and Mushrooms of
+                         any PowerBed in the list are registered instead of
+                         the PowerBed itself
+        """
+
+        self.beds = [entity for entity in entities
+                     if isinstance(entity, PowerBed)]
+
+        self.swarm = None
+        self.homes = np.zeros(0, dtype=np.intp)
+
+        super().__init__(entities)
+
+    def _add_columns(self) -> None:
+        super()._add_columns()
+
+        size = len(self.vegetation)
+
+        self.levels = np.zeros(size)
+        # Vegetation without a threshold is never activated by its level
+        self.thresholds = np.full(size, np.nan)
+        self.empties = np.zeros(size, dtype=bool)
+
+        # Index of the PowerBed (in `beds`) the vegetation belongs to, or -1
+        self.owners = np.full(size, -1, dtype=np.intp)
+
+        bed_of = {}
+
+        for bed_index, bed in enumerate(self.beds):
+            for vegetation in bed.spores + bed.mushrooms:
+                bed_of[id(vegetation)] = bed_index
+
+            bed_of[id(bed)] = bed_index
+
+        for i, vegetation in enumerate(self.vegetation):
+            kind = type(vegetation)
+
+            if kind in self.LEVELS:
+                self.levels[i] = getattr(vegetation, self.LEVELS[kind])
+
+            if kind in self.THRESHOLDS:
+                self.thresholds[i] = getattr(vegetation, self.THRESHOLDS[kind])
+
+            self.empties[i] = kind in self.EMPTIES
+
+            if isinstance(vegetation, Hive):
+                self.owners[i] = bed_of.get(id(vegetation.power_bed), -1)
+            else:
+                self.owners[i] = bed_of.get(id(vegetation), -1)
+
+    def index_of(self, entity: any) -> int:
+        """
+        Returns the index of the vegetation (or its uid) in the store, or -1
+        """
+
+        if getattr(entity, '_store', None) is self:
+            return entity._store_index
+
+        return self.indices.get(entity, -1)
+
+    def attach(self, swarm: any) -> None:
+        """
+        Connects the store to the swarm whose boids interact with it
+        """
+
+        self.swarm = swarm
+        self.homes = np.array([self.index_of(getattr(boid, 'home', None))
+                               for boid in swarm.boids], dtype=np.intp)
+
+    def step(self, delta_time: float, contacts: any = None) -> tuple:
+        """
+        Applies every contact between a boid and vegetation for one tick.
+
+        :param delta_time: length of the tick, in seconds
+        :param contacts: Neighbours from boids to the vegetation whose
+                         activation radius they are in; found with `within`
+                         if not given
+        :return: indices of the vegetation that was activated and of the
+                 vegetation that was deactivated during the tick
+        """
+
+        swarm = self.swarm
+
+        if contacts is None:
+            contacts = self.within(swarm.positions, 'activation')
+
+        boids, vegetation = contacts.rows, contacts.indices
+        boid_types = swarm.types[boids]
+
+        flowers = self.kinds[vegetation] == self.kind_codes.get(Flower, -1)
+        spores = self.kinds[vegetation] == self.kind_codes.get(Spore, -1)
+
+        # SwarmBoids pollinate every flower they are close to
+        pollinate = flowers & (boid_types == BoidTypes.SWARM.value)
+
+        self.levels += np.bincount(
+            vegetation[pollinate],
+            weights=swarm.polination_rate[boids[pollinate]] * delta_time,
+            minlength=len(self))
+
+        # HarvesterBoids gather food from active flowers, split evenly over
+        # the flowers they are at, as long as they have room for it
+        harvesters = boid_types == BoidTypes.HARVESTER.value
+        harvest = flowers & harvesters & self.active[vegetation]
+
+        gatherers = boids[harvest]
+        room = np.maximum(swarm.carrying_capacity - swarm.current_food, 0)
+        at_flowers = np.bincount(gatherers, minlength=len(swarm))
+
+        demand = np.minimum(swarm.harvesting_rate[gatherers] * delta_time,
+                            room[gatherers]) / at_flowers[gatherers]
+        taken = _share(demand, vegetation[harvest], self.levels)
+
+        self.levels -= np.bincount(vegetation[harvest], weights=taken,
+                                   minlength=len(self))
+        swarm.current_food += np.bincount(gatherers, weights=taken,
+                                          minlength=len(swarm))
+
+        # HarvesterBoids drop their food off at their own hive
+        deposit = harvesters & (vegetation == self.homes[boids])
+
+        depositors = boids[deposit]
+        dropped = np.minimum(swarm.deposit_rate[depositors] * delta_time,
+                             swarm.current_food[depositors])
+
+        self.levels += np.bincount(vegetation[deposit], weights=dropped,
+                                   minlength=len(self))
+        swarm.current_food -= np.bincount(depositors, weights=dropped,
+                                          minlength=len(swarm))
+
+        # HermitBoids eat from active spores
+        feed = spores & (boid_types == BoidTypes.HERMIT.value) & \
+            self.active[vegetation]
+
+        eaten = _share(swarm.eating_rate[boids[feed]] * delta_time,
+                       vegetation[feed], self.levels)
+
+        self.levels -= np.bincount(vegetation[feed], weights=eaten,
+                                   minlength=len(self))
+
+        np.maximum(self.levels, 0, out=self.levels)
+
+        return self.update_activation()
+
+    def update_activation(self) -> tuple:
+        """
+        Activates the vegetation whose level reached its threshold and
+        deactivates the vegetation that ran empty.
+
+        :return: indices of the activated and of the deactivated vegetation
+        """
+
+        activated = np.flatnonzero(~self.active &
+                                   (self.levels >= self.thresholds))
+        deactivated = np.flatnonzero(self.active & self.empties &
+                                     (self.levels <= 0))
+
+        self.active[activated] = True
+        self.active[deactivated] = False
+
+        return activated, deactivated
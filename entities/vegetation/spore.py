@@ -1,12 +1,19 @@
+from entities.entity import StoreField
 from entities.vegetation.vegetation import Vegetation
 
 
 class Spore(Vegetation):
+    __slots__ = ('_food',)
+
+    # How much food is left for the HermitBoid, backed by the ResourceStore
+    # once the spore has been added to one
+    food = StoreField('levels', 1.0)
+
     def __init__(self,
                  uid: str,
                  position: any) -> None:
 
-        super().__init(uid=uid, 
-                     position=position, 
-                     collision_radius=0.1,
-                     activation_radius=0.2)
+        super().__init__(uid=uid,
+                         position=position,
+                         collision_radius=0.1,
+                         activation_radius=0.2)
@@ -1,14 +1,21 @@
-from entities.entity import Entity
+from entities.entity import Entity, StoreField
 
 
 class Vegetation(Entity):
+    __slots__ = ('_collision_radius', '_activation_radius', '_active')
+
+    # Backed by the VegetationRegistry once the vegetation has been added to one
+    active = StoreField('active', False)
+
     def __init__(self,
                  uid: str,
                  position: any,
                  collision_radius: float,
-                 activation_radius: float = None) -> None:
+                 activation_radius: float = None,
+                 active: bool = False) -> None:
 
-        if self.collision_radius > self.activation_radius:
+        if activation_radius is not None and \
+                collision_radius > activation_radius:
             raise ValueError(
                 "The collision radius cannot be larger than the activation radius.")
 
@@ -17,7 +24,7 @@ class Vegetation(Entity):
         self._collision_radius = collision_radius
         self._activation_radius = activation_radius
 
-        self.active = False
+        self.active = active
 
     @property
     def collision_radius(self) -> float:
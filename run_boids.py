@@ -1,13 +1,66 @@
+import argparse
 import logging
+import sys
 
-from controllers.crazyflieController import CrazyflieController
+from entities.boids import backends
+from entities.boids.controllerGroup import ControllerGroup
+from entities.boids.flightZone import FlightZone
+from entities.boids.levelOfDetail import LevelOfDetail
 from entities.boids.manager import BoidManager
 from entities.boids.standardBoid import StandardBoid
-from controllers.utils.utils import FlightZone
+from entities.boids.transmission import radio_of
 
 logger = logging.getLogger(__name__)
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--backend', choices=sorted(backends.BACKENDS),
+                        help="controller backend, by default the Crazyflies "
+                             "unless --simulated or --replay is given")
+    parser.add_argument('--simulated', type=int, metavar='N', default=0,
+                        help="fly N virtual drones instead of the Crazyflies")
+    parser.add_argument('--radios', type=int, default=1,
+                        help="spread the virtual drones over this many radios")
+    parser.add_argument('--replay', metavar='LOG',
+                        help="replay a telemetry log instead of flying")
+    parser.add_argument('--stream', type=int, metavar='PORT',
+                        help="stream every tick to viewers on this local port")
+    parser.add_argument('--level-of-detail', type=int, metavar='TICKS',
+                        help="let isolated boids flock only every few ticks, "
+                             "at most every TICKS ticks")
+    parser.add_argument('--pose-lead', type=float, metavar='SECONDS',
+                        help="read positions from a cache fed in the "
+                             "background, extrapolated SECONDS past every "
+                             "tick")
+    parser.add_argument('--import-times', action='store_true',
+                        help="report what importing the backend costs, "
+                             "per module, and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    backend = args.backend
+
+    if backend is None:
+        if args.replay:
+            backend = 'replay'
+        elif args.simulated:
+            backend = 'simulated'
+        else:
+            backend = 'crazyflie'
+
+    if args.import_times:
+        times = backends.import_times(['entities.boids.flightZone',
+                                       'entities.boids.manager',
+                                       'entities.boids.standardBoid',
+                                       backends.BACKENDS[backend][0]])
+
+        for module, own, cumulative in times[:25]:
+            logger.info(f"{cumulative * 1000:9.1f}ms {own * 1000:8.1f}ms "
+                        f"{module}")
+
+        sys.exit()
+
     uris = {
         'radio://0/80/2M/E7E7E7E7E0',
         # 'radio://0/80/2M/E7E7E7E7E1',
@@ -20,7 +73,10 @@ if __name__ == '__main__':
         # 'radio://0/80/2M/E7E7E7E7E8',
     }
 
-    logging.basicConfig(level=logging.INFO)
+    if backend == 'simulated':
+        uris = {f'sim://{i % args.radios}/{i}'
+                for i in range(args.simulated or len(uris))}
+
     flight_zone = FlightZone(2.0, 3.0, 1.25, 0.30)
 
     boid_separation = 1
@@ -30,18 +86,66 @@ if __name__ == '__main__':
 
     update_rate = 1.0/60
 
-    drones = [
-        StandardBoid(uri,
-                     flight_zone,
-                     boid_separation,
-                     boid_alignment,
-                     boid_cohesion,
-                     visual_range)
+    # Only the chosen backend is imported
+    Controller = backends.load(backend)
+    logger.info(f"Loaded the {backend} backend in "
+                f"{backends.load_times[backend] * 1000:.1f}ms")
+
+    if backend == 'replay':
+        # The swarm is rebuilt as it was recorded, see below
+        swarmController = Controller(args.replay)
+        flight_zone = FlightZone(**swarmController.flight_zone_fields)
+    else:
+        # One controller per radio, they are read and commanded concurrently
+        radios = {}
+
+        for uri in sorted(uris):
+            radios.setdefault(radio_of(uri), []).append(uri)
 
-        for uri in uris]
+        if backend == 'crazyflie':
+            controllers = [Controller(radio_uris, flight_zone, radio_uris[0])
+                           for radio_uris in radios.values()]
+        else:
+            controllers = [Controller(radio_uris, flight_zone)
+                           for radio_uris in radios.values()]
 
-    with CrazyflieController(uris, flight_zone, 'radio://0/80/2M/E7E7E7E7E0') as swarmController:
+        if len(controllers) == 1:
+            swarmController = controllers[0]
+        else:
+            swarmController = ControllerGroup(controllers,
+                                              list(radios.values()))
+
+    if backend == 'replay':
+        drones = swarmController.boids(flight_zone)
+    else:
+        drones = [
+            StandardBoid(uri,
+                         flight_zone,
+                         boid_separation,
+                         boid_alignment,
+                         boid_cohesion,
+                         visual_range)
+
+            for uri in uris]
+
+    with swarmController:
         boidManager = BoidManager(
-            update_rate, swarmController, flight_zone, drones)
+            update_rate, swarmController, flight_zone, drones,
+            stream=None if args.stream is None else ('127.0.0.1', args.stream),
+            level_of_detail=None if args.level_of_detail is None
+            else LevelOfDetail(max_interval=args.level_of_detail),
+            pose_cache=args.pose_lead,
+            pose_clock=swarmController.clock if backend == 'replay' else None)
+
+        try:
+            if backend == 'replay':
+                deviations = swarmController.replay(boidManager)
 
-        boidManager.boid_loop()
+                logger.info(f"Replayed {len(deviations)} ticks, largest "
+                            f"deviation from the recorded velocities: "
+                            f"{max(deviations, default=0.0)}")
+            else:
+                boidManager.boid_loop()
+        finally:
+            # Also closes the telemetry log and stream
+            boidManager.close()
@@ -0,0 +1,185 @@
+import logging
+
+import numpy as np
+from entities.boids.boid import Boid
+from entities.boids.harvesterBoid import HarvesterBoid
+from entities.boids.hermitBoid import HermitBoid
+from entities.boids.standardBoid import StandardBoid
+from entities.boids.swarmBoid import SwarmBoid
+from entities.boids.swarmState import SwarmState
+from entities.boids.telemetry import TelemetryLog
+
+logger = logging.getLogger(__name__)
+
+"""
+Controller that plays back a telemetry log.
+
+Every read of the positions returns the positions ingested in the next
+recorded tick, and the velocities the control loop commands in reply are
+compared with the ones that were recorded, so a change to the rules can be
+checked against real flight data.
+"""
+
+
+# BoidTypes name in the log header -> makes a boid of that type; its
+# parameters are overwritten from the header
+BOID_FACTORIES = {
+    'UNDEFINED': lambda uid, flight_zone: Boid(uid, flight_zone, 1),
+    'STANDARD': lambda uid, flight_zone: StandardBoid(uid, flight_zone,
+                                                      1, 0, 0, 0),
+    'HARVESTER': lambda uid, flight_zone: HarvesterBoid(uid, flight_zone,
+                                                        None),
+    'SWARM': lambda uid, flight_zone: SwarmBoid(uid, flight_zone, None),
+    'HERMIT': lambda uid, flight_zone: HermitBoid(uid, flight_zone),
+}
+
+
+class ReplayController:
+    PHYSICAL = False
+
+    def __init__(self, path: str) -> None:
+        """
+        :param path: telemetry log written by a TelemetryRecorder
+        """
+
+        self.log = TelemetryLog(path)
+
+        self.uris = self.log.uids
+        self.indices = {uri: i for i, uri in enumerate(self.uris)}
+
+        # Index of the tick whose positions were read last
+        self.tick = -1
+
+        self.commanded_velocities = np.zeros((len(self.uris), 3))
+        self.yaw_rate = 0.0
+
+        # Largest difference between the commanded and the recorded
+        # velocities, per replayed tick
+        self.deviations = []
+
+    def __enter__(self) -> 'ReplayController':
+        logger.info(f"Replaying {len(self.log)} ticks of "
+                    f"{len(self.uris)} drones")
+
+        return self
+
+    def __exit__(self, *args) -> None:
+        pass
+
+    @property
+    def flight_zone_fields(self) -> dict:
+        """
+        Dimensions of the recorded flight zone, the fields of a FlightZone
+        """
+
+        return self.log.header['flight_zone']
+
+    def boids(self, flight_zone: any) -> list:
+        """
+        Builds the recorded swarm: a boid of the recorded type for every
+        uri, with the recorded parameters and initial velocity
+        """
+
+        log = self.log
+
+        # Column in the header -> attribute of the boid
+        attributes = {column: attribute for attribute, (column, _)
+                      in SwarmState.COLUMNS.items()}
+
+        boids = []
+
+        for i, (uri, boid_type) in enumerate(zip(self.uris, log.types)):
+            if boid_type not in BOID_FACTORIES:
+                raise ValueError(f"Cannot replay boids of type {boid_type}")
+
+            boid = BOID_FACTORIES[boid_type](uri, flight_zone)
+
+            for column, values in log.parameters.items():
+                setattr(boid, attributes[column], values[i])
+
+            boid.velocity = log.initial_velocities[i]
+
+            boids.append(boid)
+
+        return boids
+
+    @property
+    def finished(self) -> bool:
+        return self.tick + 1 >= len(self.log)
+
+    @property
+    def delta_time(self) -> float:
+        """
+        delta_time of the next tick
+        """
+
+        return float(self.log.delta_times[self.tick + 1])
+
+    def clock(self) -> float:
+        """
+        Recorded time of the tick read last, in seconds; the clock to use
+        for anything timed during a replay, e.g. a PoseCache
+        """
+
+        return float(self.log.timestamps[max(self.tick, 0)])
+
+    @property
+    def positions(self) -> dict:
+        """
+        Positions per uri of the next recorded tick
+        """
+
+        if self.finished:
+            raise EOFError("The whole log has been replayed")
+
+        self.tick += 1
+
+        positions = self.log.positions[self.tick]
+
+        return {uri: positions[i] for i, uri in enumerate(self.uris)}
+
+    def set_swarm_velocities(self, velocities: dict, yaw_rate: float) -> None:
+        for uri, velocity in velocities.items():
+            self.commanded_velocities[self.indices[uri]] = velocity
+
+        self.yaw_rate = yaw_rate
+
+        recorded = self.log.velocities[self.tick]
+
+        self.deviations.append(
+            float(np.abs(self.commanded_velocities - recorded).max(initial=0)))
+
+    def swarm_move(self,
+                   positions: dict,
+                   yaw: float,
+                   time_to_move: float | None = None,
+                   relative: bool = False) -> None:
+        """
+        The recorded drones cannot be moved, the request is only logged
+        """
+
+        logger.warning(f"Ignoring swarm_move of {len(positions)} drones "
+                       f"during replay")
+
+    def replay(self, manager: any) -> list:
+        """
+        Runs the manager's tick for every recorded tick, with the recorded
+        delta_time, and returns the deviations.
+
+        Before every tick the swarm gets the velocities it had in the
+        recording, so every tick is compared on the recorded inputs alone
+        and a deviation does not carry over into the following ticks.
+        """
+
+        swarm = manager.swarm
+        rows = [swarm.indices[uri] for uri in self.uris]
+
+        while not self.finished:
+            if self.tick < 0:
+                swarm.velocities[rows] = self.log.initial_velocities
+            else:
+                swarm.velocities[rows] = self.log.velocities[self.tick]
+
+            manager.tick(self.delta_time)
+
+        return self.deviations
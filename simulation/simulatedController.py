@@ -0,0 +1,147 @@
+import logging
+import time
+
+import numpy as np
+from numpy.random import default_rng
+
+logger = logging.getLogger(__name__)
+
+"""
+Headless stand-in for the Crazyflie controller.
+
+Integrates the commanded velocities with a simple kinematic model inside the
+flight zone, so the control loop can run without any radios.
+"""
+
+
+class SimulatedController:
+    PHYSICAL = False
+
+    def __init__(self,
+                 uris: any,
+                 flight_zone: any,
+                 initial_positions: dict | None = None,
+                 response_time: float = 0.1,
+                 realtime: bool = True,
+                 seed: int | None = None) -> None:
+        """
+        :param uris: uris of the virtual drones
+        :param flight_zone: dimensions of the flight zone
+        :param initial_positions: starting position per uri; random positions
+                                  inside the flight zone are used otherwise
+        :param response_time: time constant with which the drones reach the
+                              commanded velocity
+        :param realtime: advance the simulation by the wall-clock time between
+                         reads of the positions; otherwise only step() moves it
+        :param seed: seed for the random starting positions
+        """
+
+        self.uris = sorted(uris)
+        self.indices = {uri: i for i, uri in enumerate(self.uris)}
+
+        self.flight_zone = flight_zone
+        self.response_time = response_time
+        self.realtime = realtime
+
+        self.lower = np.array([-flight_zone.x/2,
+                               -flight_zone.y/2,
+                               flight_zone.floor_offset])
+        self.upper = np.array([flight_zone.x/2,
+                               flight_zone.y/2,
+                               flight_zone.z + flight_zone.floor_offset])
+
+        size = len(self.uris)
+
+        if initial_positions is None:
+            rng = default_rng(seed)
+            self._positions = self.lower + \
+                rng.random((size, 3)) * (self.upper - self.lower)
+        else:
+            self._positions = np.array([initial_positions[uri]
+                                        for uri in self.uris], dtype=np.float64)
+
+        # Handed out by positions, the rows stay views onto the state
+        self._position_rows = {uri: self._positions[i]
+                               for i, uri in enumerate(self.uris)}
+
+        self._velocities = np.zeros((size, 3))
+        self._commanded_velocities = np.zeros((size, 3))
+
+        self.yaw_rate = 0.0
+        self.simulated_time = 0.0
+
+        self._last_step = None
+
+    def __enter__(self) -> 'SimulatedController':
+        logger.info(f"Simulating {len(self.uris)} drones")
+
+        self._last_step = time.monotonic()
+
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._commanded_velocities[:] = 0
+        self._velocities[:] = 0
+
+    @property
+    def positions(self) -> dict:
+        """
+        Current position per uri, as views onto the simulation state
+        """
+
+        if self.realtime:
+            now = time.monotonic()
+
+            if self._last_step is not None:
+                self.step(now - self._last_step)
+
+            self._last_step = now
+
+        return self._position_rows
+
+    def set_swarm_velocities(self, velocities: dict, yaw_rate: float) -> None:
+        for uri, velocity in velocities.items():
+            self._commanded_velocities[self.indices[uri]] = velocity
+
+        self.yaw_rate = yaw_rate
+
+    def swarm_move(self,
+                   positions: dict,
+                   yaw: float,
+                   time_to_move: float | None = None,
+                   relative: bool = False) -> None:
+        """
+        Moves the drones to the given positions instantly
+        """
+
+        for uri, position in positions.items():
+            i = self.indices[uri]
+
+            if relative:
+                self._positions[i] += position
+            else:
+                self._positions[i] = position
+
+            self._velocities[i] = 0
+            self._commanded_velocities[i] = 0
+
+        np.clip(self._positions, self.lower, self.upper, out=self._positions)
+
+    def step(self, delta_time: float) -> None:
+        """
+        Advances the simulation by delta_time seconds
+        """
+
+        response = min(delta_time / self.response_time, 1.0)
+
+        self._velocities += (self._commanded_velocities -
+                             self._velocities) * response
+        self._positions += self._velocities * delta_time
+
+        # The drones cannot leave the flight zone, stop them at the edges
+        outside = (self._positions < self.lower) | \
+            (self._positions > self.upper)
+        self._velocities[outside] = 0
+        np.clip(self._positions, self.lower, self.upper, out=self._positions)
+
+        self.simulated_time += delta_time
@@ -0,0 +1,239 @@
+import argparse
+import csv
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from entities.boids.flightZone import FlightZone
+from entities.boids.manager import BoidManager
+from entities.boids.spatialIndex import kd_tree
+from entities.boids.standardBoid import StandardBoid
+from numpy.random import default_rng
+from simulation.simulatedController import SimulatedController
+
+logger = logging.getLogger(__name__)
+
+"""
+Sweeps the boid parameters over many headless simulations.
+
+Every run flies StandardBoids through the BoidManager against a
+SimulatedController, one tick after the other without waiting for the wall
+clock, and is seeded so it can be repeated. The runs are spread over a
+process pool. Run from the repository root:
+
+    python -m simulation.sweep --separation 0.5 1 2 --cohesion 0.05 0.1 \
+        --seeds 5 --output sweep.csv
+"""
+
+# Parameters of run_boids.py, used for everything that is not swept
+DEFAULTS = {
+    'boids': 9,
+    'separation': 1.0,
+    'alignment': 0.1,
+    'cohesion': 0.1,
+    'visual_range': 1.0,
+    'flight_zone': (2.0, 3.0, 1.25, 0.30),
+    'update_rate': 1.0/60,
+    'duration': 30.0,
+    'seed': 0,
+}
+
+SWEPT = ('separation', 'alignment', 'cohesion', 'visual_range')
+
+
+def grid(seeds: int = 1, **values: list) -> list:
+    """
+    Every combination of the given parameter values, each with `seeds`
+    different seeds
+    """
+
+    names = list(values)
+    configs = []
+
+    for combination in itertools.product(*values.values()):
+        for seed in range(seeds):
+            configs.append({**dict(zip(names, combination)), 'seed': seed})
+
+    return configs
+
+
+def polarization(velocities: any) -> float:
+    """
+    Length of the mean heading of the boids: 1 if they all fly the same
+    way, close to 0 if their headings cancel out
+    """
+
+    speed = np.linalg.norm(velocities, axis=1)
+    moving = speed > 0
+
+    if not moving.any():
+        return 0.0
+
+    headings = velocities[moving] / speed[moving, np.newaxis]
+
+    return float(np.linalg.norm(headings.mean(axis=0)))
+
+
+def simulate(config: dict) -> dict:
+    """
+    Runs one simulation and summarises it
+    """
+
+    config = {**DEFAULTS, **config}
+
+    flight_zone = FlightZone(*config['flight_zone'])
+    update_rate = config['update_rate']
+    ticks = int(round(config['duration'] / update_rate))
+
+    uris = [f'sim://{i}' for i in range(config['boids'])]
+
+    # One stream for the starting positions, one for the boids
+    controller_seed, boid_seed = np.random.SeedSequence(
+        config['seed']).spawn(2)
+
+    controller = SimulatedController(uris, flight_zone, realtime=False,
+                                     seed=controller_seed)
+
+    rng = default_rng(boid_seed)
+    boids = [StandardBoid(uri,
+                          flight_zone,
+                          config['separation'],
+                          config['alignment'],
+                          config['cohesion'],
+                          config['visual_range'],
+                          rng)
+             for uri in controller.uris]
+
+    manager = BoidManager(update_rate, controller, flight_zone, boids)
+
+    lower = controller.lower
+    upper = controller.upper
+
+    tick_times = np.empty(ticks)
+    min_distance = np.inf
+    violations = 0
+    polarizations = np.empty(ticks)
+
+    with controller:
+        for tick in range(ticks):
+            start = time.perf_counter()
+            manager.tick(update_rate)
+            tick_times[tick] = time.perf_counter() - start
+
+            controller.step(update_rate)
+
+            positions = manager.swarm.positions
+
+            if len(positions) > 1:
+                distances, _ = kd_tree(positions).query(positions, k=2)
+                min_distance = min(min_distance, distances[:, 1].min())
+
+            # The simulated drones are stopped at the edge of the flight zone
+            violations += int(np.count_nonzero(
+                ((positions <= lower) | (positions >= upper)).any(axis=1)))
+
+            polarizations[tick] = polarization(manager.swarm.velocities)
+
+    manager.close()
+
+    return {
+        **{name: config[name] for name in SWEPT},
+        'boids': config['boids'],
+        'seed': config['seed'],
+        'ticks': ticks,
+        'min_distance': float(min_distance),
+        'boundary_violations': violations,
+        'polarization_mean': float(polarizations.mean()),
+        'polarization_final': float(polarizations[-1]),
+        'tick_time_mean': float(tick_times.mean()),
+        'tick_time_p99': float(np.percentile(tick_times, 99)),
+    }
+
+
+def warm_up() -> None:
+    """
+    Imports what the boids import lazily (scipy for the k-d tree), so it is
+    not counted in the tick times of the first run in a process
+    """
+
+    kd_tree(np.zeros((2, 3)))
+
+
+def sweep(configs: list, workers: int | None = None) -> list:
+    """
+    Runs simulate for every config on a pool of `workers` processes, by
+    default one per core; the results are in the order of the configs
+    """
+
+    workers = workers or os.cpu_count()
+
+    if workers == 1:
+        warm_up()
+
+        return [simulate(config) for config in configs]
+
+    chunksize = max(1, len(configs) // (workers * 4))
+
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=warm_up) as pool:
+        return list(pool.map(simulate, configs, chunksize=chunksize))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+
+    for name in SWEPT:
+        parser.add_argument(f"--{name.replace('_', '-')}", nargs='+',
+                            type=float, default=[DEFAULTS[name]])
+
+    parser.add_argument('--boids', type=int, default=DEFAULTS['boids'])
+    parser.add_argument('--duration', type=float, default=DEFAULTS['duration'],
+                        help="simulated seconds per run")
+    parser.add_argument('--update-rate', type=float,
+                        default=DEFAULTS['update_rate'])
+    parser.add_argument('--seeds', type=int, default=1,
+                        help="runs per combination, with seeds 0..SEEDS-1")
+    parser.add_argument('--workers', type=int,
+                        help="processes to run on, by default one per core")
+    parser.add_argument('--output',
+                        help="write the results here, as CSV if the name "
+                             "ends in .csv and as JSON otherwise")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    # Every run would announce its drones
+    logging.getLogger('simulation.simulatedController').setLevel(
+        logging.WARNING)
+
+    configs = grid(args.seeds, **{name: getattr(args, name)
+                                  for name in SWEPT})
+
+    for config in configs:
+        config.update(boids=args.boids,
+                      duration=args.duration,
+                      update_rate=args.update_rate)
+
+    start = time.perf_counter()
+    results = sweep(configs, args.workers)
+    elapsed = time.perf_counter() - start
+
+    simulated = sum(result['ticks'] for result in results) * args.update_rate
+    logger.info(f"{len(results)} runs in {elapsed:.1f}s, "
+                f"{simulated / elapsed:.0f}x real time")
+
+    if args.output and args.output.endswith('.csv'):
+        with open(args.output, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
+    elif args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
@@ -0,0 +1,101 @@
+import math
+import tracemalloc
+
+import numpy as np
+from entities.boids.flightZone import FlightZone
+from entities.boids.instrumentation import Instrumentation
+from entities.boids.manager import BoidManager
+from entities.boids.standardBoid import StandardBoid
+from simulation.simulatedController import SimulatedController
+
+"""
+Checks that a steady-state tick of the in-place mode allocates the same for
+a larger swarm, see benchmarks/tickAllocations.py.
+"""
+
+UPDATE_RATE = 1.0 / 60
+
+# Bytes a tick may allocate more for the larger swarm
+SLACK = 4096
+
+
+def make_manager(size: int, **kwargs) -> tuple:
+    # Two boids per square meter of floor
+    side = math.sqrt(size / 2.0)
+    flight_zone = FlightZone(side, side, 1.25, 0.30)
+
+    uris = [f'sim://{i}' for i in range(size)]
+    boids = [StandardBoid(uri, flight_zone, 1, 0.1, 0.1, 1, i)
+             for i, uri in enumerate(uris)]
+
+    controller = SimulatedController(uris, flight_zone, realtime=False,
+                                     seed=0)
+    manager = BoidManager(UPDATE_RATE, controller, flight_zone, boids,
+                          skin=0.3, in_place=True, **kwargs)
+
+    return controller, manager
+
+
+def steady_peak(size: int, ticks: int = 30, warmup: int = 10) -> int:
+    """
+    Largest allocation peak of the ticks that did not rebuild the neighbour
+    candidates
+    """
+
+    controller, manager = make_manager(size)
+
+    def rebuilds() -> int:
+        return sum(verlet.rebuilds
+                   for verlet in manager.swarm.verlet_lists.values())
+
+    for _ in range(warmup):
+        manager.tick(UPDATE_RATE)
+        controller.step(UPDATE_RATE)
+
+    peaks = []
+
+    tracemalloc.start()
+
+    try:
+        for _ in range(ticks):
+            before = rebuilds()
+
+            tracemalloc.reset_peak()
+            start = tracemalloc.get_traced_memory()[0]
+
+            manager.tick(UPDATE_RATE)
+
+            if rebuilds() == before:
+                peaks.append(tracemalloc.get_traced_memory()[1] - start)
+
+            controller.step(UPDATE_RATE)
+    finally:
+        tracemalloc.stop()
+        manager.close()
+
+    assert peaks, "Every tick rebuilt the neighbour candidates"
+
+    return max(peaks)
+
+
+def test_in_place_tick_allocations_do_not_grow_with_the_swarm() -> None:
+    # Both past np.getbufsize(), up to which NumPy's ufunc buffers grow
+    smaller = steady_peak(4000)
+    larger = steady_peak(16000)
+
+    assert larger - smaller <= SLACK
+
+
+def test_instrumentation_keeps_its_own_neighbour_counts() -> None:
+    instrumentation = Instrumentation(capacity=8)
+    controller, manager = make_manager(200, instrumentation=instrumentation)
+
+    manager.tick(UPDATE_RATE)
+
+    # The in-place counts are a buffer that the next tick overwrites
+    counts = manager.swarm.detected.count()
+
+    assert np.array_equal(instrumentation.neighbour_counts, counts)
+    assert not np.shares_memory(instrumentation.neighbour_counts, counts)
+
+    manager.close()
@@ -0,0 +1,135 @@
+import threading
+
+import numpy as np
+import pytest
+from entities.boids.controllerGroup import ControllerGroup
+from entities.boids.flightZone import FlightZone
+from entities.boids.manager import BoidManager
+from entities.boids.standardBoid import StandardBoid
+
+"""
+Checks that ControllerGroup splits the commands by owner, merges the
+positions, talks to its controllers concurrently and enters and exits them.
+"""
+
+FLIGHT_ZONE = FlightZone(3.0, 3.0, 1.25, 0.3)
+
+
+class FakeController:
+    """
+    Controller of a few drones that records what it was told; every call
+    can be made to wait at a barrier shared with other controllers
+    """
+
+    PHYSICAL = False
+
+    def __init__(self,
+                 uris: list,
+                 barrier: threading.Barrier | None = None,
+                 fail_on_enter: bool = False) -> None:
+        self.uris = uris
+        self.barrier = barrier
+        self.fail_on_enter = fail_on_enter
+
+        self.commands = []
+        self.entered = False
+        self.exited = False
+
+    def __enter__(self) -> 'FakeController':
+        if self.fail_on_enter:
+            raise ConnectionError("no radio")
+
+        self.entered = True
+
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.exited = True
+
+    def _wait(self) -> None:
+        if self.barrier is not None:
+            self.barrier.wait()
+
+    @property
+    def positions(self) -> dict:
+        self._wait()
+
+        return {uri: np.full(3, float(uri[-1])) for uri in self.uris}
+
+    def set_swarm_velocities(self, velocities: dict, yaw_rate: float) -> None:
+        self._wait()
+        self.commands.append((velocities, yaw_rate))
+
+
+def test_commands_go_to_the_owners_only() -> None:
+    a = FakeController(['sim://0/0', 'sim://0/1'])
+    b = FakeController(['sim://1/2'])
+    group = ControllerGroup([a, b])
+
+    group.set_swarm_velocities({'sim://0/1': np.ones(3)}, 0.5)
+
+    assert list(a.commands[0][0]) == ['sim://0/1']
+    assert a.commands[0][1] == 0.5
+    assert b.commands == []
+
+
+def test_positions_are_merged() -> None:
+    group = ControllerGroup([FakeController(['sim://0/0', 'sim://0/1']),
+                             FakeController(['sim://1/2'])])
+
+    positions = group.positions
+
+    assert sorted(positions) == group.uris
+    np.testing.assert_array_equal(positions['sim://1/2'], [2.0, 2.0, 2.0])
+
+
+def test_a_uri_cannot_have_two_owners() -> None:
+    with pytest.raises(ValueError):
+        ControllerGroup([FakeController(['sim://0/0']),
+                         FakeController(['sim://0/0'])])
+
+
+def test_an_entered_group_talks_to_its_controllers_concurrently() -> None:
+    # Both controllers have to be inside the call at the same time
+    barrier = threading.Barrier(2, timeout=1.0)
+    a = FakeController(['sim://0/0'], barrier)
+    b = FakeController(['sim://1/1'], barrier)
+
+    with ControllerGroup([a, b]) as group:
+        group.positions
+        group.set_swarm_velocities({'sim://0/0': np.zeros(3),
+                                    'sim://1/1': np.zeros(3)}, 0.0)
+
+    assert len(a.commands) == len(b.commands) == 1
+    assert a.exited and b.exited
+
+
+def test_a_failed_enter_exits_the_controllers_entered() -> None:
+    a = FakeController(['sim://0/0'])
+    b = FakeController(['sim://1/1'], fail_on_enter=True)
+    group = ControllerGroup([a, b])
+
+    with pytest.raises(ConnectionError):
+        group.__enter__()
+
+    assert a.entered and a.exited
+
+    # Nothing is left to exit
+    group.__exit__(None, None, None)
+
+
+def test_the_manager_enters_a_list_of_controllers() -> None:
+    a = FakeController(['sim://0/0', 'sim://0/1'])
+    b = FakeController(['sim://1/2'])
+    boids = [StandardBoid(uri, FLIGHT_ZONE, 1, 0.1, 0.1, 1, i)
+             for i, uri in enumerate(a.uris + b.uris)]
+
+    manager = BoidManager(1.0 / 60, [a, b], FLIGHT_ZONE, boids)
+
+    assert a.entered and b.entered
+
+    manager.tick(1.0 / 60)
+    manager.close()
+
+    assert a.exited and b.exited
+    assert list(b.commands[0][0]) == ['sim://1/2']
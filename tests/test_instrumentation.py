@@ -0,0 +1,51 @@
+import numpy as np
+from entities.boids.flightZone import FlightZone
+from entities.boids.instrumentation import Instrumentation
+from entities.boids.manager import BoidManager
+from entities.boids.standardBoid import StandardBoid
+from simulation.simulatedController import SimulatedController
+
+"""
+Checks that the rule calls of the per-boid update are counted for the
+manager that runs them only.
+"""
+
+FLIGHT_ZONE = FlightZone(2.0, 2.0, 1.25, 0.3)
+
+UPDATE_RATE = 1.0 / 60
+
+
+def make_manager(size: int, **kwargs) -> tuple:
+    uris = [f'sim://{i}' for i in range(size)]
+    boids = [StandardBoid(uri, FLIGHT_ZONE, 1, 0.1, 0.1, 1, i)
+             for i, uri in enumerate(uris)]
+
+    controller = SimulatedController(uris, FLIGHT_ZONE, realtime=False,
+                                     seed=0)
+    manager = BoidManager(UPDATE_RATE, controller, FLIGHT_ZONE, boids,
+                          vectorized=False, **kwargs)
+
+    return controller, manager
+
+
+def test_managers_count_only_their_own_rule_calls() -> None:
+    instrumentation = Instrumentation(capacity=4)
+    _, counted = make_manager(3, instrumentation=instrumentation)
+    _, plain = make_manager(5)
+
+    try:
+        counted.tick(UPDATE_RATE)
+        plain.tick(UPDATE_RATE)
+        plain.tick(UPDATE_RATE)
+    finally:
+        counted.close()
+        plain.close()
+
+    records = instrumentation.snapshot()
+
+    # One tick of three boids, every rule once per boid
+    assert len(records) == 1
+    np.testing.assert_array_equal(records['calls_limit_velocity'], [3])
+    np.testing.assert_array_equal(records['calls_fly_towards_center'], [3])
+
+    assert all(boid.instrumentation is None for boid in plain.boids)
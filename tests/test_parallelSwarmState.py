@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from entities.boids.flightZone import FlightZone
+from entities.boids.manager import BoidManager
+from entities.boids.parallelSwarmState import ParallelSwarmState
+from entities.boids.standardBoid import StandardBoid
+from entities.boids.swarmState import SwarmState
+from simulation.simulatedController import SimulatedController
+
+"""
+Checks that ParallelSwarmState updates the swarm as SwarmState does.
+"""
+
+FLIGHT_ZONE = FlightZone(3.0, 3.0, 1.5, 0.3)
+
+DELTA_TIME = 1.0 / 60
+
+
+def make_boids(size: int, seed: int) -> list:
+    rng = np.random.default_rng(seed)
+
+    boids = [StandardBoid(f'b{i}', FLIGHT_ZONE, 1.0, 0.1, 0.1, 1.0, rng)
+             for i in range(size)]
+
+    for boid in boids:
+        boid.position = rng.uniform([-1.5, -1.5, 0.3], [1.5, 1.5, 1.8])
+        boid.velocity = rng.normal(scale=0.1, size=3)
+
+    return boids
+
+
+def test_parallel_update_matches_the_serial_one() -> None:
+    serial = SwarmState(make_boids(40, 3), FLIGHT_ZONE)
+    parallel = ParallelSwarmState(make_boids(40, 3), FLIGHT_ZONE, workers=2)
+
+    try:
+        # Every worker was started and attached by the constructor
+        assert len(parallel.pool._processes) == 2
+
+        for _ in range(3):
+            serial.step(DELTA_TIME)
+            parallel.step(DELTA_TIME)
+
+            np.testing.assert_allclose(parallel.velocities,
+                                       serial.velocities)
+    finally:
+        parallel.release()
+
+
+def test_workers_cannot_be_combined_with_in_place() -> None:
+    boids = make_boids(4, 0)
+    uris = [boid.uid for boid in boids]
+    controller = SimulatedController(uris, FLIGHT_ZONE, realtime=False)
+
+    with pytest.raises(ValueError):
+        BoidManager(DELTA_TIME, controller, FLIGHT_ZONE, boids, workers=2,
+                    skin=0.3, in_place=True)
@@ -0,0 +1,109 @@
+import threading
+
+import numpy as np
+import pytest
+from entities.boids.pipeline import PipelinedController
+
+"""
+Checks that PipelinedController hands on positions and commands, and raises
+the errors of its threads on the main thread.
+"""
+
+UIDS = ['sim://0', 'sim://1']
+
+
+class FakeController:
+    """
+    Controller that fails once told to, on reads or on commands
+    """
+
+    PHYSICAL = False
+
+    def __init__(self) -> None:
+        self.sent = []
+        self.sent_event = threading.Event()
+
+        self.read_error = None
+        self.send_error = None
+
+    @property
+    def positions(self) -> dict:
+        if self.read_error is not None:
+            raise self.read_error
+
+        return {uid: np.full(3, float(i)) for i, uid in enumerate(UIDS)}
+
+    def set_swarm_velocities(self, velocities: dict, yaw_rate: float) -> None:
+        if self.send_error is not None:
+            raise self.send_error
+
+        self.sent.append((velocities, yaw_rate))
+        self.sent_event.set()
+
+
+def test_positions_and_commands_pass_through() -> None:
+    controller = FakeController()
+
+    with PipelinedController(controller, max_staleness=0.5) as pipeline:
+        positions = pipeline.positions
+
+        velocities = {uid: np.ones(3) for uid in UIDS}
+        pipeline.set_swarm_velocities(velocities, 0.0)
+
+        # The pipeline keeps its own copy of the commands
+        velocities[UIDS[0]][:] = 5.0
+
+        assert controller.sent_event.wait(1.0)
+
+    np.testing.assert_array_equal(positions[UIDS[1]], [1.0, 1.0, 1.0])
+
+    sent, yaw_rate = controller.sent[0]
+    np.testing.assert_array_equal(sent[UIDS[0]], [1.0, 1.0, 1.0])
+    assert yaw_rate == 0.0
+
+
+def test_a_failed_read_is_raised_by_positions() -> None:
+    controller = FakeController()
+    controller.read_error = ConnectionError("radio lost")
+
+    pipeline = PipelinedController(controller, max_staleness=0.5,
+                                   timeout=5.0)
+
+    with pipeline:
+        # Raised long before the timeout
+        with pytest.raises(ConnectionError, match="radio lost"):
+            pipeline.positions
+
+        with pytest.raises(ConnectionError):
+            pipeline.set_swarm_velocities({UIDS[0]: np.zeros(3)}, 0.0)
+
+
+def test_a_failed_command_is_raised_by_the_next_call() -> None:
+    controller = FakeController()
+    controller.send_error = ConnectionError("radio lost")
+
+    pipeline = PipelinedController(controller, max_staleness=0.5)
+    pipeline.start()
+
+    pipeline.set_swarm_velocities({UIDS[0]: np.zeros(3)}, 0.0)
+
+    for thread in pipeline._threads:
+        thread.join(1.0)
+
+    with pytest.raises(ConnectionError, match="radio lost"):
+        pipeline.set_swarm_velocities({UIDS[0]: np.zeros(3)}, 0.0)
+
+    # Stopping does not try to send to the failed controller again
+    pipeline.stop()
+
+    assert controller.sent == []
+
+
+def test_positions_time_out_without_fresh_samples() -> None:
+    controller = FakeController()
+    pipeline = PipelinedController(controller, max_staleness=0.5,
+                                   timeout=0.05)
+
+    # Never started, so no sample ever arrives
+    with pytest.raises(TimeoutError):
+        pipeline.positions
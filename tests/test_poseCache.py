@@ -0,0 +1,129 @@
+import numpy as np
+import pytest
+from entities.boids.poseCache import PoseCache
+
+"""
+Checks the extrapolation of PoseCache on explicit timestamps and a fake
+clock.
+"""
+
+URIS = ['sim://0/0', 'sim://0/1']
+
+# Metres per second of the two drones
+VELOCITIES = {'sim://0/0': np.array([1.0, 0.0, 0.0]),
+              'sim://0/1': np.array([0.0, -0.5, 0.25])}
+
+
+class FakeClock:
+    """
+    Clock that only moves when it is set
+    """
+
+    def __init__(self) -> None:
+        self.now = 50.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeController:
+    """
+    Controller that reports fixed positions when read and never calls back
+    """
+
+    PHYSICAL = False
+
+    def __init__(self, positions: dict) -> None:
+        self.positions = positions
+        self.callbacks = []
+
+    def add_position_callback(self, callback: any) -> None:
+        self.callbacks.append(callback)
+
+    def remove_position_callback(self, callback: any) -> None:
+        self.callbacks.remove(callback)
+
+
+def make_cache(**kwargs) -> tuple:
+    clock = FakeClock()
+    controller = FakeController({uri: np.ones(3) for uri in URIS})
+    cache = PoseCache(controller, URIS, clock=clock, **kwargs)
+
+    return clock, cache
+
+
+def record_track(cache: PoseCache, start: float, samples: int,
+                 interval: float) -> None:
+    """
+    Records `samples` positions of every drone moving at constant velocity,
+    the first one at `start`
+    """
+
+    for k in range(samples):
+        timestamp = start + k * interval
+
+        for uri in URIS:
+            cache.record(uri, VELOCITIES[uri] * (timestamp - start),
+                         timestamp)
+
+
+def test_predict_extrapolates_to_an_explicit_time() -> None:
+    clock, cache = make_cache(depth=4)
+    record_track(cache, 10.0, 6, 0.01)
+
+    # Newest sample at 10.05, predicted 20 ms later
+    cache.predict(at=10.07)
+
+    for i, uri in enumerate(URIS):
+        np.testing.assert_allclose(cache.velocities[uri], VELOCITIES[uri])
+        np.testing.assert_allclose(cache._predicted[i],
+                                   VELOCITIES[uri] * 0.07)
+
+    assert cache.max_age == pytest.approx(0.02)
+
+
+def test_extrapolation_is_capped_at_max_extrapolation() -> None:
+    clock, cache = make_cache(max_extrapolation=0.05)
+    record_track(cache, 10.0, 3, 0.01)
+
+    cache.predict(at=11.0)
+
+    for i, uri in enumerate(URIS):
+        np.testing.assert_allclose(cache._predicted[i],
+                                   VELOCITIES[uri] * (0.02 + 0.05))
+
+
+def test_lead_is_added_to_the_clock() -> None:
+    clock, cache = make_cache(lead=0.03)
+    record_track(cache, clock.now, 3, 0.01)
+    clock.now += 0.02
+
+    with cache:
+        positions = cache.positions
+
+    for uri in URIS:
+        np.testing.assert_allclose(positions[uri], VELOCITIES[uri] * 0.05)
+
+
+def test_no_extrapolation_without_lead() -> None:
+    clock, cache = make_cache()
+    record_track(cache, clock.now - 0.1, 3, 0.01)
+
+    with cache:
+        positions = cache.positions
+
+    for uri in URIS:
+        np.testing.assert_allclose(positions[uri], VELOCITIES[uri] * 0.02)
+
+    assert cache.controller.callbacks == []
+
+
+def test_an_unstarted_cache_reads_the_controller() -> None:
+    clock, cache = make_cache(lead=0.05)
+
+    # A single sample per drone, no velocity can be fitted
+    positions = cache.positions
+
+    for uri in URIS:
+        np.testing.assert_array_equal(cache.velocities[uri], 0)
+        np.testing.assert_allclose(positions[uri], 1.0)
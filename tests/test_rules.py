@@ -0,0 +1,154 @@
+import numpy as np
+import pytest
+from entities.boids.flightZone import FlightZone
+from entities.boids.harvesterBoid import HarvesterBoid
+from entities.boids.levelOfDetail import LevelOfDetail
+from entities.boids.standardBoid import StandardBoid
+from entities.boids.swarmState import SwarmState
+
+"""
+Checks that the batched rules of SwarmState.update give the same velocities
+as the per-boid rules.
+"""
+
+FLIGHT_ZONE = FlightZone(4.0, 4.0, 1.5, 0.3)
+
+DELTA_TIME = 1.0 / 60
+
+
+def make_swarm(size: int, seed: int, **kwargs) -> SwarmState:
+    """
+    A seeded swarm of standard and harvester boids packed densely enough
+    that every rule has something to do
+    """
+
+    rng = np.random.default_rng(seed)
+
+    boids = [HarvesterBoid(f'b{i}', FLIGHT_ZONE, None, rng) if i % 4 == 0 else
+             StandardBoid(f'b{i}', FLIGHT_ZONE, 1.0, 0.1, 0.1, 1.0, rng)
+             for i in range(size)]
+
+    swarm = SwarmState(boids, FLIGHT_ZONE, **kwargs)
+
+    lower = np.array([-FLIGHT_ZONE.x / 2, -FLIGHT_ZONE.y / 2,
+                      FLIGHT_ZONE.floor_offset])
+    upper = lower + [FLIGHT_ZONE.x, FLIGHT_ZONE.y, FLIGHT_ZONE.z]
+
+    # Some of the boids start outside the flight zone
+    swarm.positions[:] = lower - 0.2 + rng.random((size, 3)) * \
+        (upper - lower + 0.4)
+    swarm.velocities[:] = rng.normal(scale=0.1, size=(size, 3))
+
+    return swarm
+
+
+def scalar_velocities(swarm: SwarmState) -> np.ndarray:
+    """
+    Runs perceive + update of every boid on its own, each starting from the
+    same velocities, as the batched rules do
+    """
+
+    start = swarm.velocities.copy()
+    result = np.empty_like(start)
+
+    # Makes the boids perceive by themselves rather than through the index
+    swarm.detected = None
+
+    for i, boid in enumerate(swarm.boids):
+        swarm.velocities[:] = start
+
+        boid.perceive(swarm.boids)
+        boid.update(DELTA_TIME)
+
+        result[i] = boid.velocity
+
+    swarm.velocities[:] = start
+
+    return result
+
+
+@pytest.mark.parametrize('options', [{},
+                                     {'skin': 0.3},
+                                     {'skin': 0.3, 'in_place': True}])
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_batched_rules_match_scalar_rules(options: dict, seed: int) -> None:
+    swarm = make_swarm(200, seed, **options)
+
+    expected = scalar_velocities(swarm)
+
+    swarm.step(DELTA_TIME)
+
+    assert np.allclose(swarm.velocities, expected)
+
+
+def test_batched_rules_match_over_several_ticks() -> None:
+    swarm = make_swarm(100, 3, skin=0.3)
+
+    for _ in range(20):
+        expected = scalar_velocities(swarm)
+
+        swarm.step(DELTA_TIME)
+
+        assert np.allclose(swarm.velocities, expected)
+
+        swarm.positions += swarm.velocities * DELTA_TIME
+
+
+def test_stationary_boids_do_not_produce_nan() -> None:
+    swarm = make_swarm(50, 4)
+    swarm.velocities[:] = 0
+
+    swarm.step(DELTA_TIME)
+
+    assert np.isfinite(swarm.velocities).all()
+
+
+def test_update_of_an_index_array_matches_the_whole_update() -> None:
+    swarm = make_swarm(120, 5)
+    start = swarm.velocities.copy()
+
+    swarm.perceive()
+    expected = np.empty_like(start)
+    swarm.update(DELTA_TIME, out=expected)
+
+    rows = np.array([3, 11, 50, 64, 97])
+    swarm.flockmates = swarm.flockmates.take(rows)
+    swarm.close = swarm.close.take(rows)
+    swarm.downwash = swarm.downwash.take(rows)
+
+    swarm.update(DELTA_TIME, rows)
+
+    others = np.setdiff1d(np.arange(len(swarm)), rows)
+
+    assert np.allclose(swarm.velocities[rows], expected[rows])
+    assert np.array_equal(swarm.velocities[others], start[others])
+
+
+def test_no_flocking_time_leaves_the_flocking_out() -> None:
+    swarm = make_swarm(80, 6)
+    swarm.perceive()
+
+    without_flocking = np.empty_like(swarm.velocities)
+    swarm.update(DELTA_TIME, out=without_flocking, flocking_time=0)
+
+    # The same update with no flockmates at all
+    swarm.flockmates = swarm.flockmates.subset(
+        np.zeros(len(swarm.flockmates), bool))
+    swarm.update(DELTA_TIME)
+
+    assert np.allclose(swarm.velocities, without_flocking)
+
+
+def test_level_of_detail_at_full_rate_matches_step() -> None:
+    swarm = make_swarm(150, 7)
+    lod_swarm = make_swarm(150, 7)
+    lod = LevelOfDetail(max_interval=1)
+
+    for _ in range(10):
+        swarm.step(DELTA_TIME)
+        lod.step(lod_swarm, DELTA_TIME)
+
+        assert np.allclose(lod_swarm.velocities, swarm.velocities)
+
+        swarm.positions += swarm.velocities * DELTA_TIME
+        lod_swarm.positions += lod_swarm.velocities * DELTA_TIME
@@ -0,0 +1,110 @@
+import pytest
+from entities.boids.scheduler import FixedRateScheduler, OverrunPolicy
+
+"""
+Checks the deadlines and delta_times of FixedRateScheduler on a fake clock.
+"""
+
+PERIOD = 0.01
+
+
+class FakeClock:
+    """
+    Clock that only moves when it is slept on or a tick is made to take time
+    """
+
+    def __init__(self) -> None:
+        self.now = 100.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_scheduler(overrun: OverrunPolicy, **kwargs) -> tuple:
+    clock = FakeClock()
+    scheduler = FixedRateScheduler(PERIOD, overrun, clock=clock,
+                                   sleep=clock.sleep, **kwargs)
+
+    return clock, scheduler
+
+
+def run(clock: FakeClock, scheduler: FixedRateScheduler,
+        durations: list) -> list:
+    """
+    Runs one tick per duration, each taking that long, and returns the
+    delta_times handed out
+    """
+
+    delta_times = []
+
+    for duration in durations:
+        delta_times.append(scheduler.wait())
+        clock.now += duration
+
+    return delta_times
+
+
+@pytest.mark.parametrize('overrun', list(OverrunPolicy))
+def test_ticks_on_time_get_the_period(overrun: OverrunPolicy) -> None:
+    clock, scheduler = make_scheduler(overrun)
+
+    delta_times = run(clock, scheduler, [0.002] * 5)
+
+    assert delta_times == pytest.approx([PERIOD] * 5)
+    assert clock.sleeps == pytest.approx([0.008] * 4)
+    assert scheduler.overruns == 0
+    assert scheduler.missed_deadlines == 0
+
+
+def test_skip_drops_missed_deadlines_and_clamps_delta_time() -> None:
+    clock, scheduler = make_scheduler(OverrunPolicy.SKIP)
+
+    # The second tick stalls for 35 ms
+    delta_times = run(clock, scheduler, [0.002, 0.035, 0.002, 0.002])
+
+    assert delta_times[2] == pytest.approx(2 * PERIOD)
+    assert max(delta_times) <= scheduler.max_delta_time
+    assert scheduler.overruns == 1
+    assert scheduler.missed_deadlines == 2
+
+    # Back on the original grid of deadlines
+    assert (clock.now - 100.0) % PERIOD == pytest.approx(0.002)
+
+
+def test_skip_respects_a_custom_max_delta_time() -> None:
+    clock, scheduler = make_scheduler(OverrunPolicy.SKIP,
+                                      max_delta_time=0.015)
+
+    delta_times = run(clock, scheduler, [0.002, 0.035, 0.002])
+
+    assert delta_times[2] == pytest.approx(0.015)
+
+
+def test_catch_up_runs_the_missed_ticks_with_the_period() -> None:
+    clock, scheduler = make_scheduler(OverrunPolicy.CATCH_UP)
+
+    delta_times = run(clock, scheduler, [0.002, 0.035, 0.0, 0.0, 0.002])
+
+    assert delta_times == pytest.approx([PERIOD] * 5)
+    assert scheduler.missed_deadlines == 0
+
+    # The missed ticks ran back to back without sleeping
+    assert len(clock.sleeps) == 1
+
+
+def test_clamp_restarts_the_schedule_from_now() -> None:
+    clock, scheduler = make_scheduler(OverrunPolicy.CLAMP)
+
+    delta_times = run(clock, scheduler, [0.002, 0.035, 0.002, 0.002])
+
+    assert delta_times[2] == pytest.approx(2 * PERIOD)
+    assert delta_times[3] == pytest.approx(PERIOD)
+    assert scheduler.overruns == 1
+
+    # The deadlines now count from the late tick
+    assert clock.sleeps[-1] == pytest.approx(0.008)
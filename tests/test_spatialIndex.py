@@ -0,0 +1,191 @@
+import numpy as np
+import pytest
+from entities.boids.spatialIndex import (Neighbours, VerletList,
+                                         find_neighbours, find_neighbours_of)
+
+"""
+Checks the neighbour searches of spatialIndex against a brute-force search,
+and that VerletList finds what a fresh search finds.
+"""
+
+
+def make_swarm(size: int, seed: int) -> tuple:
+    """
+    Positions in a 3 m cube and a visual range and minimum distance per boid
+    """
+
+    rng = np.random.default_rng(seed)
+
+    positions = rng.random((size, 3)) * 3.0
+    visual_range = rng.uniform(0.3, 0.8, size)
+    minimum_distance = visual_range * rng.uniform(0.2, 0.6, size)
+
+    return positions, visual_range, minimum_distance
+
+
+def brute_force(positions: any, limit: any, own: any) -> set:
+    """
+    (row, index) of every pair closer than the limit of the boid at the row,
+    the rows counting through `own`
+    """
+
+    pairs = set()
+
+    for row, i in enumerate(own):
+        distances = np.linalg.norm(positions - positions[i], axis=1)
+
+        for j in np.flatnonzero(distances < limit[i]):
+            if j != i:
+                pairs.add((row, int(j)))
+
+    return pairs
+
+
+def pairs_of(neighbours: Neighbours) -> set:
+    return set(zip(neighbours.rows.tolist(), neighbours.indices.tolist()))
+
+
+def check_distances(neighbours: Neighbours, positions: any, own: any) -> None:
+    expected = np.linalg.norm(positions[own[neighbours.rows]] -
+                              positions[neighbours.indices], axis=1)
+
+    np.testing.assert_allclose(neighbours.distances, expected)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_find_neighbours_matches_brute_force(seed: int) -> None:
+    positions, visual_range, minimum_distance = make_swarm(300, seed)
+    own = np.arange(len(positions))
+
+    detected, close = find_neighbours(positions, visual_range,
+                                      minimum_distance)
+
+    assert pairs_of(detected) == brute_force(positions, visual_range, own)
+    assert pairs_of(close) == brute_force(positions, minimum_distance, own)
+    check_distances(detected, positions, own)
+
+    # Sorted by row and then index
+    order = np.lexsort((detected.indices, detected.rows))
+    np.testing.assert_array_equal(order, np.arange(len(detected)))
+
+
+def test_find_neighbours_of_a_slice_counts_from_its_start() -> None:
+    positions, visual_range, minimum_distance = make_swarm(200, 3)
+    own = np.arange(50, 120)
+
+    detected, close = find_neighbours(positions, visual_range,
+                                      minimum_distance, slice(50, 120))
+
+    assert detected.size == len(own)
+    assert pairs_of(detected) == brute_force(positions, visual_range, own)
+    assert pairs_of(close) == brute_force(positions, minimum_distance, own)
+    check_distances(detected, positions, own)
+
+
+def test_find_neighbours_of_an_index_array() -> None:
+    positions, visual_range, minimum_distance = make_swarm(200, 4)
+    own = np.array([0, 7, 8, 90, 150, 199])
+
+    detected, close = find_neighbours_of(positions, visual_range,
+                                         minimum_distance, own)
+
+    assert pairs_of(detected) == brute_force(positions, visual_range, own)
+    assert pairs_of(close) == brute_force(positions, minimum_distance, own)
+    check_distances(detected, positions, own)
+
+    # The same lists as taking the rows out of the whole search
+    everyone, _ = find_neighbours(positions, visual_range, minimum_distance)
+    assert pairs_of(everyone.take(own)) == pairs_of(detected)
+
+
+def test_nobody_is_found_without_a_visual_range() -> None:
+    positions, visual_range, minimum_distance = make_swarm(20, 5)
+
+    detected, close = find_neighbours(positions, np.zeros(20),
+                                      minimum_distance)
+
+    assert len(detected) == len(close) == 0
+    np.testing.assert_array_equal(detected.count(), np.zeros(20))
+
+
+def masked_pairs(neighbours: any) -> set:
+    """
+    (row, index) of the pairs selected by the mask of MaskedNeighbours
+    """
+
+    pairs = neighbours.pairs
+    mask = neighbours.mask
+
+    return set(zip(pairs.rows[mask].tolist(), pairs.indices[mask].tolist()))
+
+
+def drift(positions: any, rng: any, step: float) -> None:
+    """
+    Moves every boid `step` meters in a random direction
+    """
+
+    directions = rng.normal(size=positions.shape)
+    directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+    positions += directions * step
+
+
+@pytest.mark.parametrize('rows', [slice(None), slice(40, 160)])
+def test_verlet_list_matches_a_fresh_search(rows: slice) -> None:
+    positions, visual_range, minimum_distance = make_swarm(200, 6)
+    rng = np.random.default_rng(6)
+    verlet = VerletList(0.3)
+
+    for _ in range(12):
+        detected, close = verlet.find(positions, visual_range,
+                                      minimum_distance, rows)
+        expected, expected_close = find_neighbours(positions, visual_range,
+                                                   minimum_distance, rows)
+
+        assert pairs_of(detected) == pairs_of(expected)
+        assert pairs_of(close) == pairs_of(expected_close)
+        np.testing.assert_allclose(detected.distances, expected.distances)
+
+        drift(positions, rng, 0.04)
+
+    # 12 steps of 4 cm, a rebuild every time a boid moved 15 cm
+    assert 1 < verlet.rebuilds < 12
+
+
+def test_verlet_list_in_place_matches_a_fresh_search() -> None:
+    positions, visual_range, minimum_distance = make_swarm(200, 7)
+    rng = np.random.default_rng(7)
+    verlet = VerletList(0.3)
+
+    for _ in range(12):
+        detected, close = verlet.find_in_place(positions, visual_range,
+                                               minimum_distance)
+        expected, expected_close = find_neighbours(positions, visual_range,
+                                                   minimum_distance)
+
+        assert masked_pairs(detected) == pairs_of(expected)
+        assert masked_pairs(close) == pairs_of(expected_close)
+        np.testing.assert_array_equal(detected.count(), expected.count())
+
+        drift(positions, rng, 0.04)
+
+
+def test_verlet_list_rebuilds_when_stale() -> None:
+    positions, visual_range, minimum_distance = make_swarm(50, 8)
+    verlet = VerletList(0.2)
+
+    verlet.find(positions, visual_range, minimum_distance)
+    assert not verlet.stale(positions, visual_range)
+
+    # Just under half the skin is still covered
+    positions[3, 0] += 0.09
+    assert not verlet.stale(positions, visual_range)
+
+    positions[3, 0] += 0.02
+    assert verlet.stale(positions, visual_range)
+
+    verlet.find(positions, visual_range, minimum_distance)
+    assert verlet.rebuilds == 2
+
+    # So is a change of the visual range
+    visual_range[0] += 0.1
+    assert verlet.stale(positions, visual_range)
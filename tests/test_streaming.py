@@ -0,0 +1,100 @@
+import socket
+import struct
+
+import numpy as np
+import pytest
+from entities.boids.flightZone import FlightZone
+from entities.boids.harvesterBoid import HarvesterBoid
+from entities.boids.standardBoid import StandardBoid
+from entities.boids.streaming import (HELLO, TICK, TelemetryServer,
+                                      _Subscriber, decode, read_frames)
+from entities.boids.swarmState import SwarmState
+
+"""
+Checks the frames TelemetryServer streams and that a slow subscriber only
+keeps the newest one.
+"""
+
+FLIGHT_ZONE = FlightZone(3.0, 3.0, 1.25, 0.3)
+
+
+class FakeVegetation:
+    """
+    Two plants, one of them active
+    """
+
+    uids = ['flower-0', 'spore-1']
+
+    def __init__(self) -> None:
+        self.active = np.array([True, False])
+        self.levels = np.array([0.5, 2.0])
+
+    def __len__(self) -> int:
+        return len(self.uids)
+
+
+def make_swarm() -> SwarmState:
+    boids = [StandardBoid('sim://0', FLIGHT_ZONE, 1, 0.1, 0.1, 1, 0),
+             HarvesterBoid('sim://1', FLIGHT_ZONE, None, 1),
+             StandardBoid('sim://2', FLIGHT_ZONE, 1, 0.1, 0.1, 1, 2)]
+
+    swarm = SwarmState(boids, FLIGHT_ZONE)
+    swarm.positions[:] = np.arange(9.0).reshape(3, 3)
+
+    return swarm
+
+
+def test_a_subscriber_receives_hello_and_ticks() -> None:
+    swarm = make_swarm()
+
+    with TelemetryServer(swarm, FakeVegetation()) as server:
+        with socket.create_connection(server.address, timeout=5.0) as viewer:
+            frames = read_frames(viewer)
+
+            hello = next(frames)
+
+            assert hello['kind'] == HELLO
+            assert hello['uids'] == swarm.uids
+            assert hello['vegetation'] == FakeVegetation.uids
+
+            # The server registered the subscriber before it said hello
+            assert server.subscribers == 1
+
+            server.publish()
+            tick = next(frames)
+
+    assert tick['kind'] == TICK
+    assert tick['tick'] == 1
+    np.testing.assert_array_equal(tick['positions'], swarm.positions)
+    np.testing.assert_array_equal(tick['velocities'], swarm.velocities)
+    np.testing.assert_array_equal(tick['types'], swarm.types)
+    np.testing.assert_array_equal(tick['active'], [True, False])
+    np.testing.assert_array_equal(tick['levels'], [0.5, 2.0])
+
+
+def test_nothing_is_built_without_subscribers() -> None:
+    with TelemetryServer(make_swarm()) as server:
+        server.publish()
+        server.publish()
+
+        assert server.tick == 2
+        assert server.published == 0
+
+
+def test_a_slow_subscriber_only_keeps_the_newest_frame() -> None:
+    subscriber = _Subscriber(connection=None)
+
+    for frame in (b'first', b'second', b'third'):
+        subscriber.offer(frame)
+
+    # The frame being sent is finished, the ones behind it are replaced
+    assert bytes(subscriber.sending) == b'first'
+    assert subscriber.waiting == b'third'
+    assert subscriber.dropped == 1
+
+
+def test_decode_rejects_other_payloads() -> None:
+    payload = struct.pack('<4sBQdII', b'NOPE', TICK, 1, 0.0, 0, 0)
+
+    with pytest.raises(ValueError):
+        decode(payload)
@@ -0,0 +1,108 @@
+import numpy as np
+from entities.boids.boid import BoidTypes
+from entities.boids.flightZone import FlightZone
+from entities.boids.harvesterBoid import HarvesterBoid
+from entities.boids.standardBoid import StandardBoid
+from entities.boids.swarmState import SwarmState
+
+"""
+Checks that the boids bound to a SwarmState are views onto its rows.
+"""
+
+FLIGHT_ZONE = FlightZone(4.0, 4.0, 1.5, 0.3)
+
+
+def make_boids() -> list:
+    boids = [StandardBoid('a', FLIGHT_ZONE, 1.0, 0.2, 0.3, 0.8, 0),
+             HarvesterBoid('b', FLIGHT_ZONE, None, 1),
+             StandardBoid('c', FLIGHT_ZONE, 0.5, 0.1, 0.1, 1.2, 2)]
+
+    for i, boid in enumerate(boids):
+        boid.position = [i, 2.0 * i, 1.0]
+
+    return boids
+
+
+def test_binding_moves_the_values_into_the_columns() -> None:
+    boids = make_boids()
+    velocities = [boid.velocity.copy() for boid in boids]
+
+    swarm = SwarmState(boids, FLIGHT_ZONE)
+
+    np.testing.assert_array_equal(swarm.positions[:, 1], [0.0, 2.0, 4.0])
+    np.testing.assert_array_equal(swarm.velocities, velocities)
+    np.testing.assert_array_equal(swarm.cohesion, [0.3, 1, 0.1])
+    np.testing.assert_array_equal(swarm.visual_range, [0.8, 0.5, 1.2])
+    np.testing.assert_array_equal(swarm.types,
+                                  [BoidTypes.STANDARD.value,
+                                   BoidTypes.HARVESTER.value,
+                                   BoidTypes.STANDARD.value])
+
+    assert swarm.uids == ['a', 'b', 'c']
+    assert swarm.indices['c'] == 2
+
+
+def test_boids_read_and_write_their_rows() -> None:
+    boids = make_boids()
+    swarm = SwarmState(boids, FLIGHT_ZONE)
+
+    # Reads see the columns, in place changes included
+    swarm.positions[1] = [7.0, 8.0, 9.0]
+    np.testing.assert_array_equal(boids[1].position, [7.0, 8.0, 9.0])
+
+    boids[2].velocity += 1.0
+    boids[0].separation = 3.0
+    boids[0].yaw_rate = 0.5
+
+    np.testing.assert_array_equal(swarm.velocities[2], boids[2].velocity)
+    assert swarm.separation[0] == 3.0
+    assert swarm.yaw_rates[0] == 0.5
+
+    assert np.shares_memory(boids[0].position, swarm.positions)
+
+
+def test_set_positions_copies_by_uid() -> None:
+    boids = make_boids()
+    swarm = SwarmState(boids, FLIGHT_ZONE)
+
+    swarm.set_positions({'c': [1.0, 1.0, 1.0],
+                         'a': [2.0, 2.0, 2.0],
+                         'b': [3.0, 3.0, 3.0]})
+
+    np.testing.assert_array_equal(swarm.positions[:, 0], [2.0, 3.0, 1.0])
+    np.testing.assert_array_equal(boids[2].position, [1.0, 1.0, 1.0])
+
+
+def test_from_arrays_works_on_the_given_arrays() -> None:
+    boids = make_boids()
+    swarm = SwarmState(boids, FLIGHT_ZONE)
+
+    columns = [column for column, _ in SwarmState.COLUMNS.values()]
+    arrays = {column: getattr(swarm, column)
+              for column in columns + ['types', 'flock_with_own_type']}
+
+    view = SwarmState.from_arrays(arrays, FLIGHT_ZONE)
+
+    assert len(view) == 3
+    assert view.positions is swarm.positions
+
+    # Outside the flight zone, so keep_within_bounds turns it back
+    swarm.positions[0] = [3.0, 0.0, 1.0]
+    before = swarm.velocities.copy()
+
+    view.step(1.0 / 60)
+
+    # The boids of the original state see the update
+    assert not np.array_equal(boids[0].velocity, before[0])
+    np.testing.assert_array_equal(boids[0].velocity, view.velocities[0])
+
+
+def test_release_keeps_the_values() -> None:
+    boids = make_boids()
+    swarm = SwarmState(boids, FLIGHT_ZONE)
+    positions = swarm.positions.copy()
+
+    swarm.release()
+
+    np.testing.assert_array_equal(swarm.positions, positions)
+    np.testing.assert_array_equal(boids[2].position, positions[2])
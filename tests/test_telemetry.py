@@ -0,0 +1,134 @@
+import numpy as np
+import pytest
+from entities.boids.flightZone import FlightZone
+from entities.boids.harvesterBoid import HarvesterBoid
+from entities.boids.manager import BoidManager
+from entities.boids.standardBoid import StandardBoid
+from entities.boids.swarmState import SwarmState
+from entities.boids.telemetry import TelemetryLog, TelemetryRecorder
+from simulation.replayController import ReplayController
+from simulation.simulatedController import SimulatedController
+
+"""
+Checks that a telemetry log reads back what was recorded, and that a replay
+rebuilds the recorded swarm from its header.
+"""
+
+FLIGHT_ZONE = FlightZone(3.0, 3.0, 1.25, 0.3)
+
+UPDATE_RATE = 1.0 / 60
+
+
+class FakeClock:
+    """
+    Clock that moves 10 ms every time it is read
+    """
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        self.now += 0.01
+
+        return self.now
+
+
+def make_boids(size: int) -> list:
+    return [HarvesterBoid(f'sim://{i}', FLIGHT_ZONE, None, i) if i % 3 == 0
+            else StandardBoid(f'sim://{i}', FLIGHT_ZONE, 1, 0.1, 0.2, 1, i)
+            for i in range(size)]
+
+
+def test_the_log_reads_back_what_was_recorded(tmp_path: any) -> None:
+    path = tmp_path / 'ticks.tlm'
+    swarm = SwarmState(make_boids(4), FLIGHT_ZONE)
+    rng = np.random.default_rng(0)
+
+    positions = rng.random((5, 4, 3))
+    velocities = rng.random((5, 4, 3))
+
+    # Room for two ticks at a time, so the file grows twice
+    with TelemetryRecorder(str(path), swarm, capacity=2,
+                           clock=FakeClock()) as recorder:
+        for tick in range(5):
+            recorder.record(UPDATE_RATE * (tick + 1), positions[tick],
+                            velocities[tick])
+
+    log = TelemetryLog(str(path))
+
+    assert len(log) == 5
+    np.testing.assert_array_equal(log.positions, positions)
+    np.testing.assert_array_equal(log.velocities, velocities)
+    np.testing.assert_allclose(log.timestamps,
+                               1000.0 + 0.01 * np.arange(1, 6))
+    np.testing.assert_allclose(log.delta_times,
+                               UPDATE_RATE * np.arange(1, 6))
+
+    assert log.uids == swarm.uids
+    assert log.types == ['HARVESTER', 'STANDARD', 'STANDARD', 'HARVESTER']
+    assert log.parameters['cohesion'] == swarm.cohesion.tolist()
+    assert log.header['flight_zone'] == FLIGHT_ZONE._asdict()
+    np.testing.assert_array_equal(log.initial_velocities, swarm.velocities)
+
+
+def test_a_log_that_was_not_closed_can_be_read(tmp_path: any) -> None:
+    path = tmp_path / 'ticks.tlm'
+    swarm = SwarmState(make_boids(3), FLIGHT_ZONE)
+
+    recorder = TelemetryRecorder(str(path), swarm, capacity=8)
+
+    for _ in range(3):
+        recorder.record(UPDATE_RATE, swarm.positions, swarm.velocities)
+
+    recorder.flush()
+
+    # Only the ticks counted so far, not the room made for more
+    assert len(TelemetryLog(str(path))) == 3
+
+    recorder.close()
+
+
+def test_other_files_are_rejected(tmp_path: any) -> None:
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'\0' * 64)
+
+    with pytest.raises(ValueError):
+        TelemetryLog(str(path))
+
+
+def test_replay_rebuilds_the_swarm_and_its_velocities(tmp_path: any) -> None:
+    path = str(tmp_path / 'flight.tlm')
+    boids = make_boids(9)
+    uris = [boid.uid for boid in boids]
+
+    controller = SimulatedController(uris, FLIGHT_ZONE, realtime=False,
+                                     seed=1)
+    manager = BoidManager(UPDATE_RATE, controller, FLIGHT_ZONE, boids,
+                          telemetry=path)
+
+    try:
+        for _ in range(20):
+            manager.tick(UPDATE_RATE)
+            controller.step(UPDATE_RATE)
+    finally:
+        manager.close()
+
+    replay = ReplayController(path)
+    flight_zone = FlightZone(**replay.flight_zone_fields)
+    replayed = replay.boids(flight_zone)
+
+    assert flight_zone == FLIGHT_ZONE
+    assert [type(boid) for boid in replayed] == \
+        [type(boid) for boid in boids]
+    assert [boid.cohesion for boid in replayed] == \
+        [boid.cohesion for boid in boids]
+
+    manager = BoidManager(UPDATE_RATE, replay, flight_zone, replayed)
+
+    try:
+        deviations = replay.replay(manager)
+    finally:
+        manager.close()
+
+    assert len(deviations) == 20
+    assert max(deviations) < 1e-12
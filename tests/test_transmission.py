@@ -0,0 +1,135 @@
+import numpy as np
+import pytest
+from entities.boids.transmission import CommandTransmitter, radio_of
+
+"""
+Checks which commands CommandTransmitter suppresses and resends, on a fake
+controller and a fake clock.
+"""
+
+UIDS = ['radio://0/80/2M/E7E7E7E7E0',
+        'radio://0/80/2M/E7E7E7E7E1',
+        'radio://1/90/2M/E7E7E7E7E2']
+
+
+class FakeClock:
+    """
+    Clock that only moves when it is set
+    """
+
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeController:
+    """
+    Controller that records the commands of every call
+    """
+
+    def __init__(self) -> None:
+        self.calls = []
+
+    def set_swarm_velocities(self, velocities: dict, yaw_rate: float) -> None:
+        # The values are views onto the transmitter's buffers
+        self.calls.append(({uid: velocity.copy()
+                            for uid, velocity in velocities.items()},
+                           yaw_rate))
+
+
+def make_transmitter(**kwargs) -> tuple:
+    clock = FakeClock()
+    controller = FakeController()
+    transmitter = CommandTransmitter(controller, UIDS, clock=clock, **kwargs)
+
+    return clock, controller, transmitter
+
+
+def test_radio_of() -> None:
+    assert radio_of(UIDS[0]) == 'radio://0'
+    assert radio_of('sim://1/7') == 'sim://1'
+    assert radio_of('replay://3') == 'replay'
+
+
+def test_every_drone_gets_a_first_command() -> None:
+    clock, controller, transmitter = make_transmitter(threshold=0.1)
+
+    transmitter.send(np.zeros((3, 3)), 0)
+
+    assert list(controller.calls[0][0]) == UIDS
+    assert transmitter.statistics['sent'] == 3
+    assert transmitter.statistics['radios_commanded'] == 2
+
+
+def test_small_changes_are_suppressed() -> None:
+    clock, controller, transmitter = make_transmitter(threshold=0.1)
+    velocities = np.zeros((3, 3))
+    transmitter.send(velocities, 0)
+
+    velocities[0, 0] = 0.05
+    velocities[2, 1] = 0.5
+    clock.now += 0.01
+    transmitter.send(velocities, 0)
+
+    commands, _ = controller.calls[1]
+
+    assert list(commands) == [UIDS[2]]
+    np.testing.assert_array_equal(commands[UIDS[2]], [0.0, 0.5, 0.0])
+    assert transmitter.statistics['suppressed'] == 2
+    assert transmitter.statistics['radios_commanded'] == 3
+
+    # The suppressed change still counts against the command last sent
+    velocities[0, 0] = 0.11
+    clock.now += 0.01
+    transmitter.send(velocities, 0)
+
+    assert list(controller.calls[2][0]) == [UIDS[0]]
+
+
+def test_unchanged_commands_are_resent_after_the_keep_alive() -> None:
+    clock, controller, transmitter = make_transmitter(threshold=0.1)
+    velocities = np.full((3, 3), 0.2)
+
+    transmitter.send(velocities, 0)
+
+    clock.now += transmitter.keep_alive / 2
+    transmitter.send(velocities, 0)
+
+    assert len(controller.calls) == 1
+
+    clock.now += transmitter.keep_alive / 2
+    transmitter.send(velocities, 0)
+
+    assert len(controller.calls) == 2
+    assert list(controller.calls[1][0]) == UIDS
+
+    for velocity in controller.calls[1][0].values():
+        np.testing.assert_array_equal(velocity, 0.2)
+
+
+def test_no_keep_alive_never_resends() -> None:
+    clock, controller, transmitter = make_transmitter(threshold=0.1,
+                                                      keep_alive=0)
+    velocities = np.zeros((3, 3))
+
+    for _ in range(5):
+        transmitter.send(velocities, 0)
+        clock.now += 10.0
+
+    assert len(controller.calls) == 1
+    assert transmitter.statistics['suppressed_ratio'] == pytest.approx(0.8)
+
+
+def test_a_new_yaw_rate_resends_every_command() -> None:
+    clock, controller, transmitter = make_transmitter(threshold=0.1)
+    velocities = np.zeros((3, 3))
+    transmitter.send(velocities, 0)
+
+    transmitter.send(velocities, 0.5)
+
+    commands, yaw_rate = controller.calls[1]
+
+    assert list(commands) == UIDS
+    assert yaw_rate == 0.5